@@ -5,17 +5,1836 @@ import os
 import sys
 import shutil
 import subprocess
+import io
+import struct
+import math
+import re
 
 # Disable keyring to prevent GNOME keyring warnings on non-GNOME systems
 os.environ['PYTHON_KEYRING_BACKEND'] = 'keyring.backends.null.Keyring'
 import tkinter as tk
 from tkinter import filedialog, messagebox
-from PIL import Image, ImageTk
+from PIL import Image, ImageTk, ImageChops, ImageFile, ImageMode
 import json
+import sqlite3
+import hashlib
 import random
 import time
+import threading
+import select
+import ctypes
+import ctypes.util
+import queue
+import itertools
+import bisect
+import tracemalloc
+from array import array
+from collections import OrderedDict
+import multiprocessing
+from multiprocessing import shared_memory
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor, wait, FIRST_COMPLETED
 from send2trash import send2trash
 
+# NumPy is optional: it enables percentile/gamma tone mapping of 16-bit and float images
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Optional faster decoder backends, used automatically when installed (see DecoderRegistry)
+try:
+    import pyvips
+except (ImportError, OSError):
+    pyvips = None
+try:
+    import turbojpeg
+except ImportError:
+    turbojpeg = None
+
+# Pillow modes with more than 8 bits per sample, which need tone mapping for display
+HIGH_BIT_DEPTH_MODES = ('I;16', 'I;16L', 'I;16B', 'I;16N', 'I', 'F')
+
+# Image file extensions shown by the viewer (including .enc for encrypted/renamed images)
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
+
+def is_image_name(name, image_extensions=IMAGE_EXTENSIONS):
+    """Whether a file name looks like a viewable image (dot files are skipped)"""
+    return not name.startswith('.') and name.lower().endswith(image_extensions)
+
+def is_image_candidate(name):
+    """Whether a file should be sniffed for image content: image extensions and extensionless files"""
+    return not name.startswith('.') and (name.lower().endswith(IMAGE_EXTENSIONS) or '.' not in name)
+
+# Leading bytes of the formats the viewer displays
+IMAGE_SIGNATURES = (
+    (b'\xff\xd8\xff', 'JPEG'),
+    (b'\x89PNG\r\n\x1a\n', 'PNG'),
+    (b'GIF87a', 'GIF'),
+    (b'GIF89a', 'GIF'),
+    (b'II*\x00', 'TIFF'),
+    (b'MM\x00*', 'TIFF'),
+    (b'\x00\x00\x01\x00', 'ICO'),
+    (b'BM', 'BMP'),
+)
+SNIFF_SIZE = 32  # Bytes read to classify a file
+
+def sniff_image_format(header):
+    """Image format named by a file's leading bytes, or None if it isn't a supported image"""
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'WEBP'
+    for signature, image_format in IMAGE_SIGNATURES:
+        if header.startswith(signature):
+            return image_format
+    return None
+
+def scan_directory(folder_path):
+    """List a folder in a single os.scandir pass, returning (files, subdirectories) as DirEntry lists.
+    
+    DirEntry types come from the directory listing itself, so no per-entry stat is needed
+    (except for symlinks), and entry.stat() results are cached on the entry for later use.
+    """
+    files = []
+    dirs = []
+    with os.scandir(folder_path) as entries:
+        for entry in entries:
+            try:
+                if entry.is_file():
+                    files.append(entry)
+                elif entry.is_dir():
+                    dirs.append(entry)
+            except OSError:
+                pass  # Vanished or unreadable entry
+    return files, dirs
+
+def natural_sort_key(name):
+    """Sort key that orders embedded numbers by value, so IMG_9 comes before IMG_10"""
+    # re.split with a group alternates text and digit runs, so ints and strs never meet in a comparison
+    parts = re.split(r'(\d+)', name.lower())
+    return tuple(int(part) if i % 2 else part for i, part in enumerate(parts))
+
+def parse_jump_position(text, count):
+    """0-based list position for an image number ("40000") or a percentage ("75%"), clamped to
+    the list; None if the text is neither"""
+    text = text.strip()
+    try:
+        if text.endswith('%'):
+            index = round(float(text[:-1]) / 100 * (count - 1))
+        else:
+            index = int(text) - 1
+    except ValueError:
+        return None
+    return max(0, min(index, count - 1))
+
+class SortKeys:
+    """Sort values for the image list orders that need file system access.
+    
+    Name and natural order come from the path itself (see ImageList.sort_by). Modified time
+    and size come from stat data (ideally the scandir entry's), and capture date from the
+    metadata probe (EXIF DateTimeOriginal, falling back to the modified time). Values are
+    64-bit integers, kept by the image list in one array per mode; equal values keep the
+    order the list had before sorting.
+    """
+    
+    MODES = {'name': "Name", 'natural': "Natural", 'mtime': "Modified", 'size': "Size", 'date': "Capture date"}
+    IO_MODES = ('mtime', 'size', 'date')  # Modes whose values need file system access
+    
+    def __init__(self, probe):
+        self.probe = probe
+    
+    def value(self, mode, path, stat=None):
+        """Sort value of path for one of the IO modes"""
+        if stat is None:
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+        mtime = stat.st_mtime_ns if stat else 0
+        if mode == 'mtime':
+            return mtime
+        if mode == 'size':
+            return stat.st_size if stat else 0
+        meta = self.probe(path)
+        date_taken = meta.get('date_taken') if meta else None
+        digits = re.sub(r'\D', '', date_taken or '')
+        if len(digits) != 14:
+            digits = time.strftime('%Y%m%d%H%M%S', time.localtime(mtime / 1e9))
+        return int(digits)  # "2024:07:01 12:30:00" -> 20240701123000
+
+def natural_path_key(path):
+    """Sort key of a path in natural order (the whole path, so library mode keeps folders together)"""
+    return (natural_sort_key(path), path)
+
+class ImageList:
+    """Compact sequence of unique image paths, for folders of up to millions of files.
+    
+    Each path is split into its folder prefix, stored once per folder, and its base name,
+    stored UTF-8 encoded and NUL-terminated in one buffer with an array of offsets (bulk
+    reads decode the whole buffer in one call). The list
+    order is an array of entry ids, so sorts, inserts and deletes move 4-byte ids instead of
+    string pointers. Membership tests and path-to-index lookups hash the path: hashes are
+    kept in sorted NumPy arrays searched by bisection (recent ones in a dict until a batch
+    is merged), or all in a dict without NumPy. An id's position is verified against the
+    order and the positions are rebuilt (once, O(n)) only when stale. Iteration, indexing
+    and slices give plain strings, so it reads like a list of paths.
+    
+    Sort values (see SortKeys) are stored in one 64-bit array per mode, indexed by entry id,
+    so sorting by them reorders ids without decoding a single path. sorted_by records the
+    order sort_by established, which insert_sorted and merge_sorted keep.
+    """
+    
+    HASH_BATCH = 65536  # Recent hashes kept in a dict before being merged into the sorted arrays
+    MISSING = -2 ** 63  # Sort value not computed yet
+    
+    def __init__(self, paths=(), sorted_by='name'):
+        self.generation = 0
+        self.clear()
+        self.sorted_by = sorted_by
+        self.extend(paths)
+    
+    def clear(self):
+        self.prefixes = []  # Folder prefixes (with their trailing separator)
+        self.prefix_ids = {}
+        self.entry_prefix = array('I')  # Entry id -> prefix id
+        self.names = bytearray()  # NUL-terminated base names, in entry id order
+        self.name_starts = array('Q')  # Entry id -> offset of its name in names
+        self.alive = bytearray()  # Entry id -> 1 while the entry is in the list
+        self.order = array('I')  # Position -> entry id
+        self.positions = array('I')  # Entry id -> position
+        self.hash_keys = None  # Sorted path hashes (NumPy) ...
+        self.hash_ids = None  # ... and their entry ids
+        self.recent = {}  # Path hash -> entry id (or list of ids), not yet merged into the arrays
+        self.dead = 0  # Removed entries whose data is still stored
+        self.sort_values = {}  # Sort mode -> array('q') of values by entry id
+        self.sorted_by = 'name'
+        self.generation += 1  # Entry ids from before a clear are meaningless
+    
+    def _path(self, entry):
+        start = self.name_starts[entry]
+        name = self.names[start:self.names.index(0, start)].decode('utf-8', 'surrogateescape')
+        return self.prefixes[self.entry_prefix[entry]] + name
+    
+    def _all_paths(self):
+        """Paths of all entries (removed ones included) by entry id, decoded in one pass"""
+        names = self.names[:-1].decode('utf-8', 'surrogateescape').split('\0') if self.names else []
+        prefixes = self.prefixes
+        return [prefixes[prefix_id] + name for prefix_id, name in zip(self.entry_prefix, names)]
+    
+    def _add_entry(self, path):
+        """Store a path and return its entry id"""
+        head, separator, name = path.rpartition(os.sep)
+        prefix = head + separator
+        prefix_id = self.prefix_ids.get(prefix)
+        if prefix_id is None:
+            prefix_id = self.prefix_ids[prefix] = len(self.prefixes)
+            self.prefixes.append(prefix)
+        entry = len(self.name_starts)
+        self.name_starts.append(len(self.names))
+        self.names += name.encode('utf-8', 'surrogateescape')
+        self.names.append(0)
+        self.entry_prefix.append(prefix_id)
+        self.alive.append(1)
+        self.positions.append(0)
+        for column in self.sort_values.values():
+            column.append(self.MISSING)
+        
+        path_hash = hash(path)
+        known = self.recent.get(path_hash)
+        if known is None:
+            self.recent[path_hash] = entry
+        elif isinstance(known, list):
+            known.append(entry)
+        else:
+            self.recent[path_hash] = [known, entry]
+        if np is not None and len(self.recent) >= self.HASH_BATCH:
+            self._merge_hashes()
+        return entry
+    
+    def _merge_hashes(self):
+        """Move the recent hashes into the sorted arrays, dropping removed entries"""
+        keys = []
+        ids = []
+        for path_hash, known in self.recent.items():
+            for entry in (known if isinstance(known, list) else (known,)):
+                keys.append(path_hash)
+                ids.append(entry)
+        keys = np.array(keys, dtype=np.int64)
+        ids = np.array(ids, dtype=np.uint32)
+        if self.hash_keys is not None:
+            keys = np.concatenate((self.hash_keys, keys))
+            ids = np.concatenate((self.hash_ids, ids))
+        live = np.frombuffer(self.alive, dtype=np.uint8)[ids] == 1
+        keys, ids = keys[live], ids[live]
+        ranked = np.argsort(keys, kind='stable')
+        self.hash_keys, self.hash_ids = keys[ranked], ids[ranked]
+        self.recent = {}
+    
+    def _find(self, path):
+        """Entry id of a path in the list, or None"""
+        path_hash = hash(path)
+        known = self.recent.get(path_hash)
+        candidates = known if isinstance(known, list) else ([] if known is None else [known])
+        if self.hash_keys is not None:
+            start = int(np.searchsorted(self.hash_keys, path_hash, 'left'))
+            end = int(np.searchsorted(self.hash_keys, path_hash, 'right'))
+            candidates = itertools.chain(candidates, self.hash_ids[start:end].tolist())
+        for entry in candidates:
+            if self.alive[entry] and self._path(entry) == path:
+                return entry
+        return None
+    
+    def _remove_entry(self, entry):
+        self.alive[entry] = 0
+        self.dead += 1
+    
+    def _maybe_compact(self):
+        """Drop the stored data of removed entries once they outnumber the live ones"""
+        if self.dead > max(4096, len(self.order)):
+            paths = self[:]
+            columns = {mode: array('q', [column[entry] for entry in self.order])
+                       for mode, column in self.sort_values.items()}
+            sorted_by = self.sorted_by
+            self.clear()
+            self.extend(paths)
+            self.sort_values, self.sorted_by = columns, sorted_by
+    
+    def __len__(self):
+        return len(self.order)
+    
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            entries = self.order[index]
+            if len(entries) < 64:
+                return [self._path(entry) for entry in entries]
+            paths = self._all_paths()
+            return [paths[entry] for entry in entries]
+        return self._path(self.order[index])
+    
+    def __iter__(self):
+        if len(self.order) < 64:
+            return (self._path(entry) for entry in self.order)
+        # Decode everything up front: much faster than entry by entry
+        return iter(self[:])
+    
+    def __contains__(self, path):
+        return isinstance(path, str) and self._find(path) is not None
+    
+    def __eq__(self, other):
+        if not isinstance(other, (ImageList, list)):
+            return NotImplemented
+        return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+    
+    def __repr__(self):
+        return f"ImageList({list(self)!r})"
+    
+    def index(self, path):
+        entry = self._find(path)
+        if entry is None:
+            raise ValueError(f"{path!r} is not in list")
+        position = self.positions[entry]
+        if position < len(self.order) and self.order[position] == entry:
+            return position
+        # Positions are stale after an insert, delete or sort: rebuild them all at once
+        if np is not None:
+            positions = np.zeros(len(self.name_starts), dtype=np.uint32)
+            positions[np.frombuffer(self.order, dtype=np.uint32)] = np.arange(len(self.order), dtype=np.uint32)
+            self.positions = array('I', positions.tobytes())
+        else:
+            self.positions = array('I', bytes(self.positions.itemsize * len(self.name_starts)))
+            for position, live_entry in enumerate(self.order):
+                self.positions[live_entry] = position
+        return self.positions[entry]
+    
+    def append(self, path):
+        entry = self._add_entry(path)
+        self.positions[entry] = len(self.order)
+        self.order.append(entry)
+    
+    def extend(self, paths):
+        for path in paths:
+            self.append(path)
+    
+    def __iadd__(self, paths):
+        self.extend(paths)
+        return self
+    
+    def insert(self, index, path):
+        self.order.insert(index, self._add_entry(path))
+    
+    def remove(self, path):
+        del self[self.index(path)]
+    
+    def pop(self, index=-1):
+        entry = self.order.pop(index)
+        path = self._path(entry)
+        self._remove_entry(entry)
+        self._maybe_compact()
+        return path
+    
+    def __delitem__(self, index):
+        removed = self.order[index]
+        del self.order[index]
+        for entry in (removed if isinstance(index, slice) else (removed,)):
+            self._remove_entry(entry)
+        self._maybe_compact()
+    
+    def __setitem__(self, index, path):
+        replaced = self.order[index]
+        self.order[index] = self._add_entry(path)
+        self._remove_entry(replaced)
+    
+    def sort(self, key=None, reverse=False):
+        """Sort like list.sort, by reordering entry ids (each key is computed once)"""
+        keys = self[:]
+        if key is not None:
+            keys = [key(path) for path in keys]
+        ranked = sorted(range(len(keys)), key=keys.__getitem__, reverse=reverse)
+        self.order = array('I', [self.order[i] for i in ranked])
+        self.sorted_by = 'name' if key is None and not reverse else None
+    
+    def _column(self, mode):
+        column = self.sort_values.get(mode)
+        if column is None:
+            column = self.sort_values[mode] = array('q', [self.MISSING]) * len(self.name_starts)
+        return column
+    
+    def missing_sort_values(self, mode):
+        """Entry ids of the listed files that have no value for mode yet"""
+        column = self._column(mode)
+        if np is not None:
+            entries = np.frombuffer(self.order, dtype=np.uint32)
+            missing = entries[np.frombuffer(column, dtype=np.int64)[entries] == self.MISSING]
+            return array('I', missing.tobytes())
+        return array('I', [entry for entry in self.order if column[entry] == self.MISSING])
+    
+    def fill_sort_values(self, mode, entries, compute, cancel=None):
+        """Store compute(mode, path) for the entry ids from missing_sort_values.
+        
+        May run on a worker thread while the list is in use: it stops if the list is cleared
+        or compacted meanwhile (sort_by computes whatever is still missing).
+        """
+        column = self._column(mode)
+        generation = self.generation
+        for entry in entries:
+            if (cancel is not None and cancel.is_set()) or self.generation != generation:
+                return
+            try:
+                path = self._path(entry)
+            except IndexError:
+                return
+            column[entry] = compute(mode, path)
+    
+    def sort_by(self, mode, compute=None):
+        """Sort by a sort mode: by path, by natural path key, or by the stored values of an IO
+        mode (stable, so equal values keep their order), computing missing values with
+        compute(mode, path)"""
+        if mode == 'name':
+            self.sort()
+        elif mode == 'natural':
+            self.sort(key=natural_path_key)
+        else:
+            column = self._column(mode)
+            if compute is not None:
+                self.fill_sort_values(mode, self.missing_sort_values(mode), compute)
+            if np is not None:
+                entries = np.frombuffer(self.order, dtype=np.uint32)
+                ranked = np.argsort(np.frombuffer(column, dtype=np.int64)[entries], kind='stable')
+                self.order = array('I', entries[ranked].tobytes())
+            else:
+                self.order = array('I', sorted(self.order, key=column.__getitem__))
+        self.sorted_by = mode
+    
+    def _sort_key(self, entry, path=None):
+        """Key of an entry in the sorted_by order"""
+        mode = self.sorted_by
+        if mode in SortKeys.IO_MODES:
+            return self.sort_values[mode][entry]
+        if path is None:
+            path = self._path(entry)
+        return path if mode == 'name' else natural_path_key(path)
+    
+    def _sorted_position(self, key, key_at=None):
+        """Where an entry with key goes in the sorted_by order (after equal keys, which only
+        stored values have), by binary search decoding O(log n) paths at most"""
+        if key_at is None:
+            key_at = lambda position: self._sort_key(self.order[position])
+        return bisect.bisect_right(range(len(self.order)), key, key=key_at)
+    
+    def _add_sorted_entry(self, path, compute, values):
+        """Store a path with its given sort values (mode -> value) and return (key, entry id)"""
+        entry = self._add_entry(path)
+        for mode, value in values.items():
+            self._column(mode)[entry] = value
+        mode = self.sorted_by
+        if mode is None:
+            return None, entry
+        if mode in SortKeys.IO_MODES and self._column(mode)[entry] == self.MISSING:
+            self.sort_values[mode][entry] = compute(mode, path)
+        return self._sort_key(entry, path), entry
+    
+    def insert_sorted(self, path, compute=None):
+        """Insert a path at its place in the sorted_by order and return its position.
+        
+        compute(mode, path) gives its sort value; lists in no known order get it at the end.
+        """
+        key, entry = self._add_sorted_entry(path, compute, {})
+        position = len(self.order) if key is None else self._sorted_position(key)
+        self.order.insert(position, entry)
+        return position
+    
+    def update_sorted(self, path, compute):
+        """Recompute the sort values of a listed file that changed and move it to its place in
+        the sorted_by order; returns (old position, new position)"""
+        entry = self._find(path)
+        old_position = self.index(path)
+        for column in self.sort_values.values():
+            column[entry] = self.MISSING  # Other modes recompute it when sorted by
+        mode = self.sorted_by
+        if mode not in SortKeys.IO_MODES:
+            return old_position, old_position  # The path, and so its place, is unchanged
+        del self.order[old_position]
+        value = self.sort_values[mode][entry] = compute(mode, path)
+        new_position = self._sorted_position(value)
+        self.order.insert(new_position, entry)
+        return old_position, new_position
+    
+    def merge_sorted(self, paths, compute=None, values=None):
+        """Insert the paths that aren't listed yet at their places in the sorted_by order.
+        
+        The new paths are sorted on their own and each one's position is found by binary
+        search, then the order is rebuilt in a single pass, so a batch of k paths costs
+        O(k log n) comparisons and one copy of the order. values maps sort modes to sequences
+        of precomputed values, aligned with paths; compute(mode, path) gives any others.
+        """
+        values = values or {}
+        batch = []
+        seen = set()
+        for i, path in enumerate(paths):
+            if path in seen or path in self:
+                continue
+            seen.add(path)
+            batch.append(self._add_sorted_entry(path, compute, {mode: column[i] for mode, column in values.items()}))
+        if self.sorted_by is None:
+            self.order.extend(entry for _, entry in batch)
+            return
+        batch.sort()
+        order = self.order
+        key_at = None
+        if self.sorted_by not in SortKeys.IO_MODES and len(batch) * len(order).bit_length() > len(order):
+            # So many searches that decoding every listed path once is cheaper
+            listed = self[:]
+            key_at = listed.__getitem__ if self.sorted_by == 'name' else lambda position: natural_path_key(listed[position])
+        merged = array('I')
+        start = 0
+        for key, entry in batch:
+            position = self._sorted_position(key, key_at)  # Still searches the old order
+            merged += order[start:position]
+            merged.append(entry)
+            start = position
+        merged += order[start:]
+        self.order = merged
+
+class FormatSniffer:
+    """Classify files as images by their first bytes, caching verdicts per (path, size, mtime).
+    
+    Renamed and extensionless images are found, and files with an image extension that
+    aren't images are filtered out before they reach the image list. Verdicts are kept in
+    memory and on disk, so a folder is only read once until its files change.
+    """
+    
+    def __init__(self, cache_file, limit=200000, workers=8, chunk_size=256):
+        self.cache_file = cache_file
+        self.limit = limit  # Verdicts kept on disk
+        self.workers = workers
+        self.chunk_size = chunk_size  # Files classified per pool task
+        self.verdicts = {}  # path -> [size, mtime_ns, format or None]
+        self.dirty = False
+        self.pool = None
+        self.lock = threading.Lock()
+    
+    def load(self):
+        """Load the verdicts saved by an earlier session"""
+        try:
+            if os.path.exists(self.cache_file):
+                with open(self.cache_file, 'r') as f:
+                    self.verdicts = json.load(f)
+        except Exception as e:
+            print(f"Could not load format cache: {e}")
+            self.verdicts = {}
+    
+    def save(self):
+        """Save the verdicts, keeping only the most recent entries"""
+        if not self.dirty:
+            return
+        try:
+            with self.lock:
+                entries = list(self.verdicts.items())[-self.limit:]
+            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
+            with open(self.cache_file, 'w') as f:
+                json.dump(dict(entries), f)
+            self.dirty = False
+        except Exception as e:
+            print(f"Could not save format cache: {e}")
+    
+    def verdict(self, path, stat=None):
+        """Image format of a file (e.g. 'JPEG'), or None if it isn't a readable image"""
+        try:
+            if stat is None:
+                stat = os.stat(path)
+        except OSError:
+            return None
+        cached = self.verdicts.get(path)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        try:
+            with open(path, 'rb') as f:
+                image_format = sniff_image_format(f.read(SNIFF_SIZE))
+        except OSError:
+            return None  # Unreadable for now; don't remember
+        with self.lock:
+            self.verdicts.pop(path, None)
+            self.verdicts[path] = [stat.st_size, stat.st_mtime_ns, image_format]
+            self.dirty = True
+        return image_format
+    
+    def select(self, entries):
+        """Paths of the DirEntries that are images, in order (on the calling thread)"""
+        images = []
+        for entry in entries:
+            try:
+                if self.verdict(entry.path, entry.stat()):
+                    images.append(entry.path)
+            except OSError:
+                continue
+        return images
+    
+    def select_parallel(self, entries):
+        """Like select, with the stats and reads spread over a thread pool in chunks"""
+        if len(entries) <= self.chunk_size:
+            return self.select(entries)
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        chunks = [entries[i:i + self.chunk_size] for i in range(0, len(entries), self.chunk_size)]
+        return [path for images in self.pool.map(self.select, chunks) for path in images]
+
+def list_image_files(folder_path, sniffer=None):
+    """Sorted paths of the image files in a folder, classified by content when a sniffer is given"""
+    files, _ = scan_directory(folder_path)
+    if sniffer is not None:
+        return ImageList(sorted(sniffer.select_parallel([entry for entry in files if is_image_candidate(entry.name)])))
+    return ImageList(sorted(entry.path for entry in files if is_image_name(entry.name)))
+
+def list_subfolders(folder_path):
+    """Sorted names of the visible subfolders of a folder"""
+    _, dirs = scan_directory(folder_path)
+    return sorted(entry.name for entry in dirs if not entry.name.startswith('.'))
+
+def folder_mtime(folder_path):
+    """Modification time of a folder in ns, or None if it can't be read"""
+    try:
+        return os.stat(folder_path).st_mtime_ns
+    except OSError:
+        return None
+
+def folder_contains_image(folder_path, image_extensions=IMAGE_EXTENSIONS, sniffer=None):
+    """Whether a folder directly contains an image file, stopping at the first one found.
+    
+    With a sniffer, files are classified by content as in list_image_files (cached verdicts
+    make this a stat per file), so navigation agrees with what the folder will list.
+    """
+    try:
+        with os.scandir(folder_path) as entries:
+            for entry in entries:
+                try:
+                    if sniffer is not None:
+                        if (is_image_candidate(entry.name) and entry.is_file()
+                                and sniffer.verdict(entry.path, entry.stat())):
+                            return True
+                    elif is_image_name(entry.name, image_extensions) and entry.is_file():
+                        return True
+                except OSError:
+                    continue
+    except OSError:
+        pass
+    return False
+
+def walk_image_tree(root_path, cancel, workers=8, visit=None, sniffer=None):
+    """Walk a folder tree, reading directories in parallel, and yield (folder, image paths, values)
+    per folder.
+    
+    Each directory is listed by one of `workers` threads and its visible subfolders are queued
+    as soon as they are seen, so wide trees are read concurrently. Folders are yielded in
+    completion order, not tree order. visit(entry) is called on the worker thread for every
+    image found, e.g. to stat it while the entry is at hand, and values lists the results
+    (None without visit). With a sniffer, images are
+    recognised by content rather than by name. Dot folders and symlinked
+    folders (which could form cycles) are skipped; unreadable folders are ignored.
+    """
+    def read_folder(folder_path):
+        files, dirs = scan_directory(folder_path)
+        if sniffer is not None:
+            candidates = [entry for entry in files if is_image_candidate(entry.name)]
+            images = sniffer.select(candidates)
+        else:
+            candidates = [entry for entry in files if is_image_name(entry.name)]
+            images = [entry.path for entry in candidates]
+        values = None
+        if visit is not None:
+            found = set(images)
+            values = [visit(entry) for entry in candidates if entry.path in found]
+        subfolders = [entry.path for entry in dirs if not entry.name.startswith('.') and not entry.is_symlink()]
+        return folder_path, images, values, subfolders
+    
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = {pool.submit(read_folder, root_path)}
+        try:
+            while pending and not cancel.is_set():
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        folder_path, images, values, subfolders = future.result()
+                    except OSError:
+                        continue
+                    pending.update(pool.submit(read_folder, subfolder) for subfolder in subfolders)
+                    yield folder_path, images, values
+        finally:
+            for future in pending:
+                future.cancel()
+
+def fit_scale(meta, target_size):
+    """Scale factor (at most 1) that fits an image of the probed size inside target_size"""
+    if target_size is None:
+        return 1.0
+    return min(1.0, target_size[0] / meta['width'], target_size[1] / meta['height'])
+
+class PillowDecoder:
+    """Decode with Pillow. Handles every format; JPEGs can be decoded at 1/2, 1/4 or 1/8 scale."""
+    
+    name = "pillow"
+    formats = None  # Anything Pillow can open
+    capabilities = ('scaled', 'streaming')  # Scaled for JPEG only; streaming via the progressive loader
+    speed = 1.0  # Relative cost per decoded megapixel
+    
+    @staticmethod
+    def is_available():
+        return True
+    
+    def supports(self, meta, target_size=None, needs=()):
+        return all(need in self.capabilities for need in needs)
+    
+    def decoded_scale(self, meta, target_size):
+        """Scale the decoder will actually produce for target_size"""
+        if meta['format'] != 'JPEG':
+            return 1.0
+        # libjpeg scales by 1/2, 1/4 or 1/8, never below the target
+        return 1 / 2 ** min(3, int(math.log2(1 / fit_scale(meta, target_size))))
+    
+    def estimate_cost(self, meta, target_size=None):
+        pixels = meta['width'] * meta['height'] * self.decoded_scale(meta, target_size) ** 2
+        return pixels / 1e6 * self.speed
+    
+    def decode(self, image_path, meta, target_size=None):
+        image = Image.open(image_path)
+        scale = fit_scale(meta, target_size)
+        if image.format == 'JPEG' and scale < 1.0:
+            image.draft(image.mode, (int(image.width * scale) + 1, int(image.height * scale) + 1))
+        image.load()
+        return image
+
+class TurboJPEGDecoder(PillowDecoder):
+    """Decode JPEGs with PyTurboJPEG, which also offers 3/8, 5/8 ... scaling for tighter screen-sized decodes"""
+    
+    name = "turbojpeg"
+    formats = ('JPEG',)
+    capabilities = ('scaled',)
+    speed = 0.9  # Same libjpeg-turbo core, less glue
+    
+    def __init__(self):
+        self.jpeg = turbojpeg.TurboJPEG()
+        self.scaling_factors = sorted(self.jpeg.scaling_factors, key=lambda f: f[0] / f[1])
+    
+    @staticmethod
+    def is_available():
+        return turbojpeg is not None and np is not None
+    
+    def supports(self, meta, target_size=None, needs=()):
+        return (meta['format'] == 'JPEG' and meta['mode'] in ('L', 'RGB')
+                and all(need in self.capabilities for need in needs))
+    
+    def scaling_factor(self, meta, target_size):
+        scale = fit_scale(meta, target_size)
+        for factor in self.scaling_factors:
+            if factor[0] / factor[1] >= scale:
+                return factor
+        return (1, 1)
+    
+    def decoded_scale(self, meta, target_size):
+        factor = self.scaling_factor(meta, target_size)
+        return factor[0] / factor[1]
+    
+    def decode(self, image_path, meta, target_size=None):
+        with open(image_path, 'rb') as f:
+            data = f.read()
+        gray = meta['mode'] == 'L'
+        pixels = self.jpeg.decode(data, pixel_format=turbojpeg.TJPF_GRAY if gray else turbojpeg.TJPF_RGB,
+                                  scaling_factor=self.scaling_factor(meta, target_size))
+        image = Image.fromarray(pixels[:, :, 0] if gray else pixels)
+        image.format = 'JPEG'
+        return image
+
+class VipsDecoder(PillowDecoder):
+    """Decode with libvips: shrink-on-load for JPEG/WebP and low-memory, multi-threaded decoding of huge TIFFs/PNGs"""
+    
+    name = "vips"
+    formats = ('JPEG', 'PNG', 'TIFF', 'WEBP')
+    capabilities = ('scaled', 'region')
+    speed = 0.6
+    overhead = 2.0  # Fixed cost (in megapixels) of setting up a libvips pipeline
+    vips_modes = {('uchar', 1): 'L', ('uchar', 2): 'LA', ('uchar', 3): 'RGB', ('uchar', 4): 'RGBA',
+                  ('ushort', 1): 'I;16'}
+    
+    @staticmethod
+    def is_available():
+        return pyvips is not None
+    
+    def supports(self, meta, target_size=None, needs=()):
+        return (meta['format'] in self.formats and meta['mode'] in ('L', 'LA', 'RGB', 'RGBA', 'I;16')
+                and all(need in self.capabilities for need in needs))
+    
+    def decoded_scale(self, meta, target_size):
+        # Only JPEG and WebP shrink while decoding; other formats are decoded in full and then reduced
+        if meta['format'] in ('JPEG', 'WEBP'):
+            return fit_scale(meta, target_size)
+        return 1.0
+    
+    def estimate_cost(self, meta, target_size=None):
+        return super().estimate_cost(meta, target_size) + self.overhead * self.speed
+    
+    def decode(self, image_path, meta, target_size=None, region=None):
+        if target_size is not None and fit_scale(meta, target_size) < 1.0:
+            vips_image = pyvips.Image.thumbnail(image_path, target_size[0], height=target_size[1],
+                                                size='down', no_rotate=True)
+        else:
+            vips_image = pyvips.Image.new_from_file(image_path, access='sequential')
+        if region is not None:
+            vips_image = vips_image.crop(*region)  # left, top, width, height
+        mode = self.vips_modes.get((vips_image.format, vips_image.bands))
+        if mode is None:
+            raise ValueError(f"Unsupported libvips pixel format {vips_image.format} x {vips_image.bands}")
+        image = Image.frombytes(mode, (vips_image.width, vips_image.height), vips_image.write_to_memory())
+        image.format = meta['format']
+        return image
+
+class DecoderRegistry:
+    """The decoder backends available on this system, with selection of the cheapest one per request"""
+    
+    backends = (TurboJPEGDecoder, VipsDecoder, PillowDecoder)
+    
+    def __init__(self):
+        self.decoders = []
+        for backend in self.backends:
+            try:
+                if backend.is_available():
+                    self.decoders.append(backend())
+            except Exception as e:
+                print(f"Decoder {backend.name} unavailable: {e}")
+        self.fallback = self.decoders[-1]  # Pillow
+    
+    def select(self, meta, target_size=None, needs=()):
+        """Pick the decoder with the lowest estimated cost for an image and target size"""
+        candidates = [d for d in self.decoders if d.supports(meta, target_size, needs)]
+        if not candidates:
+            return self.fallback
+        return min(candidates, key=lambda d: d.estimate_cost(meta, target_size))
+    
+    def decode(self, image_path, meta, target_size=None):
+        """Decode with the cheapest decoder, falling back to Pillow if it fails"""
+        decoder = self.select(meta, target_size)
+        try:
+            return decoder.decode(image_path, meta, target_size)
+        except Exception:
+            if decoder is self.fallback:
+                raise
+            return self.fallback.decode(image_path, meta, target_size)
+
+def benchmark_decoders(image_paths, target_size=(1920, 1080), repeats=3):
+    """Time every available decoder on the same images, at full size and at target_size"""
+    registry = DecoderRegistry()
+    totals = {(d.name, scaled): [0.0, 0] for d in registry.decoders for scaled in (False, True)}
+    
+    print(f"{'image':40} {'decoder':10} {'full (ms)':>10} {'scaled (ms)':>12}")
+    for image_path in image_paths:
+        try:
+            with Image.open(image_path) as image:
+                meta = {'width': image.width, 'height': image.height, 'mode': image.mode, 'format': image.format}
+        except Exception:
+            continue
+        for decoder in registry.decoders:
+            if not decoder.supports(meta):
+                continue
+            timings = []
+            for scaled in (False, True):
+                best = None
+                for _ in range(repeats):
+                    start = time.perf_counter()
+                    try:
+                        decoder.decode(image_path, meta, target_size if scaled else None)
+                    except Exception:
+                        best = None
+                        break
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                timings.append(best)
+                if best is not None:
+                    totals[(decoder.name, scaled)][0] += best
+                    totals[(decoder.name, scaled)][1] += 1
+            full, scaled = (f"{t * 1000:.1f}" if t is not None else "failed" for t in timings)
+            print(f"{os.path.basename(image_path)[:40]:40} {decoder.name:10} {full:>10} {scaled:>12}")
+    
+    print("\nTotals (images decoded, seconds):")
+    for decoder in registry.decoders:
+        full_time, full_count = totals[(decoder.name, False)]
+        scaled_time, scaled_count = totals[(decoder.name, True)]
+        print(f"  {decoder.name:10} full {full_count} in {full_time:.2f}s, scaled {scaled_count} in {scaled_time:.2f}s")
+
+def benchmark_image_lists(count=1000000):
+    """Compare the memory use and speed of ImageList with a list of path strings"""
+    folder = os.path.join(os.path.expanduser("~"), "Pictures", "2024 Holiday in the Mountains")
+    shuffled = array('I', range(count))
+    random.Random(1).shuffle(shuffled)  # Listing order, as scandir returns it
+    probes = [os.path.join(folder, f"IMG_{i:07d}.JPG") for i in shuffled[:10000]]
+    
+    def build_list():
+        paths = [os.path.join(folder, f"IMG_{i:07d}.JPG") for i in shuffled]
+        paths.sort()
+        return paths, (lambda path: paths.index(path)), 1000  # Linear lookups: time fewer
+    
+    def build_list_with_index():
+        paths = [os.path.join(folder, f"IMG_{i:07d}.JPG") for i in shuffled]
+        paths.sort()
+        positions = {path: i for i, path in enumerate(paths)}
+        return (paths, positions), positions.__getitem__, len(probes)
+    
+    def build_image_list():
+        paths = ImageList(os.path.join(folder, f"IMG_{i:07d}.JPG") for i in shuffled)
+        paths.sort()
+        paths.index(probes[0])  # Build the positions, as the first lookup after a sort does
+        return paths, paths.index, len(probes)
+    
+    print(f"{count} paths like {probes[0]}")
+    print(f"{'representation':28} {'memory (MB)':>12} {'bytes/path':>11} {'build+sort (s)':>15} {'lookup (us)':>12}")
+    for label, build in (("list of str", build_list), ("list of str + index dict", build_list_with_index),
+                         ("ImageList", build_image_list)):
+        # Memory from a traced build; times from an untraced one (tracing slows allocation down)
+        tracemalloc.start()
+        kept = build()
+        memory = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        del kept
+        start = time.perf_counter()
+        kept, lookup, lookups = build()
+        build_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for path in probes[:lookups]:
+            lookup(path)
+        lookup_time = (time.perf_counter() - start) / lookups
+        print(f"{label:28} {memory / 2**20:12.1f} {memory / count:11.1f} {build_time:15.2f} {lookup_time * 1e6:12.1f}")
+        del kept, lookup
+
+def make_rendition(image, size):
+    """Scale an image down to fit in size for the display tier (images that already fit are returned as is)"""
+    if image.mode == 'P':
+        image = image.convert('RGBA' if 'transparency' in image.info else 'RGB')
+    scale = min(size[0] / image.width, size[1] / image.height)
+    if scale >= 1.0:
+        return image
+    rendition_size = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+    return image.resize(rendition_size, Image.Resampling.LANCZOS, reducing_gap=3.0)
+
+# Process-pool decoding: each worker process keeps its own decoder registry
+_process_decoders = None
+
+def _init_decode_process():
+    """Set up a decode worker process at low CPU priority"""
+    global _process_decoders
+    try:
+        os.nice(10)
+    except (AttributeError, OSError):
+        pass
+    _process_decoders = DecoderRegistry()
+
+def raw_image_size(image):
+    """Number of bytes image.tobytes() returns, without building them"""
+    if image.mode == '1':
+        return (image.width + 7) // 8 * image.height  # Rows are packed 8 pixels to a byte
+    mode = ImageMode.getmode(image.mode)
+    return image.width * image.height * len(mode.bands) * int(mode.typestr[-1])
+
+def write_raw_image(image, buffer):
+    """Write image.tobytes() into buffer one encoder chunk at a time, so the whole pixel data is
+    never held in a bytes object. Returns False if this Pillow lacks the private encoder
+    interface this relies on (the caller copies image.tobytes() instead).
+    """
+    get_encoder = getattr(Image, '_getencoder', None)
+    if get_encoder is None:
+        return False
+    image.load()
+    try:
+        encoder = get_encoder(image.mode, 'raw', image.mode)
+        encoder.setimage(image.im, (0, 0) + image.size)
+    except (AttributeError, TypeError, ValueError):
+        return False
+    chunk_size = max(ImageFile.MAXBLOCK, image.width * 4)  # As tobytes() does
+    offset = 0
+    while True:
+        _, status, chunk = encoder.encode(chunk_size)
+        buffer[offset:offset + len(chunk)] = chunk
+        offset += len(chunk)
+        if status:
+            break
+    if status < 0:
+        raise RuntimeError(f"encoder error {status} writing raw pixels")
+    return True
+
+def decode_to_shared_memory(image_path, meta, target_size):
+    """Decode and downscale an image in a worker process and leave its pixels in shared memory.
+    
+    Returns (shared memory name, mode, size, format). The caller owns the block and must
+    unlink it (see read_shared_memory_image); this avoids pickling the pixel data. The pixels
+    are encoded straight into the block, without a bytes copy of the whole image in between.
+    """
+    image = make_rendition(_process_decoders.decode(image_path, meta, target_size), target_size)
+    size = raw_image_size(image)
+    try:
+        block = shared_memory.SharedMemory(create=True, size=max(1, size), track=False)
+    except TypeError:
+        # Python < 3.13: stop this process's resource tracker from unlinking the block at exit
+        block = shared_memory.SharedMemory(create=True, size=max(1, size))
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(block._name, 'shared_memory')
+    try:
+        if not write_raw_image(image, block.buf):
+            block.buf[:size] = image.tobytes()
+    except BaseException:
+        block.close()
+        block.unlink()
+        raise
+    block.close()
+    return block.name, image.mode, image.size, meta['format']
+
+def read_shared_memory_image(name, mode, size, image_format):
+    """Copy an image decoded by decode_to_shared_memory into this process and free the shared block.
+    
+    The pixels are decoded from the mapped block directly, so this is the only copy made.
+    """
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        image = Image.frombytes(mode, size, block.buf)
+    finally:
+        block.close()
+        block.unlink()
+    image.format = image_format
+    return image
+
+def open_incremental_decoder(image):
+    """Set up Pillow's decoder for an opened JPEG or PNG so it can be fed data in chunks, the way
+    ImageFile.Parser does for streamable formats. Returns (decoder, offset of the compressed data),
+    or None if this Pillow lacks the private pieces this relies on (the caller decodes normally).
+    """
+    get_decoder = getattr(Image, '_getdecoder', None)
+    if get_decoder is None or not hasattr(image, 'load_prepare') or not image.tile:
+        return None
+    try:
+        decoder_name, extents, offset, args = tuple(image.tile[0])[:4]
+        image.load_prepare()
+        decoder = get_decoder(image.mode, decoder_name, args, getattr(image, 'decoderconfig', ()))
+        decoder.setimage(image.im, extents)
+    except (AttributeError, TypeError, ValueError):
+        return None
+    image.tile = []  # Pixels come from this decoder, never from Image.load()
+    return decoder, offset
+
+def decode_progressive_preview(data, size):
+    """Coarse image from the first bytes of a progressive JPEG (the scans read so far), decoded
+    at a reduced scale near size; None if there isn't enough data yet"""
+    try:
+        image = Image.open(io.BytesIO(bytes(data) + b'\xff\xd9'))  # End the image where the data ends
+        image.draft('RGB', size)
+        image.load()
+        return image
+    except Exception:
+        return None
+
+def file_signature(stat):
+    """Identify one version of a file from its os.stat() result: (mtime, size, inode).
+    
+    Editors that save by writing a new file and renaming it over the old one change the inode
+    even when mtime and size happen to match.
+    """
+    if stat is None:
+        return None
+    return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+class FolderWatcher:
+    """Report files written, added, replaced, renamed or removed in one folder, using Linux inotify through ctypes.
+    
+    Events are read on a background thread and queued; the UI thread drains them with
+    get_changes(). A file moved away and one moved in with the same inotify cookie are
+    reported as one rename. Where inotify is unavailable (available is False, or the watch
+    could not be added) the folder is polled on a background thread instead: its mtime is
+    checked every poll_interval seconds and only a changed folder is listed again and
+    compared. Polling sees files added, removed and renamed (as a removal and an addition),
+    but not files rewritten in place.
+    """
+    
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_CLOEXEC = 0o2000000
+    EVENT_HEADER = struct.Struct('iIII')  # wd, mask, cookie, name length
+    MOVE_PAIR_TIMEOUT = 0.05  # Seconds to wait for the IN_MOVED_TO of an IN_MOVED_FROM
+    
+    def __init__(self):
+        self.changes = queue.Queue()  # Changed paths, (old path, new path) renames, or None
+        self.directory = None
+        self.watch_descriptor = -1
+        self.lock = threading.Lock()
+        self.fd = -1
+        self.poll_interval = 2.0  # Seconds
+        self.poll_thread = None
+        self.poll_mtime = None  # Folder mtime at the last listing
+        self.poll_names = set()  # File names at the last listing
+        try:
+            self.libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+            self.fd = self.libc.inotify_init1(self.IN_CLOEXEC)
+        except (OSError, AttributeError):
+            pass
+        self.available = self.fd >= 0
+        if self.available:
+            threading.Thread(target=self._run, daemon=True).start()
+    
+    def watch(self, directory):
+        """Watch directory instead of the previously watched one"""
+        if directory == self.directory:
+            return
+        with self.lock:
+            if self.available:
+                if self.watch_descriptor >= 0:
+                    self.libc.inotify_rm_watch(self.fd, self.watch_descriptor)
+                mask = self.IN_CLOSE_WRITE | self.IN_MOVED_FROM | self.IN_MOVED_TO | self.IN_DELETE
+                self.watch_descriptor = self.libc.inotify_add_watch(self.fd, os.fsencode(directory), mask)
+            self.directory = directory
+            # When polling, the folder is listed on the first poll, not while it is being loaded
+            self.poll_mtime = None
+            self.poll_names = None
+            if self.watch_descriptor < 0 and self.poll_thread is None:
+                self.poll_thread = threading.Thread(target=self._poll_loop, daemon=True)
+                self.poll_thread.start()
+    
+    def _poll_loop(self):
+        """Poll the watched folder while inotify can't watch it (runs on its own thread)"""
+        while True:
+            time.sleep(self.poll_interval)
+            with self.lock:
+                directory = self.directory if self.watch_descriptor < 0 else None
+                last_mtime = self.poll_mtime
+            if directory is None:
+                continue
+            try:
+                mtime = os.stat(directory).st_mtime_ns
+                if mtime == last_mtime:
+                    continue
+                files, _ = scan_directory(directory)
+            except OSError:
+                continue
+            names = {entry.name for entry in files}
+            with self.lock:
+                if directory != self.directory:
+                    continue  # Switched folders while listing
+                old_names = self.poll_names
+                self.poll_mtime = mtime
+                self.poll_names = names
+            if old_names is not None:  # The first listing has nothing to compare against
+                for name in old_names ^ names:
+                    self.changes.put(os.path.join(directory, name))
+    
+    def rescan(self, listed, list_files):
+        """After events were lost, list the watched folder again on a worker thread and queue
+        the paths added or removed compared to listed (paths shown, from any folder).
+        
+        list_files(directory) lists the folder's image files (it may sniff them).
+        """
+        threading.Thread(target=self._rescan, args=(self.directory, listed, list_files), daemon=True).start()
+    
+    def _rescan(self, directory, listed, list_files):
+        try:
+            found = set(list_files(directory))
+        except OSError:
+            return
+        shown = {path for path in listed if os.path.dirname(path) == directory}
+        for path in found ^ shown:
+            self.changes.put(path)
+    
+    def get_changes(self):
+        """Return (set of paths changed, list of (old path, new path) renames) since the last
+        call; None in the set means events were lost and the folder needs a rescan"""
+        changed = set()
+        renamed = []
+        try:
+            while True:
+                change = self.changes.get_nowait()
+                if isinstance(change, tuple):
+                    renamed.append(change)
+                else:
+                    changed.add(change)
+        except queue.Empty:
+            pass
+        return changed, renamed
+    
+    def _run(self):
+        moved_from = {}  # Cookie -> path moved away, until its IN_MOVED_TO arrives
+        while True:
+            try:
+                readable, _, _ = select.select([self.fd], [], [], self.MOVE_PAIR_TIMEOUT if moved_from else None)
+                if not readable:
+                    # No IN_MOVED_TO came: moved out of the folder, so removed
+                    for path in moved_from.values():
+                        self.changes.put(path)
+                    moved_from.clear()
+                    continue
+                data = os.read(self.fd, 65536)
+            except OSError:
+                return
+            
+            offset = 0
+            while offset + self.EVENT_HEADER.size <= len(data):
+                wd, mask, cookie, name_length = self.EVENT_HEADER.unpack_from(data, offset)
+                offset += self.EVENT_HEADER.size
+                name = data[offset:offset + name_length].rstrip(b'\0')
+                offset += name_length
+                
+                with self.lock:
+                    directory = self.directory if wd == self.watch_descriptor else None
+                if mask & self.IN_Q_OVERFLOW:
+                    self.changes.put(None)  # Events were lost
+                elif directory and name:
+                    path = os.path.join(directory, os.fsdecode(name))
+                    if mask & self.IN_MOVED_FROM:
+                        moved_from[cookie] = path
+                    elif mask & self.IN_MOVED_TO and cookie in moved_from:
+                        self.changes.put((moved_from.pop(cookie), path))
+                    else:
+                        self.changes.put(path)
+
+class LRUPolicy:
+    """Evict the least recently used entry"""
+    
+    name = "lru"
+    
+    def __init__(self, max_bytes):
+        self.order = OrderedDict()  # key -> None, least recently used first
+    
+    def inserted(self, key, size, cost):
+        self.order[key] = None
+        self.order.move_to_end(key)
+    
+    def accessed(self, key):
+        self.order.move_to_end(key)
+    
+    def removed(self, key):
+        self.order.pop(key, None)
+    
+    def victim(self):
+        """Choose and forget the entry to evict"""
+        key, _ = self.order.popitem(last=False)
+        return key
+
+class TwoQueuePolicy:
+    """2Q: new entries wait in a FIFO and only move to the protected LRU queue when reused.
+    
+    A one-off scan (slideshow, random mode) churns through the FIFO without pushing out
+    the images the user keeps flipping between. Keys recently evicted from the FIFO are
+    remembered, so an image that comes back soon after is treated as reused.
+    """
+    
+    name = "2q"
+    
+    def __init__(self, max_bytes):
+        self.fifo_max_bytes = max_bytes // 4  # Share of the budget for images seen only once
+        self.fifo = OrderedDict()  # key -> size, oldest first
+        self.fifo_bytes = 0
+        self.protected = OrderedDict()  # key -> size, least recently used first
+        self.ghosts = OrderedDict()  # Keys recently evicted from the FIFO
+        self.ghost_limit = 256
+    
+    def inserted(self, key, size, cost):
+        self.removed(key)
+        if key in self.ghosts:
+            del self.ghosts[key]
+            self.protected[key] = size
+        else:
+            self.fifo[key] = size
+            self.fifo_bytes += size
+    
+    def accessed(self, key):
+        if key in self.protected:
+            self.protected.move_to_end(key)
+        # Hits in the FIFO are treated as correlated references and do not promote
+    
+    def removed(self, key):
+        if key in self.fifo:
+            self.fifo_bytes -= self.fifo.pop(key)
+        self.protected.pop(key, None)
+    
+    def victim(self):
+        """Choose and forget the entry to evict"""
+        if self.fifo and (self.fifo_bytes > self.fifo_max_bytes or not self.protected):
+            key, size = self.fifo.popitem(last=False)
+            self.fifo_bytes -= size
+            self.ghosts[key] = None
+            if len(self.ghosts) > self.ghost_limit:
+                self.ghosts.popitem(last=False)
+            return key
+        key, _ = self.protected.popitem(last=False)
+        return key
+
+class GDSFPolicy:
+    """Greedy-Dual-Size-Frequency: keep entries that were expensive to decode, small and often used.
+    
+    Each entry's priority is L + frequency * cost / size, where L is the priority of the
+    last victim, so entries that are no longer used age out over time.
+    """
+    
+    name = "gdsf"
+    
+    def __init__(self, max_bytes):
+        self.inflation = 0.0  # L
+        self.entries = {}  # key -> [priority, frequency, cost, size]
+    
+    def _priority(self, frequency, cost, size):
+        # Entries with unknown cost are assumed to decode at about 100 MB/s
+        cost = cost if cost > 0 else size / 1e8
+        return self.inflation + frequency * cost / max(1, size)
+    
+    def inserted(self, key, size, cost):
+        self.entries[key] = [self._priority(1, cost, size), 1, cost, size]
+    
+    def accessed(self, key):
+        entry = self.entries[key]
+        entry[1] += 1
+        entry[0] = self._priority(entry[1], entry[2], entry[3])
+    
+    def removed(self, key):
+        self.entries.pop(key, None)
+    
+    def victim(self):
+        """Choose and forget the entry to evict"""
+        # The caches hold tens to a few hundred images, so a linear scan is cheap enough
+        key = min(self.entries, key=lambda k: self.entries[k][0])
+        self.inflation = self.entries.pop(key)[0]
+        return key
+
+CACHE_POLICIES = {policy.name: policy for policy in (LRUPolicy, TwoQueuePolicy, GDSFPolicy)}
+
+class ImageCache:
+    """Thread-safe cache of decoded images with a byte budget, a pluggable eviction policy and statistics.
+    
+    Each entry records how long it took to produce (its cost), which the GDSF policy uses and
+    which is summed into the "decode time saved" statistic on every hit.
+    """
+    
+    def __init__(self, name, max_bytes, policy="lru"):
+        self.name = name
+        self.max_bytes = max_bytes
+        self.entries = {}  # key -> (image, size in bytes, cost in seconds, file signature)
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.time_saved = 0.0  # Seconds of decoding avoided by hits
+        self.lock = threading.Lock()
+        self.set_policy(policy)
+    
+    def set_policy(self, policy):
+        """Switch eviction policy by name, keeping the cached entries"""
+        with self.lock:
+            self.policy = CACHE_POLICIES.get(policy, LRUPolicy)(self.max_bytes)
+            for key, (_, size, cost, _) in self.entries.items():
+                self.policy.inserted(key, size, cost)
+    
+    @staticmethod
+    def image_size_bytes(image):
+        """Approximate the memory used by an image's pixel data"""
+        bytes_per_sample = {'1': 1, 'I;16': 2, 'I;16L': 2, 'I;16B': 2, 'I;16N': 2, 'I': 4, 'F': 4}
+        return image.width * image.height * len(image.getbands()) * bytes_per_sample.get(image.mode, 1)
+    
+    def get(self, key, signature=None):
+        """Return the cached image for key, or None. A signature that differs from the cached one is a miss."""
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and signature is not None and entry[3] != signature:
+                # The file changed since it was cached
+                self._remove(key)
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self.policy.accessed(key)
+            self.hits += 1
+            self.time_saved += entry[2]
+            return entry[0]
+    
+    def put(self, key, image, cost=0.0, signature=None):
+        """Add an image that took cost seconds to produce, evicting entries to stay within the byte budget.
+        
+        signature is the file_signature() of the source file as it was before decoding.
+        """
+        size = self.image_size_bytes(image)
+        if size > self.max_bytes:
+            return  # Would evict everything else
+        with self.lock:
+            self._remove(key)
+            self.entries[key] = (image, size, cost, signature)
+            self.current_bytes += size
+            self.policy.inserted(key, size, cost)
+            while self.current_bytes > self.max_bytes:
+                evicted_key = self.policy.victim()
+                self.current_bytes -= self.entries.pop(evicted_key)[1]
+                self.evictions += 1
+    
+    def _remove(self, key):
+        # Caller holds the lock
+        entry = self.entries.pop(key, None)
+        if entry is not None:
+            self.current_bytes -= entry[1]
+            self.policy.removed(key)
+    
+    def discard(self, key):
+        """Remove an entry if present"""
+        with self.lock:
+            self._remove(key)
+    
+    def has(self, key, signature=None):
+        """Check for an up-to-date entry without counting a hit or miss"""
+        with self.lock:
+            entry = self.entries.get(key)
+            return entry is not None and (signature is None or entry[3] == signature)
+    
+    def __contains__(self, key):
+        return self.has(key)
+    
+    def stats(self):
+        """Return a snapshot of the cache statistics"""
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'name': self.name,
+                'policy': self.policy.name,
+                'entries': len(self.entries),
+                'bytes': self.current_bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'evictions': self.evictions,
+                'decode_time_saved': self.time_saved,
+            }
+
+class FolderIndex:
+    """Persistent SQLite index of folders with their image counts, for fast folder navigation.
+    
+    Each folder row stores the folder's mtime when it was last listed. A folder's mtime changes
+    whenever an entry is added, removed or renamed in it, so a single stat tells whether the
+    cached count and subfolder list are still valid; only changed folders are listed again.
+    Whether a folder has any images at all is answered separately by reading it only up to
+    the first image, and memoised in the same way. Falls back to listing the folders
+    directly if the database can't be used. With a FormatSniffer, images are recognised by
+    content, as the image list does.
+    """
+    
+    def __init__(self, db_path, workers=8, sniffer=None):
+        self.lock = threading.Lock()
+        self.connection = None
+        self.workers = workers  # Folders checked in parallel
+        self.sniffer = sniffer
+        self.pool = None
+        try:
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+            self.connection = sqlite3.connect(db_path, check_same_thread=False)
+            with self.connection:
+                self.connection.execute("CREATE TABLE IF NOT EXISTS folders (path TEXT PRIMARY KEY, parent TEXT, "
+                                        "name TEXT, mtime_ns INTEGER, image_count INTEGER)")
+                self.connection.execute("CREATE INDEX IF NOT EXISTS folders_by_parent ON folders (parent, name)")
+                self.connection.execute("CREATE TABLE IF NOT EXISTS presence (path TEXT PRIMARY KEY, "
+                                        "mtime_ns INTEGER, has_images INTEGER)")
+        except (sqlite3.Error, OSError) as e:
+            print(f"Folder index unavailable: {e}")
+            self.connection = None
+    
+    def _count_images(self, files):
+        """Number of images among a folder's file entries, by the image list's rule"""
+        if self.sniffer is not None:
+            return len(self.sniffer.select([entry for entry in files if is_image_candidate(entry.name)]))
+        return sum(1 for entry in files if is_image_name(entry.name))
+    
+    def _db(self):
+        """The connection, for use while holding self.lock (sqlite3.Error once closed)"""
+        if self.connection is None:
+            raise sqlite3.ProgrammingError("Folder index is closed")
+        return self.connection
+    
+    def _refresh(self, folder_path):
+        """Return the image count of a folder, listing it again only if its mtime changed;
+        None if it can't be read.
+        
+        The lock is only held for database reads and writes, so a slow listing doesn't hold up
+        lookups of other folders.
+        """
+        try:
+            mtime = os.stat(folder_path).st_mtime_ns
+        except OSError:
+            with self.lock:
+                self._forget(folder_path)
+            return None
+        
+        with self.lock:
+            row = self._db().execute("SELECT mtime_ns, image_count FROM folders WHERE path = ?",
+                                     (folder_path,)).fetchone()
+        if row is not None and row[0] == mtime:
+            return row[1]
+        
+        try:
+            files, dirs = scan_directory(folder_path)
+        except OSError:
+            # e.g. no permission: forget what was known below it, but keep it in its parent's list
+            with self.lock:
+                self._forget(folder_path, keep_entry=True)
+            return None
+        image_count = self._count_images(files)
+        subfolders = {entry.name for entry in dirs if not entry.name.startswith('.')}
+        with self.lock:
+            connection = self._db()
+            with connection:
+                connection.execute("INSERT OR REPLACE INTO folders VALUES (?, ?, ?, ?, ?)",
+                                   (folder_path, os.path.dirname(folder_path), os.path.basename(folder_path),
+                                    mtime, image_count))
+                # Sync the child rows: new subfolders are added unlisted, vanished ones are dropped
+                known = {name for (name,) in connection.execute(
+                    "SELECT name FROM folders WHERE parent = ?", (folder_path,))}
+                for name in known - subfolders:
+                    self._forget(os.path.join(folder_path, name))
+                connection.executemany(
+                    "INSERT OR IGNORE INTO folders VALUES (?, ?, ?, NULL, NULL)",
+                    [(os.path.join(folder_path, name), folder_path, name) for name in subfolders - known])
+        return image_count
+    
+    def _forget(self, folder_path, keep_entry=False):
+        """Drop a folder and everything below it (with keep_entry, the folder stays as an unlisted child
+        of its parent); call with self.lock held"""
+        connection = self._db()
+        with connection:
+            # Paths below folder_path sort between "folder_path/" and "folder_path0" ('0' follows '/')
+            for table in ("folders", "presence"):
+                connection.execute(f"DELETE FROM {table} WHERE path = ? OR (path > ? AND path < ?)",
+                                   (folder_path, folder_path + '/', folder_path + '0'))
+            if keep_entry:
+                connection.execute("INSERT INTO folders VALUES (?, ?, ?, NULL, NULL)",
+                                   (folder_path, os.path.dirname(folder_path), os.path.basename(folder_path)))
+    
+    def image_count(self, folder_path):
+        """Number of images directly in a folder (0 if it can't be read)"""
+        folder_path = os.path.normpath(folder_path)
+        if self.connection is not None:
+            try:
+                return self._refresh(folder_path) or 0
+            except (sqlite3.Error, UnicodeEncodeError):
+                pass  # Count directly below
+        try:
+            files, _ = scan_directory(folder_path)
+        except OSError:
+            return 0
+        return self._count_images(files)
+    
+    def _check_images(self, folder_path):
+        """Return (has images, folder mtime, row to store or None), consulting the memoised answers first"""
+        folder_path = os.path.normpath(folder_path)
+        mtime = folder_mtime(folder_path)
+        if mtime is None:
+            return False, None, None
+        if self.connection is not None:
+            try:
+                with self.lock:
+                    row = self._db().execute("SELECT mtime_ns, has_images FROM presence WHERE path = ?",
+                                             (folder_path,)).fetchone()
+                    if row is not None and row[0] == mtime:
+                        return bool(row[1]), mtime, None
+                    # A full listing of the unchanged folder answers it too
+                    row = self._db().execute("SELECT mtime_ns, image_count FROM folders WHERE path = ?",
+                                             (folder_path,)).fetchone()
+                    if row is not None and row[0] == mtime and row[1] is not None:
+                        return row[1] > 0, mtime, None
+            except (sqlite3.Error, UnicodeEncodeError):
+                pass
+        # Read outside the lock, so several folders can be read at once
+        found = folder_contains_image(folder_path, sniffer=self.sniffer)
+        return found, mtime, (folder_path, mtime, int(found))
+    
+    def _store_presence(self, rows):
+        """Memoise newly checked folders in one transaction"""
+        rows = [row for row in rows if row is not None]
+        if not rows or self.connection is None:
+            return
+        try:
+            with self.lock:
+                connection = self._db()
+                with connection:
+                    connection.executemany("INSERT OR REPLACE INTO presence VALUES (?, ?, ?)", rows)
+        except (sqlite3.Error, UnicodeEncodeError):
+            pass
+    
+    def _check_many(self, folder_paths, visited=None):
+        """Check folders in parallel and return their answers in order; visited, if given,
+        gets (folder, mtime when checked) for each"""
+        if self.pool is None:
+            self.pool = ThreadPoolExecutor(max_workers=self.workers)
+        results = list(self.pool.map(self._check_images, folder_paths))
+        self._store_presence([row for _, _, row in results])
+        if visited is not None:
+            visited.extend((path, mtime) for path, (_, mtime, _) in zip(folder_paths, results))
+        return [found for found, _, _ in results]
+    
+    def has_images(self, folder_path):
+        """Whether a folder directly contains any images, reading it at most up to the first one"""
+        found, _, row = self._check_images(folder_path)
+        self._store_presence([row])
+        return found
+    
+    def with_images(self, folder_paths):
+        """The folders (in the given order) that contain images, checked in parallel"""
+        return [path for path, found in zip(folder_paths, self._check_many(folder_paths)) if found]
+    
+    def first_with_images(self, folder_paths, visited=None):
+        """The first of the folders that contains images, or None.
+        
+        Folders are checked a pool's worth at a time, so the search stops soon after a match.
+        visited, if given, gets (folder, mtime when checked) for every folder checked.
+        """
+        for start in range(0, len(folder_paths), self.workers):
+            chunk = folder_paths[start:start + self.workers]
+            for path, found in zip(chunk, self._check_many(chunk, visited)):
+                if found:
+                    return path
+        return None
+    
+    def subfolders(self, folder_path):
+        """Sorted names of the visible subfolders of a folder ([] if it can't be read)"""
+        folder_path = os.path.normpath(folder_path)
+        if self.connection is not None:
+            try:
+                if self._refresh(folder_path) is None:
+                    return []
+                with self.lock:
+                    return [name for (name,) in self._db().execute(
+                        "SELECT name FROM folders WHERE parent = ? ORDER BY name", (folder_path,))]
+            except (sqlite3.Error, UnicodeEncodeError):
+                pass  # List directly below
+        try:
+            return list_subfolders(folder_path)
+        except OSError:
+            return []
+    
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown(wait=True)
+            self.pool = None
+        with self.lock:
+            if self.connection is not None:
+                self.connection.close()
+                self.connection = None
+
+class RenditionDiskCache:
+    """Persistent cache of screen-sized renditions on local disk, with a size cap and LRU cleanup.
+    
+    Entries are keyed by (path, file size, mtime, target size), so a changed source file
+    simply misses. Opaque renditions are stored as JPEG, others as fast-compressed PNG.
+    """
+    
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.current_bytes = None  # Measured on first write, then kept by puts (approximately)
+        self.cleaning = False  # A measurement or cleanup is running
+        self.written_during_cleanup = {}  # Entry path -> size, written while it runs
+        self.lock = threading.Lock()
+    
+    def _entry_path(self, image_path, stat, target_size, extension):
+        key = f"{image_path}|{stat.st_size}|{stat.st_mtime_ns}|{target_size[0]}x{target_size[1]}"
+        return os.path.join(self.directory, hashlib.sha1(key.encode('utf-8', 'surrogateescape')).hexdigest() + extension)
+    
+    def get(self, image_path, stat, target_size):
+        """Return the cached rendition or None"""
+        for extension in ('.jpg', '.png'):
+            entry_path = self._entry_path(image_path, stat, target_size, extension)
+            try:
+                rendition = Image.open(entry_path)
+                rendition.load()
+            except (OSError, ValueError):
+                continue
+            try:
+                os.utime(entry_path)  # Mark as recently used for cleanup
+            except OSError:
+                pass
+            return rendition
+        return None
+    
+    def put(self, image_path, stat, target_size, rendition):
+        """Store a rendition, removing the least recently used entries when over the size cap"""
+        if rendition.mode in ('RGB', 'L'):
+            extension, options = '.jpg', {'quality': 90}
+        elif rendition.mode in ('RGBA', 'LA', 'I;16'):
+            extension, options = '.png', {'compress_level': 1}
+        else:
+            return
+        
+        entry_path = self._entry_path(image_path, stat, target_size, extension)
+        temp_path = f"{entry_path}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            rendition.save(temp_path, format='JPEG' if extension == '.jpg' else 'PNG', **options)
+            os.replace(temp_path, entry_path)  # Readers never see a partial file
+            entry_size = os.path.getsize(entry_path)
+        except OSError:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+        
+        # Only the byte counter is updated under the lock; the directory is scanned (to measure
+        # it on the first write, or once the counter passes the cap) by one put at a time, unlocked
+        with self.lock:
+            if self.current_bytes is not None:
+                self.current_bytes += entry_size
+            if self.cleaning:
+                self.written_during_cleanup[entry_path] = entry_size
+                return
+            if self.current_bytes is not None and self.current_bytes <= self.max_bytes:
+                return
+            self.cleaning = True
+            self.written_during_cleanup = {}
+        try:
+            self._cleanup()
+        finally:
+            with self.lock:
+                self.cleaning = False
+    
+    def _cleanup(self):
+        """Measure the cache and delete least recently used entries until it is at 90% of its cap.
+        
+        Entries that puts write meanwhile are counted by the size they reported, whether or not
+        the scan saw them, so each is counted exactly once.
+        """
+        entries = []
+        try:
+            for entry in os.scandir(self.directory):
+                try:
+                    stat = entry.stat()
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except OSError:
+            return
+        
+        total = sum(size for _, size, _ in entries)
+        kept = entries
+        if total > self.max_bytes:
+            entries.sort()
+            kept = []
+            for entry in entries:
+                _, size, path = entry
+                if total > self.max_bytes * 0.9:
+                    try:
+                        os.remove(path)
+                        total -= size
+                        with self.lock:
+                            self.written_during_cleanup.pop(path, None)
+                        continue
+                    except OSError:
+                        pass
+                kept.append(entry)
+        with self.lock:
+            written = self.written_during_cleanup
+            self.current_bytes = sum(size for _, size, path in kept if path not in written) + sum(written.values())
+
+class BackgroundDecoder:
+    """Low-priority worker threads that decode images into the caches ahead of time.
+    
+    Jobs carry the generation they were submitted in; cancel() starts a new generation,
+    so queued work for a folder the user has left is dropped without being decoded.
+    decode_function may hand its work off and return a Future: the image then counts as
+    being decoded until that Future is done, while the worker moves on to the next job.
+    """
+    
+    def __init__(self, decode_function, workers=2):
+        self.decode_function = decode_function
+        self.jobs = queue.PriorityQueue()
+        self.sequence = itertools.count()  # Keeps equal priorities in submission order
+        self.generation = 0
+        self.in_flight = {}  # image path -> Event set when its decode finishes
+        self.lock = threading.Lock()
+        for _ in range(workers):
+            threading.Thread(target=self._run, daemon=True).start()
+    
+    def submit(self, image_path, priority=0, **options):
+        """Queue an image for decoding; lower priority values run first"""
+        self.jobs.put((priority, next(self.sequence), self.generation, image_path, options))
+    
+    def cancel(self):
+        """Drop all queued jobs; running jobs finish but their generation is stale"""
+        with self.lock:
+            self.generation += 1
+        try:
+            while True:
+                self.jobs.get_nowait()
+        except queue.Empty:
+            pass
+    
+    def is_cancelled(self, generation):
+        return generation != self.generation
+    
+    def is_decoding(self, image_path):
+        """Whether a worker is decoding image_path right now"""
+        with self.lock:
+            return image_path in self.in_flight
+    
+    def _run(self):
+        # Run at the lowest CPU priority so decoding only uses idle time (Linux: per-thread nice)
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
+        
+        while True:
+            priority, _, generation, image_path, options = self.jobs.get()
+            with self.lock:
+                if self.is_cancelled(generation) or image_path in self.in_flight:
+                    continue
+                event = self.in_flight[image_path] = threading.Event()
+            try:
+                pending = self.decode_function(image_path, is_cancelled=lambda: self.is_cancelled(generation), **options)
+            except Exception:
+                pending = None
+            if isinstance(pending, Future):
+                pending.add_done_callback(lambda _, image_path=image_path, event=event: self._finish(image_path, event))
+            else:
+                self._finish(image_path, event)
+    
+    def _finish(self, image_path, event):
+        with self.lock:
+            del self.in_flight[image_path]
+        event.set()
+
 class ImageViewer:
     def __init__(self, root):
         self.root = root
@@ -49,9 +1868,112 @@ class ImageViewer:
         self.is_animated = False
         self.gif_frames = []
         self.gif_durations = []
+        self.gif_frame_boxes = []  # Changed-region bounding box of each frame vs. the previous frame
+        self.gif_painted_frame = None  # Frame index currently shown in the canvas photo
         self.current_frame = 0
         self.animation_job = None
         
+        # Multi-page documents (e.g. TIFF scans): pages are decoded on demand
+        self.is_paged = False
+        self.page_count = 1
+        self.current_page = 0
+        self.paged_path = None
+        self.page_cache = OrderedDict()  # Page index -> decoded page, most recently used last
+        self.page_cache_limit = 5  # Decoded pages kept in memory per document
+        self.page_cache_lock = threading.Lock()
+        self.paged_generation = 0  # Bumped per document, so late pages of an earlier one are dropped
+        
+        # Display windowing for 16-bit and floating-point images
+        self.tone_modes = ["Percentile", "Min/Max"]
+        self.tone_mode = "Percentile"
+        self.tone_gamma = 1.0
+        self.tone_contrast = 1.0  # Scales the window width around its centre
+        self.tone_stats = {}  # Window statistics of tone_stats_image, computed once per image
+        self.tone_stats_image = None
+        self.tone_stats_size = 512  # Longest side of the copy the statistics are sampled from
+        self.tone_viewport = None  # (key, resized high-bit viewport) reused while only the window changes
+        
+        # Two-tier image cache: a few full-resolution images for zoom and crop, and many
+        # screen-sized renditions for fit-to-window viewing, prefetch and back-navigation
+        # Budgets and eviction policy (lru, 2q or gdsf) can be tuned per workstation in the settings file
+        self.cache_settings_file = os.path.expanduser("~/.image_viewer_cache.json")
+        cache_settings = self.load_cache_settings()
+        self.full_cache = ImageCache("Full resolution", cache_settings['full_cache_mb'] * 1024 * 1024,
+                                     cache_settings['full_cache_policy'])
+        self.display_cache = ImageCache("Display resolution", cache_settings['display_cache_mb'] * 1024 * 1024,
+                                        cache_settings['display_cache_policy'])
+        self.last_decode_seconds = 0.0  # How long the current image took to decode, for cache costs
+        self.showing_rendition = False  # current_image is a screen-sized rendition, original not loaded
+        self.current_file_stat = None  # os.stat() of the displayed file, taken before it was decoded
+        self.rendition_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        self.decoders = DecoderRegistry()  # Pillow plus any faster optional backends installed
+        
+        # Folder warm-up: decode the resume image and a window around it while the viewer is idle
+        # Optionally prefetch in worker processes, which sidesteps the GIL and keeps full-resolution
+        # pixels out of this process. Feeder threads submit without waiting; a collector thread
+        # stores the results, and at most two jobs per process are outstanding, so the pool's
+        # own queue stays short and cancelled jobs are still dropped before they reach it
+        self.decode_pool = None
+        decode_processes = cache_settings['decode_processes']
+        if decode_processes > 0:
+            self.decode_pool = ProcessPoolExecutor(max_workers=decode_processes,
+                                                   mp_context=multiprocessing.get_context('spawn'),
+                                                   initializer=_init_decode_process)
+            self.decode_slots = threading.Semaphore(2 * decode_processes)
+            self.pool_results = queue.Queue()
+            threading.Thread(target=self.collect_pool_decodes, daemon=True).start()
+        self.background_decoder = BackgroundDecoder(self.prefetch_image, workers=max(2, decode_processes))
+        self.warmup_before = 2  # Images before the resume position to warm up
+        self.warmup_after = 8  # Images after the resume position to warm up
+        
+        # Streaming folder listing: the list fills in while the first image is already shown
+        self.folder_scan = None
+        self.folder_scan_job = None
+        self.folder_scan_batch_size = 2000
+        self.folder_scan_poll_interval = 50  # Milliseconds
+        
+        # Library mode: the whole tree under the folder is one image list, read by a parallel walker
+        self.library_mode = False
+        self.library_walk_workers = 8
+        
+        # Jump/scrub control (J): the position under the scrubber is decoded while dragging,
+        # at most once per delay, so only the position the user rests on is worked on
+        self.jump_window = None
+        self.jump_scale = None
+        self.jump_prompt = None
+        self.scrub_index = None
+        self.scrub_job = None
+        self.scrub_jump_job = None
+        self.scrub_prefetch_delay = 120  # Milliseconds
+        self.scrub_prefetch_radius = 2  # Images on each side of the scrub position to decode
+        
+        # Folder look-ahead: while a folder is browsed, the folders Ctrl+Left/Right would move to
+        # are resolved, listed and their first image decoded in the background
+        self.folder_lookahead = {}  # 'next'/'prev' -> prepared move (see start_folder_lookahead)
+        self.folder_lookahead_job = None
+        self.folder_lookahead_delay = 500  # Milliseconds after a folder has loaded
+        
+        # Embedded camera previews are painted first for files at least this large (bytes)
+        self.preview_min_file_size = 512 * 1024
+        
+        # Files at least this large are read in chunks and repainted while they decode
+        self.progressive_min_file_size = 16 * 1024 * 1024
+        self.progressive_chunk_size = 1024 * 1024
+        self.progressive_snapshot_interval = 0.3  # Seconds between partial repaints
+        self.progressive_poll_interval = 100  # Milliseconds
+        self.progressive_load = None
+        self.progressive_poll_job = None
+        
+        # Waiting (without blocking the UI) for a background decode of the image to be shown
+        self.decode_wait_job = None
+        self.decode_wait_interval = 20  # Milliseconds between checks
+        self.decode_wait_timeout = 5.0  # Seconds before decoding it here instead
+        
+        # Last full render state, used to patch only changed regions of the display
+        self.display_signature = None
+        self.display_background = None
+        self.display_scale = (1.0, 1.0)
+        
         # Zoom control variables
         self.zoom_level = 1.0  # Default zoom level (1.0 = fit to window)
         self.zoom_increment = 0.1  # Zoom step size (10%)
@@ -72,880 +1994,2438 @@ class ImageViewer:
         self.image_zoom_memory = {}  # Dictionary to store zoom levels per image file
         self.zoom_settings_file = os.path.expanduser("~/.image_viewer_zoom.json")  # Persistent storage file
         
-        # Last viewed image tracking
-        self.last_image_file = os.path.expanduser("~/.image_viewer_last.json")
-        self.last_viewed_image = None
+        # Last viewed image tracking
+        self.last_image_file = os.path.expanduser("~/.image_viewer_last.json")
+        self.last_viewed_image = None
+        
+        # Image list order (see SortKeys.MODES); sort values are computed once per file and kept in the list
+        self.sort_settings_file = os.path.expanduser("~/.image_viewer_sort.json")
+        self.sort_mode = 'name'
+        self.sort_job = None  # Background key computation for a newly chosen order
+        self.sort_keys = SortKeys(self.probe_image)
+        
+        # Header-only image metadata, cached per (path, mtime, size) in memory and on disk
+        self.cache_dir = os.path.expanduser("~/.cache/image_viewer")
+        self.metadata_cache_file = os.path.join(self.cache_dir, "metadata.json")
+        self.metadata_cache = {}
+        self.metadata_cache_limit = 100000  # Entries kept on disk
+        self.metadata_cache_dirty = False
+        self.metadata_lock = threading.Lock()
+        
+        # Content-based image detection, with verdicts cached per (path, size, mtime)
+        self.format_sniffer = FormatSniffer(os.path.join(self.cache_dir, "formats.json"))
+        
+        self.show_info_overlay = False
+        
+        # Screen-sized renditions of large files survive restarts in an on-disk cache
+        self.disk_cache = RenditionDiskCache(os.path.join(self.cache_dir, "renditions"), 2 * 1024 * 1024 * 1024)
+        self.disk_cache_min_file_size = 2 * 1024 * 1024  # Smaller files decode faster than a cache lookup pays off
+        
+        # Folder tree index (image counts and subfolders, validated by folder mtime) for folder navigation
+        self.folder_index = FolderIndex(os.path.join(self.cache_dir, "folders.sqlite"), sniffer=self.format_sniffer)
+        
+        # Files edited while the viewer is open are evicted from the caches and re-rendered in place
+        self.folder_watcher = FolderWatcher()
+        self.file_change_poll_interval = 500  # Milliseconds
+        self.root.after(self.file_change_poll_interval, self.poll_file_changes)
+        
+        # Crop variables
+        self.crop_start_x = None
+        self.crop_start_y = None
+        self.crop_end_x = None
+        self.crop_end_y = None
+        self.crop_rect = None
+        self.is_cropping = False
+        
+        # Create main display area
+        self.image_frame = tk.Frame(root, bg="black")
+        self.image_frame.pack(fill=tk.BOTH, expand=True)
+        
+        # Background options for transparent images
+        self.background_options = {
+            "White": "#FFFFFF",
+            "Light Gray": "#F0F0F0", 
+            "Dark Gray": "#404040",
+            "Black": "#000000",
+            "Checkered": "checkered"
+        }
+        self.current_background = "Checkered"  # Default to checkered for best transparency visibility
+        self.show_image_border = True  # Show border by default to see image boundaries
+        
+        # Create canvas for image display
+        canvas_bg = "#E0E0E0" if self.current_background == "Checkered" else self.background_options[self.current_background]
+        self.canvas = tk.Canvas(self.image_frame, bg=canvas_bg, highlightthickness=0)
+        self.canvas.pack(fill=tk.BOTH, expand=True)
+        
+        # Control panel at the bottom
+        self.control_panel = tk.Frame(root, height=120)
+        self.control_panel.pack(fill=tk.X, side=tk.BOTTOM)
+        
+        # Create buttons - first row (navigation controls)
+        button_frame1 = tk.Frame(self.control_panel)
+        button_frame1.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        
+        self.prev_button = tk.Button(button_frame1, text="Previous (P/PgUp)", command=self.prev_image)
+        self.prev_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.next_button = tk.Button(button_frame1, text="Next (N/PgDn)", command=self.next_image)
+        self.next_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.first_button = tk.Button(button_frame1, text="First (H/Home)", command=self.first_image)
+        self.first_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.last_button = tk.Button(button_frame1, text="Last (E/End)", command=self.last_image)
+        self.last_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.random_button = tk.Button(button_frame1, text="Random: Off (R)", command=self.toggle_random)
+        self.random_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.slideshow_button = tk.Button(button_frame1, text="Slideshow (W)", command=self.toggle_slideshow)
+        self.slideshow_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.animation_button = tk.Button(button_frame1, text="⏸️ Pause (Space)", command=self.toggle_animation)
+        self.animation_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.refresh_button = tk.Button(button_frame1, text="🔄 Refresh (F5)", command=self.refresh_folder)
+        self.refresh_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.fullscreen_button = tk.Button(button_frame1, text="Fullscreen (F/F11)", command=self.toggle_fullscreen)
+        self.fullscreen_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.hide_toolbar_button = tk.Button(button_frame1, text="👁️ Hide Toolbar (F9)", command=self.toggle_toolbar)
+        self.hide_toolbar_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Status label (feedback) - moved to row 1
+        self.status_label = tk.Label(button_frame1, text="No folder selected")
+        self.status_label.pack(side=tk.RIGHT, padx=10, pady=2)
+        
+        # Second row (zoom and mode buttons)
+        button_frame2 = tk.Frame(self.control_panel)
+        button_frame2.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        
+        self.delete_button = tk.Button(button_frame2, text="Delete (D/Del)", command=self.delete_image)
+        self.delete_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.zoom_out_button = tk.Button(button_frame2, text="Zoom- (-)", command=self.zoom_out)
+        self.zoom_out_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.zoom_in_button = tk.Button(button_frame2, text="Zoom+ (+)", command=self.zoom_in)
+        self.zoom_in_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.save_zoom_button = tk.Button(button_frame2, text="Save View (S/9)", command=self.save_current_zoom)
+        self.save_zoom_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.zoom_reset_button = tk.Button(button_frame2, text="Fit (0)", command=self.reset_zoom)
+        self.zoom_reset_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.clear_zoom_button = tk.Button(button_frame2, text="Clear View (8)", command=self.clear_saved_zoom)
+        self.clear_zoom_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.crop_button = tk.Button(button_frame2, text="Crop Mode", command=self.toggle_crop_mode)
+        self.crop_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.select_folder_button = tk.Button(button_frame2, text="Select Folder", command=self.select_folder)
+        self.select_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Add folder navigation buttons to row 2
+        self.prev_folder_button = tk.Button(button_frame2, text="◀ Prev Folder (Ctrl+←)", command=self.prev_folder, bg="#e6f3ff")
+        self.prev_folder_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        self.next_folder_button = tk.Button(button_frame2, text="Next Folder ▶ (Ctrl+→)", command=self.next_folder, bg="#e6f3ff")
+        self.next_folder_button.pack(side=tk.LEFT, padx=2, pady=2)
+        
+        # Add browse in file manager button to row 2
+        self.browse_folder_button = tk.Button(button_frame2, text="📁 Browse in Nemo", command=self.browse_in_nemo)
+        self.browse_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Add full path label centered in button_frame2
+        self.path_label = tk.Label(button_frame2, text="Path: No folder selected", font=("Arial", 12), fg="gray30")
+        self.path_label.pack(side=tk.LEFT, expand=True, padx=10, pady=2)
+        
+        # Store default button colors for resetting later
+        self.default_button_bg = self.crop_button.cget("bg")
+        
+        # Third row (file operations and system buttons)
+        button_frame3 = tk.Frame(self.control_panel)
+        button_frame3.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        
+        # Add exit button at the beginning
+        self.exit_button = tk.Button(button_frame3, text="Exit (Q)", command=self.on_close, bg="#ffcccc")
+        self.exit_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.move_button = tk.Button(button_frame3, text="Move (V)", command=self.move_image)
+        self.move_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.duplicate_button = tk.Button(button_frame3, text="Duplicate (D)", command=self.duplicate_image)
+        self.duplicate_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.copy_button = tk.Button(button_frame3, text="Copy (C)", command=self.copy_image)
+        self.copy_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Add background selector button
+        self.background_button = tk.Button(button_frame3, text=f"🎨 {self.current_background}", command=self.cycle_background)
+        self.background_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Add dangerous delete folder button (separated with spacing)
+        tk.Frame(button_frame3, width=15).pack(side=tk.LEFT)  # Spacer
+        self.delete_folder_button = tk.Button(button_frame3, text="🗑️ Delete Folder (Ctrl+Shift+Del)", 
+                                             command=self.delete_images_and_folder, 
+                                             bg="#ff9999", fg="black", font=('Arial', 8, 'bold'))
+        self.delete_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        self.remove_dupes_button = tk.Button(button_frame3, text="Remove Dupes", command=self.remove_duplicates)
+        self.remove_dupes_button.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Add exit button at the end too
+        self.exit_button2 = tk.Button(button_frame3, text="Exit (Q)", command=self.on_close, bg="#ffcccc")
+        self.exit_button2.pack(side=tk.LEFT, padx=5, pady=2)
+        
+        # Image list and current position
+        self.image_files = ImageList()
+        self.current_index = -1
+        self.current_folder = None
+        
+        # Load folder history
+        self.history_file = os.path.expanduser("~/.image_viewer_history")
+        self.folder_history = self.load_folder_history()
+        
+        # Load copy/move destination history
+        self.copy_move_history_file = os.path.expanduser("~/.image_viewer_copy_move_history")
+        self.copy_move_history = self.load_copy_move_history()
+        
+        # Load saved zoom preferences
+        self.load_zoom_data()
+        
+        # Load last viewed image
+        self.load_last_viewed_image()
+        self.load_sort_mode()
+        
+        # Load cached image metadata and format verdicts
+        self.load_metadata_cache()
+        self.format_sniffer.load()
+        
+        # On startup, load last-used folder if available but don't auto-display
+        if self.folder_history and os.path.exists(self.folder_history[0]):
+            self.status_label.config(text=f"Loading last folder: {os.path.basename(self.folder_history[0])}")
+            self.load_images_from_folder(self.folder_history[0], auto_display=False)
+        else:
+            self.status_label.config(text="No recent folders - Click 'Select Folder' to begin")
+        
+        # Bind the window close event
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         
-        # Crop variables
-        self.crop_start_x = None
-        self.crop_start_y = None
-        self.crop_end_x = None
-        self.crop_end_y = None
-        self.crop_rect = None
-        self.is_cropping = False
+        # Set up key bindings
+        self.setup_key_bindings()
         
-        # Create main display area
-        self.image_frame = tk.Frame(root, bg="black")
-        self.image_frame.pack(fill=tk.BOTH, expand=True)
+        # Set up mouse bindings for cropping
+        self.setup_mouse_bindings()
         
-        # Background options for transparent images
-        self.background_options = {
-            "White": "#FFFFFF",
-            "Light Gray": "#F0F0F0", 
-            "Dark Gray": "#404040",
-            "Black": "#000000",
-            "Checkered": "checkered"
-        }
-        self.current_background = "Checkered"  # Default to checkered for best transparency visibility
-        self.show_image_border = True  # Show border by default to see image boundaries
+        # Bind canvas resize to update image display
+        self.canvas.bind("<Configure>", self.on_canvas_resize)
+    
+    def show_temporary_message(self, message, duration=2000, prominent=False):
+        """Show a temporary message in the status label that disappears after specified duration (ms)"""
+        # Set flag to prevent status updates during temp message
+        self.showing_temp_message = True
         
-        # Create canvas for image display
-        canvas_bg = "#E0E0E0" if self.current_background == "Checkered" else self.background_options[self.current_background]
-        self.canvas = tk.Canvas(self.image_frame, bg=canvas_bg, highlightthickness=0)
-        self.canvas.pack(fill=tk.BOTH, expand=True)
+        if prominent:
+            # Show prominent overlay message for wrap notifications
+            self.show_prominent_message(message, duration)
+        else:
+            # Regular status bar message
+            original_text = self.status_label.cget("text")
+            original_bg = self.status_label.cget("bg")
+            
+            # Show the temporary message with a subtle background
+            self.status_label.config(text=message, bg="#e6ffe6")  # Light green background
+            
+            # Schedule to revert back to original text and background
+            def restore_status():
+                self.showing_temp_message = False
+                self.status_label.config(text=original_text, bg=original_bg)
+            
+            self.root.after(duration, restore_status)
+    
+    def show_prominent_message(self, message, duration=2000):
+        """Show a prominent overlay message as a temporary popup"""
+        # Create a temporary toplevel window
+        popup = tk.Toplevel(self.root)
+        popup.withdraw()  # Hide initially
+        popup.overrideredirect(True)  # Remove window decorations
+        popup.configure(bg="#ffeb3b")  # Bright yellow background
         
-        # Control panel at the bottom
-        self.control_panel = tk.Frame(root, height=120)
-        self.control_panel.pack(fill=tk.X, side=tk.BOTTOM)
+        # Create label with message
+        label = tk.Label(popup, text=message,
+                        font=("Arial", 16, "bold"),
+                        bg="#ffeb3b", fg="#333333",
+                        padx=20, pady=10,
+                        relief="raised", borderwidth=2)
+        label.pack()
         
-        # Create buttons - first row (navigation controls)
-        button_frame1 = tk.Frame(self.control_panel)
-        button_frame1.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        # Position popup in center of main window
+        popup.update_idletasks()  # Calculate size
         
-        self.prev_button = tk.Button(button_frame1, text="Previous (P/PgUp)", command=self.prev_image)
-        self.prev_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Get main window position and size
+        root_x = self.root.winfo_x()
+        root_y = self.root.winfo_y()
+        root_width = self.root.winfo_width()
+        root_height = self.root.winfo_height()
         
-        self.next_button = tk.Button(button_frame1, text="Next (N/PgDn)", command=self.next_image)
-        self.next_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Calculate popup position (bottom right of main window)
+        popup_width = popup.winfo_width()
+        popup_height = popup.winfo_height()
+        x = root_x + root_width - popup_width - 400  # 400px margin from right edge (about 4 inches)
+        y = root_y + root_height - popup_height - 200  # 200px margin from bottom edge (about 2 inches up)
         
-        self.first_button = tk.Button(button_frame1, text="First (H/Home)", command=self.first_image)
-        self.first_button.pack(side=tk.LEFT, padx=5, pady=2)
+        popup.geometry(f"+{x}+{y}")
+        popup.deiconify()  # Show popup
+        popup.lift()  # Bring to front
+        popup.attributes('-topmost', True)  # Keep on top
         
-        self.last_button = tk.Button(button_frame1, text="Last (E/End)", command=self.last_image)
-        self.last_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Schedule removal and reset flag
+        def remove_popup():
+            try:
+                popup.destroy()
+            except:
+                pass  # Ignore if already destroyed
+            self.showing_temp_message = False
         
-        self.random_button = tk.Button(button_frame1, text="Random: Off (R)", command=self.toggle_random)
-        self.random_button.pack(side=tk.LEFT, padx=5, pady=2)
+        self.root.after(duration, remove_popup)
+    
+    def extract_gif_frames(self, image):
+        """Extract all frames and durations from an animated GIF"""
+        frames = []
+        durations = []
         
-        self.slideshow_button = tk.Button(button_frame1, text="Slideshow (W)", command=self.toggle_slideshow)
-        self.slideshow_button.pack(side=tk.LEFT, padx=5, pady=2)
+        try:
+            # Check if image is animated
+            if not getattr(image, "is_animated", False):
+                return frames, durations
+            
+            # Extract all frames
+            for frame_idx in range(image.n_frames):
+                image.seek(frame_idx)
+                
+                # Get frame duration (in milliseconds)
+                duration = image.info.get('duration', 100)  # Default 100ms if not specified
+                if duration == 0:
+                    duration = 100  # Some GIFs have 0 duration, use default
+                
+                # Convert to RGBA to handle transparency properly
+                frame = image.copy().convert('RGBA')
+                frames.append(frame)
+                durations.append(duration)
+            
+            # Reset to first frame
+            image.seek(0)
+            
+        except Exception as e:
+            # If there's any error, treat as static image
+            pass
         
-        self.animation_button = tk.Button(button_frame1, text="⏸️ Pause (Space)", command=self.toggle_animation)
-        self.animation_button.pack(side=tk.LEFT, padx=5, pady=2)
+        return frames, durations
+    
+    def compute_gif_frame_boxes(self, frames):
+        """Compute the bounding box of the pixels each frame changes relative to the frame before it"""
+        boxes = []
+        for frame_idx, frame in enumerate(frames):
+            # Frame 0 is compared against the last frame so looping also only repaints what changed
+            previous = frames[frame_idx - 1]
+            if previous.size != frame.size or previous.mode != frame.mode:
+                boxes.append((0, 0) + frame.size)
+                continue
+            
+            # Difference per band, folded into one band so getbbox() sees color and alpha changes
+            bands = ImageChops.difference(previous, frame).split()
+            changed = bands[0]
+            for band in bands[1:]:
+                changed = ImageChops.lighter(changed, band)
+            boxes.append(changed.getbbox())  # None when the frame is identical to the previous one
+        return boxes
+    
+    def paint_gif_frame_region(self, frame_index):
+        """Repaint only the changed region of an animation frame. Returns False if a full render is needed."""
+        previous_frame = self.gif_painted_frame
+        if previous_frame is None or not self.current_photo or len(self.gif_frame_boxes) != len(self.gif_frames):
+            return False
+        if previous_frame == frame_index:
+            return True  # Already on screen
+        if (previous_frame + 1) % len(self.gif_frames) != frame_index:
+            return False
         
-        self.refresh_button = tk.Button(button_frame1, text="🔄 Refresh (F5)", command=self.refresh_folder)
-        self.refresh_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # The photo on the canvas must still match the current zoom, pan, background and window size
+        if self.display_signature != self.get_display_signature():
+            return False
         
-        self.fullscreen_button = tk.Button(button_frame1, text="Fullscreen (F/F11)", command=self.toggle_fullscreen)
-        self.fullscreen_button.pack(side=tk.LEFT, padx=5, pady=2)
+        box = self.gif_frame_boxes[frame_index]
+        if box is None:
+            # Nothing changed between the two frames
+            self.gif_painted_frame = frame_index
+            return True
+        
+        frame = self.gif_frames[frame_index]
+        scale_x, scale_y = self.display_scale
+        
+        # Pad the box by the LANCZOS support so edge pixels are resampled exactly as in a full render
+        pad = int(3 / min(scale_x, scale_y, 1.0)) + 1
+        left, top, right, bottom = box
+        dest_x1 = max(0, int((left - pad) * scale_x))
+        dest_y1 = max(0, int((top - pad) * scale_y))
+        dest_x2 = min(self.image_width, int((right + pad) * scale_x) + 1)
+        dest_y2 = min(self.image_height, int((bottom + pad) * scale_y) + 1)
+        if dest_x2 <= dest_x1 or dest_y2 <= dest_y1:
+            self.gif_painted_frame = frame_index
+            return True
+        
+        # Scale only the changed region, sampling the same source positions a full resize would
+        source_box = (dest_x1 / scale_x, dest_y1 / scale_y, dest_x2 / scale_x, dest_y2 / scale_y)
+        region = frame.resize((dest_x2 - dest_x1, dest_y2 - dest_y1), Image.Resampling.LANCZOS, box=source_box)
+        region = self.compose_on_background(region, offset=(dest_x1, dest_y1))
+        
+        # Copy the region into the photo that is already on the canvas
+        region_photo = ImageTk.PhotoImage(region)
+        self.canvas.tk.call(str(self.current_photo), 'copy', str(region_photo), '-to', dest_x1, dest_y1)
+        
+        self.gif_painted_frame = frame_index
+        return True
+    
+    def animate_gif(self):
+        """Animate the current GIF by cycling through frames"""
+        if not self.is_animated or not self.gif_frames:
+            return
         
-        self.hide_toolbar_button = tk.Button(button_frame1, text="👁️ Hide Toolbar (F9)", command=self.toggle_toolbar)
-        self.hide_toolbar_button.pack(side=tk.LEFT, padx=5, pady=2)
+        try:
+            # Get current frame
+            frame_index = self.current_frame
+            current_gif_frame = self.gif_frames[frame_index]
+            
+            # Frames are never modified in place, so no copy is needed
+            self.current_image = current_gif_frame
+            
+            # Patch only the changed region when possible, otherwise render the whole frame
+            if not self.paint_gif_frame_region(frame_index):
+                self.apply_zoom_and_display()
+                self.gif_painted_frame = frame_index
+            
+            # Move to next frame
+            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
+            
+            # Schedule next frame
+            duration = self.gif_durations[self.current_frame] if self.gif_durations else 100
+            self.animation_job = self.root.after(duration, self.animate_gif)
+            
+        except Exception as e:
+            # Stop animation on error
+            self.stop_animation()
+    
+    def stop_animation(self):
+        """Stop the current GIF animation"""
+        if self.animation_job:
+            self.root.after_cancel(self.animation_job)
+            self.animation_job = None
+    
+    def toggle_animation(self):
+        """Pause/resume GIF animation or slideshow"""
+        if self.is_slideshow:
+            # If slideshow is running, button controls slideshow pause/resume
+            self.toggle_slideshow_pause()
+            return
         
-        # Status label (feedback) - moved to row 1
-        self.status_label = tk.Label(button_frame1, text="No folder selected")
-        self.status_label.pack(side=tk.RIGHT, padx=10, pady=2)
+        # Normal GIF animation control
+        if not self.is_animated:
+            return
         
-        # Second row (zoom and mode buttons)
-        button_frame2 = tk.Frame(self.control_panel)
-        button_frame2.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        if self.animation_job:
+            # Animation is running, pause it
+            self.stop_animation()
+            self.animation_button.config(text="▶️ Play (Space)", bg="#e6ffe6")
+        else:
+            # Animation is paused, resume it
+            if self.gif_frames:
+                self.animate_gif()
+                self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg)
+    
+    def setup_key_bindings(self):
+        """Set up all keyboard shortcuts"""
+        self.root.bind("n", lambda e: self.next_image())               # Next
+        self.root.bind("p", lambda e: self.prev_image())               # Previous
+        self.root.bind("h", lambda e: self.first_image())              # First (H key)
+        self.root.bind("e", lambda e: self.last_image())               # Last (E key)
+        self.root.bind("<Home>", lambda e: self.first_image())         # First (Home key)
+        self.root.bind("<End>", lambda e: self.last_image())           # Last (End key)
+        self.root.bind("<Next>", lambda e: self.next_page())           # Next page or image (Page Down)
+        self.root.bind("<Prior>", lambda e: self.prev_page())          # Previous page or image (Page Up)
+        self.root.bind("f", lambda e: self.toggle_fullscreen())        # Fullscreen toggle
+        self.root.bind("<F5>", lambda e: self.refresh_folder())        # Refresh folder
+        self.root.bind("<F9>", lambda e: self.toggle_toolbar())        # Toggle toolbar visibility
+        self.root.bind("s", lambda e: self.save_current_zoom())        # Save view (S key)
+        self.root.bind("r", lambda e: self.toggle_random())            # Random mode
+        self.root.bind("q", lambda e: self.on_close())                 # Exit
+        self.root.bind("d", lambda e: self.delete_image())             # Delete
+        self.root.bind("<Delete>", lambda e: self.delete_image())      # Delete
+        self.root.bind("<Control-Shift-Delete>", lambda e: self.delete_images_and_folder())  # Delete all images & folder (dangerous!)
+        self.root.bind("b", lambda e: self.browse_in_nemo())           # Browse in Nemo
+        self.root.bind("g", lambda e: self.cycle_background())         # Change background
+        self.root.bind("o", lambda e: self.toggle_border())            # Toggle border (O for outline)
+        self.root.bind("c", lambda e: self.copy_image())               # Copy
+        self.root.bind("d", lambda e: self.duplicate_image())          # Duplicate
+        self.root.bind("v", lambda e: self.move_image())               # Move
+        self.root.bind("w", lambda e: self.toggle_slideshow())         # Slideshow
+        self.root.bind("<KeyPress-plus>", lambda e: self.zoom_in())    # Zoom in (+)
+        self.root.bind("<KeyPress-equal>", lambda e: self.zoom_in())   # Zoom in (= key without shift)
+        self.root.bind("<KeyPress-minus>", lambda e: self.zoom_out())  # Zoom out (-)
+        self.root.bind("<KeyPress-0>", lambda e: self.reset_zoom())    # Reset zoom (0)
+        self.root.bind("<KeyPress-9>", lambda e: self.save_current_zoom())    # Save zoom (9)
+        self.root.bind("<KeyPress-8>", lambda e: self.clear_saved_zoom())     # Clear saved zoom (8)
+        self.root.bind("<space>", lambda e: self.handle_space_key())   # Smart space handler for slideshow/animation
+        self.root.bind("<F11>", lambda e: self.toggle_fullscreen())    # Fullscreen (F11)
+        self.root.bind("<Escape>", lambda e: self.exit_fullscreen())   # Exit fullscreen
+        self.root.bind("<Control-Left>", lambda e: self.prev_folder()) # Previous folder (Ctrl+Left)
+        self.root.bind("<Control-Right>", lambda e: self.next_folder()) # Next folder (Ctrl+Right)
+        self.root.bind("i", lambda e: self.toggle_info_overlay())      # Image info overlay
+        self.root.bind("<F12>", self.show_cache_stats)                 # Cache statistics
+        self.root.bind("t", lambda e: self.cycle_sort_mode())          # Sort order
+        self.root.bind("l", lambda e: self.toggle_library_mode())      # Library mode (whole folder tree)
+        self.root.bind("j", lambda e: self.show_jump_dialog())         # Jump to position
+        self.root.bind("<FocusIn>", lambda e: self.check_current_file())  # Pick up edits made in other apps
+        self.root.bind("k", lambda e: self.cycle_tone_mode())          # Tone mapping window (16-bit images)
+        self.root.bind("<bracketleft>", lambda e: self.adjust_tone(gamma=-0.1))     # Gamma down
+        self.root.bind("<bracketright>", lambda e: self.adjust_tone(gamma=0.1))     # Gamma up
+        self.root.bind("<comma>", lambda e: self.adjust_tone(contrast=1.25))        # Less contrast (wider window)
+        self.root.bind("<period>", lambda e: self.adjust_tone(contrast=0.8))        # More contrast (narrower window)
         
-        self.delete_button = tk.Button(button_frame2, text="Delete (D/Del)", command=self.delete_image)
-        self.delete_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Arrow key panning (pan image view)
+        self.root.bind("<Left>", lambda e: self.pan_with_keys(-20, 0))   # Pan left
+        self.root.bind("<Right>", lambda e: self.pan_with_keys(20, 0))   # Pan right
+        self.root.bind("<Up>", lambda e: self.pan_with_keys(0, 20))      # Move image down
+        self.root.bind("<Down>", lambda e: self.pan_with_keys(0, -20))   # Move image up
+        
+        # Enable focus so key bindings work
+        self.root.focus_set()
+    
+    def setup_mouse_bindings(self):
+        """Set up mouse bindings for panning and cropping"""
+        self.canvas.bind("<Button-1>", self.on_mouse_press)
+        self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
+        self.canvas.bind("<ButtonRelease-1>", self.on_mouse_release)
+    
+    def on_mouse_press(self, event):
+        """Handle mouse press for both panning and cropping"""
+        if not self.current_image:
+            return
+            
+        # Check for double-click
+        current_time = time.time() * 1000  # milliseconds
+        if current_time - self.last_click_time < self.double_click_threshold:
+            # Double-click detected
+            self.toggle_toolbar()
+            self.last_click_time = 0  # Reset
+            return
         
-        self.zoom_out_button = tk.Button(button_frame2, text="Zoom- (-)", command=self.zoom_out)
-        self.zoom_out_button.pack(side=tk.LEFT, padx=2, pady=2)
+        # Single click
+        self.last_click_time = current_time
         
-        self.zoom_in_button = tk.Button(button_frame2, text="Zoom+ (+)", command=self.zoom_in)
-        self.zoom_in_button.pack(side=tk.LEFT, padx=2, pady=2)
+        if self.is_cropping:
+            # Crop mode: start crop selection
+            self.start_crop(event)
+        else:
+            # Pan mode: start panning
+            self.start_pan(event)
+    
+    def on_mouse_drag(self, event):
+        """Handle mouse drag for both panning and cropping"""
+        if not self.current_image:
+            return
+            
+        if self.is_cropping:
+            # Crop mode: update crop selection
+            self.update_crop(event)
+        else:
+            # Pan mode: update pan position
+            self.update_pan(event)
+    
+    def on_mouse_release(self, event):
+        """Handle mouse release for both panning and cropping"""
+        if not self.current_image:
+            return
+            
+        if self.is_cropping:
+            # Crop mode: end crop selection
+            self.end_crop(event)
+        else:
+            # Pan mode: end panning
+            self.end_pan(event)
+    
+    def start_pan(self, event):
+        """Start panning the image"""
+        self.is_panning = True
+        self.pan_start_x = event.x
+        self.pan_start_y = event.y
+        self.canvas.config(cursor="fleur")  # Change cursor to indicate panning
+    
+    def update_pan(self, event):
+        """Update image position during panning"""
+        if not self.is_panning:
+            return
+            
+        # Calculate movement delta
+        delta_x = event.x - self.pan_start_x
+        delta_y = event.y - self.pan_start_y
         
-        self.save_zoom_button = tk.Button(button_frame2, text="Save View (S/9)", command=self.save_current_zoom)
-        self.save_zoom_button.pack(side=tk.LEFT, padx=2, pady=2)
+        # Update image offset
+        self.image_offset_x += delta_x
+        self.image_offset_y += delta_y
         
-        self.zoom_reset_button = tk.Button(button_frame2, text="Fit (0)", command=self.reset_zoom)
-        self.zoom_reset_button.pack(side=tk.LEFT, padx=2, pady=2)
+        # Update start position for next delta
+        self.pan_start_x = event.x
+        self.pan_start_y = event.y
         
-        self.clear_zoom_button = tk.Button(button_frame2, text="Clear View (8)", command=self.clear_saved_zoom)
-        self.clear_zoom_button.pack(side=tk.LEFT, padx=2, pady=2)
+        # Redraw image with new position
+        self.apply_zoom_and_display()
+    
+    def end_pan(self, event):
+        """End panning the image"""
+        self.is_panning = False
+        self.canvas.config(cursor="")  # Reset cursor
+    
+    def pan_with_keys(self, delta_x, delta_y):
+        """Pan the image using keyboard arrow keys"""
+        if not self.current_image:
+            return
+            
+        # Update image offset
+        self.image_offset_x += delta_x
+        self.image_offset_y += delta_y
         
-        self.crop_button = tk.Button(button_frame2, text="Crop Mode", command=self.toggle_crop_mode)
-        self.crop_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Redraw image with new position
+        self.apply_zoom_and_display()
+    
+    def on_canvas_resize(self, event):
+        """Handle canvas resize events"""
+        if self.current_image and not self.is_slideshow:
+            self.display_current_image()
+    
+    def load_folder_history(self):
+        """Load folder history from file"""
+        try:
+            if os.path.exists(self.history_file):
+                with open(self.history_file, 'r') as f:
+                    return [line.strip() for line in f.readlines() if line.strip()]
+        except:
+            pass
+        return []
+    
+    def save_folder_history(self):
+        """Save folder history to file"""
+        try:
+            with open(self.history_file, 'w') as f:
+                for folder in self.folder_history:
+                    f.write(folder + '\n')
+        except:
+            pass
+    
+    def add_to_history(self, folder_path):
+        """Add folder to history, moving it to top if it exists"""
+        if folder_path in self.folder_history:
+            self.folder_history.remove(folder_path)
+        self.folder_history.insert(0, folder_path)
+        # Keep only last 10 folders
+        self.folder_history = self.folder_history[:10]
+        self.save_folder_history()
+    
+    def load_zoom_data(self):
+        """Load saved zoom preferences from file"""
+        try:
+            if os.path.exists(self.zoom_settings_file):
+                with open(self.zoom_settings_file, 'r') as f:
+                    self.image_zoom_memory = json.load(f)
+        except Exception as e:
+            print(f"Could not load zoom data: {e}")
+            self.image_zoom_memory = {}
+    
+    def save_zoom_data(self):
+        """Save current zoom preferences to file"""
+        try:
+            with open(self.zoom_settings_file, 'w') as f:
+                json.dump(self.image_zoom_memory, f, indent=2)
+        except Exception as e:
+            print(f"Could not save zoom data: {e}")
+    
+    def load_last_viewed_image(self):
+        """Load the last viewed image from file"""
+        try:
+            if os.path.exists(self.last_image_file):
+                with open(self.last_image_file, 'r') as f:
+                    data = json.load(f)
+                    self.last_viewed_image = data.get('last_image', None)
+        except Exception as e:
+            print(f"Could not load last viewed image: {e}")
+            self.last_viewed_image = None
+    
+    def save_last_viewed_image(self):
+        """Save the current image as the last viewed image"""
+        if self.image_files and self.current_index >= 0:
+            try:
+                current_image_path = self.image_files[self.current_index]
+                data = {'last_image': current_image_path}
+                with open(self.last_image_file, 'w') as f:
+                    json.dump(data, f, indent=2)
+                self.last_viewed_image = current_image_path
+            except Exception as e:
+                print(f"Could not save last viewed image: {e}")
+    
+    def load_metadata_cache(self):
+        """Load the persistent image metadata cache from disk"""
+        try:
+            if os.path.exists(self.metadata_cache_file):
+                with open(self.metadata_cache_file, 'r') as f:
+                    self.metadata_cache = json.load(f)
+        except Exception as e:
+            print(f"Could not load metadata cache: {e}")
+            self.metadata_cache = {}
+    
+    def save_metadata_cache(self):
+        """Save the image metadata cache to disk, keeping only the most recent entries"""
+        if not self.metadata_cache_dirty:
+            return
+        try:
+            with self.metadata_lock:
+                entries = list(self.metadata_cache.items())[-self.metadata_cache_limit:]
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(self.metadata_cache_file, 'w') as f:
+                json.dump(dict(entries), f)
+            self.metadata_cache_dirty = False
+        except Exception as e:
+            print(f"Could not save metadata cache: {e}")
+    
+    def probe_image(self, image_path):
+        """Return header-only metadata for an image without decoding any pixels.
+        
+        The result is a dict with width, height, mode, format, n_frames, is_animated,
+        has_transparency, has_icc, has_exif, orientation and date_taken, or None if the file can't
+        be identified. Results are cached per (path, mtime, size). Safe to call from
+        worker threads.
+        """
+        try:
+            stat = os.stat(image_path)
+        except OSError:
+            return None
         
-        self.select_folder_button = tk.Button(button_frame2, text="Select Folder", command=self.select_folder)
-        self.select_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        with self.metadata_lock:
+            cached = self.metadata_cache.get(image_path)
+        if (cached and cached['mtime'] == stat.st_mtime_ns and cached['size'] == stat.st_size
+                and 'date_taken' in cached['meta']):
+            return cached['meta']
         
-        # Add folder navigation buttons to row 2
-        self.prev_folder_button = tk.Button(button_frame2, text="◀ Prev Folder (Ctrl+←)", command=self.prev_folder, bg="#e6f3ff")
-        self.prev_folder_button.pack(side=tk.LEFT, padx=2, pady=2)
+        try:
+            with Image.open(image_path) as image:
+                # n_frames only walks frame headers (GIF/TIFF); nothing is decoded
+                n_frames = getattr(image, "n_frames", 1)
+                exif = image.getexif() if 'exif' in image.info else None
+                date_taken = None
+                if exif:
+                    # DateTimeOriginal from the Exif sub-IFD, else the IFD0 DateTime
+                    date_taken = exif.get_ifd(0x8769).get(0x9003) or exif.get(0x0132)
+                meta = {
+                    'width': image.width,
+                    'height': image.height,
+                    'mode': image.mode,
+                    'format': image.format,
+                    'n_frames': n_frames,
+                    'is_animated': bool(getattr(image, "is_animated", False)),
+                    'has_transparency': image.mode in ('RGBA', 'LA', 'PA') or 'transparency' in image.info,
+                    'has_icc': 'icc_profile' in image.info,
+                    'has_exif': 'exif' in image.info,
+                    'orientation': exif.get(0x0112, 1) if exif else 1,
+                    'date_taken': str(date_taken).strip('\x00 ') if date_taken else None,
+                }
+        except Exception:
+            return None
         
-        self.next_folder_button = tk.Button(button_frame2, text="Next Folder ▶ (Ctrl+→)", command=self.next_folder, bg="#e6f3ff")
-        self.next_folder_button.pack(side=tk.LEFT, padx=2, pady=2)
+        with self.metadata_lock:
+            # Re-insert so the newest probes survive trimming when the cache is saved
+            self.metadata_cache.pop(image_path, None)
+            self.metadata_cache[image_path] = {'mtime': stat.st_mtime_ns, 'size': stat.st_size, 'meta': meta}
+            self.metadata_cache_dirty = True
+        return meta
+    
+    def toggle_info_overlay(self):
+        """Show or hide the image information overlay (I)"""
+        self.show_info_overlay = not self.show_info_overlay
+        if self.current_image:
+            self.apply_zoom_and_display()
+        status = "ON" if self.show_info_overlay else "OFF"
+        self.show_temporary_message(f"Image info: {status}", 1500)
+    
+    def draw_info_overlay(self):
+        """Draw the current image's metadata in the top-left corner of the canvas"""
+        self.canvas.delete("info_overlay")
+        if not self.image_files or not (0 <= self.current_index < len(self.image_files)):
+            return
         
-        # Add browse in file manager button to row 2
-        self.browse_folder_button = tk.Button(button_frame2, text="📁 Browse in Nemo", command=self.browse_in_nemo)
-        self.browse_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        image_path = self.image_files[self.current_index]
+        meta = self.probe_image(image_path)
+        if meta is None:
+            return
         
-        # Add full path label centered in button_frame2
-        self.path_label = tk.Label(button_frame2, text="Path: No folder selected", font=("Arial", 12), fg="gray30")
-        self.path_label.pack(side=tk.LEFT, expand=True, padx=10, pady=2)
+        try:
+            file_size_mb = os.path.getsize(image_path) / (1024 * 1024)
+        except OSError:
+            file_size_mb = 0
+        lines = [
+            os.path.basename(image_path),
+            f"{meta['width']} × {meta['height']}  {meta['mode']}  {meta['format']}",
+            f"{file_size_mb:.1f} MB",
+        ]
+        if meta['n_frames'] > 1:
+            lines.append(f"{meta['n_frames']} {'frames' if meta['is_animated'] else 'pages'}")
+        extras = [name for name, present in (("ICC", meta['has_icc']), ("EXIF", meta['has_exif']),
+                                             ("Alpha", meta['has_transparency'])) if present]
+        if extras:
+            lines.append(" • ".join(extras))
+        if meta['orientation'] != 1:
+            lines.append(f"EXIF orientation: {meta['orientation']}")
+        
+        text = self.canvas.create_text(12, 12, text="\n".join(lines), anchor=tk.NW, fill="white",
+                                       font=("Arial", 11), tags="info_overlay")
+        x1, y1, x2, y2 = self.canvas.bbox(text)
+        background = self.canvas.create_rectangle(x1 - 6, y1 - 4, x2 + 6, y2 + 4, fill="#000000",
+                                                  outline="", stipple="gray50", tags="info_overlay")
+        self.canvas.tag_lower(background, text)
+    
+    def select_folder(self):
+        """Show folder selection dialog with history"""
+        if self.folder_history:
+            # Create a popup menu for folder selection
+            choice_window = tk.Toplevel(self.root)
+            choice_window.title("Select Folder")
+            choice_window.geometry("500x300")
+            choice_window.transient(self.root)
+            choice_window.grab_set()
+            
+            tk.Label(choice_window, text="Recent folders:", font=("Arial", 12, "bold")).pack(pady=5)
+            
+            # Create listbox for history
+            listbox_frame = tk.Frame(choice_window)
+            listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+            
+            scrollbar = tk.Scrollbar(listbox_frame)
+            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+            
+            self.history_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set)
+            self.history_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+            scrollbar.config(command=self.history_listbox.yview)
+            
+            # Populate listbox with history
+            for folder in self.folder_history:
+                if os.path.exists(folder):  # Only show existing folders
+                    self.history_listbox.insert(tk.END, folder)
+            
+            # Button frame
+            button_frame = tk.Frame(choice_window)
+            button_frame.pack(fill=tk.X, padx=10, pady=5)
+            
+            def use_selected():
+                selection = self.history_listbox.curselection()
+                if selection:
+                    folder_path = self.history_listbox.get(selection[0])
+                    choice_window.destroy()
+                    self.add_to_history(folder_path)
+                    self.load_images_from_folder(folder_path)
+            
+            def browse_new():
+                choice_window.destroy()
+                self.browse_for_folder()
+            
+            tk.Button(button_frame, text="Use Selected", command=use_selected).pack(side=tk.LEFT, padx=5)
+            tk.Button(button_frame, text="Browse New Folder", command=browse_new).pack(side=tk.LEFT, padx=5)
+            tk.Button(button_frame, text="Cancel", command=choice_window.destroy).pack(side=tk.RIGHT, padx=5)
+            
+            # Double-click to select
+            self.history_listbox.bind("<Double-Button-1>", lambda e: use_selected())
+        else:
+            # No history, go straight to browser
+            self.browse_for_folder()
+    
+    def browse_for_folder(self):
+        """Browse for a new folder"""
+        # Set initial directory to last used folder if available
+        initial_dir = self.folder_history[0] if self.folder_history else None
+        if initial_dir and not os.path.exists(initial_dir):
+            initial_dir = os.path.dirname(initial_dir) if initial_dir else None
         
-        # Store default button colors for resetting later
-        self.default_button_bg = self.crop_button.cget("bg")
+        folder_path = filedialog.askdirectory(
+            title="Select Folder Containing Images",
+            initialdir=initial_dir,
+            mustexist=True
+        )
         
-        # Third row (file operations and system buttons)
-        button_frame3 = tk.Frame(self.control_panel)
-        button_frame3.pack(fill=tk.X, side=tk.TOP, padx=5, pady=2)
+        if folder_path:
+            self.add_to_history(folder_path)
+            self.load_images_from_folder(folder_path)
+    
+    def browse_in_nemo(self):
+        """Open the current folder in Nemo file manager"""
+        if not hasattr(self, 'current_folder') or not self.current_folder:
+            self.show_temporary_message("No folder loaded", 2000)
+            return
         
-        # Add exit button at the beginning
-        self.exit_button = tk.Button(button_frame3, text="Exit (Q)", command=self.on_close, bg="#ffcccc")
-        self.exit_button.pack(side=tk.LEFT, padx=5, pady=2)
+        if not os.path.exists(self.current_folder):
+            self.show_temporary_message("Current folder no longer exists", 2000)
+            return
         
-        self.move_button = tk.Button(button_frame3, text="Move (V)", command=self.move_image)
-        self.move_button.pack(side=tk.LEFT, padx=5, pady=2)
+        try:
+            # Try to open with Nemo file manager
+            subprocess.run(['nemo', self.current_folder], check=False)
+            self.show_temporary_message(f"Opened folder in Nemo", 1500)
+        except FileNotFoundError:
+            try:
+                # Fallback to default file manager if Nemo is not available
+                subprocess.run(['xdg-open', self.current_folder], check=False)
+                self.show_temporary_message(f"Opened folder in file manager", 1500)
+            except Exception as e:
+                self.show_temporary_message(f"Failed to open folder: {str(e)}", 3000)
+    
+    def load_images_from_folder(self, folder_path, auto_display=True, streaming=True, image_files=None):
+        """Load all image files from the specified folder.
+        
+        With streaming, the folder is listed on a worker thread and the resume image (or the
+        first image found) is shown before the listing finishes; callers that need the
+        complete list right away pass streaming=False. image_files is a listing of the
+        folder prepared in advance by the folder look-ahead.
+        """
+        self.cancel_folder_scan()
+        self.cancel_folder_lookahead()
+        self.cancel_sort_job()  # It sorts the old list; the new one is listed in the chosen order
         
-        self.duplicate_button = tk.Button(button_frame3, text="Duplicate (D)", command=self.duplicate_image)
-        self.duplicate_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Store the current folder for reference
+        self.current_folder = folder_path
+        self.folder_watcher.watch(folder_path)
         
-        self.copy_button = tk.Button(button_frame3, text="Copy (C)", command=self.copy_image)
-        self.copy_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Update path label with full folder path
+        self.path_label.config(text=f"Path: {folder_path}" + (" (library)" if self.library_mode else ""))
         
-        # Add background selector button
-        self.background_button = tk.Button(button_frame3, text=f"🎨 {self.current_background}", command=self.cycle_background)
-        self.background_button.pack(side=tk.LEFT, padx=5, pady=2)
+        if streaming and image_files is None:
+            self.start_folder_scan(folder_path, auto_display)
+            return
         
-        # Add dangerous delete folder button (separated with spacing)
-        tk.Frame(button_frame3, width=15).pack(side=tk.LEFT)  # Spacer
-        self.delete_folder_button = tk.Button(button_frame3, text="🗑️ Delete Folder (Ctrl+Shift+Del)", 
-                                             command=self.delete_images_and_folder, 
-                                             bg="#ff9999", fg="black", font=('Arial', 8, 'bold'))
-        self.delete_folder_button.pack(side=tk.LEFT, padx=5, pady=2)
+        # Get all image files (skip dot files), in the chosen order
+        if image_files is not None:
+            self.image_files = image_files
+        elif self.library_mode:
+            self.image_files = ImageList(image_path for _, images, _ in walk_image_tree(
+                folder_path, threading.Event(), self.library_walk_workers, sniffer=self.format_sniffer)
+                for image_path in images)
+            self.image_files.sort_by(self.sort_mode, self.sort_keys.value)
+        else:
+            self.image_files = list_image_files(folder_path, self.format_sniffer)
+            if self.sort_mode != 'name':
+                self.image_files.sort_by(self.sort_mode, self.sort_keys.value)
         
-        self.remove_dupes_button = tk.Button(button_frame3, text="Remove Dupes", command=self.remove_duplicates)
-        self.remove_dupes_button.pack(side=tk.LEFT, padx=5, pady=2)
+        if not self.image_files:
+            self.background_decoder.cancel()
+            self.status_label.config(text="No image files found in folder")
+            # Still show path even if no images found
+            self.path_label.config(text=f"Path: {folder_path}")
+            return
         
-        # Add exit button at the end too
-        self.exit_button2 = tk.Button(button_frame3, text="Exit (Q)", command=self.on_close, bg="#ffcccc")
-        self.exit_button2.pack(side=tk.LEFT, padx=5, pady=2)
+        # Set initial index - try to find last viewed image first
+        start_index = 0
+        if self.last_viewed_image and self.last_viewed_image in self.image_files:
+            try:
+                start_index = self.image_files.index(self.last_viewed_image)
+            except ValueError:
+                start_index = 0
         
-        # Image list and current position
-        self.image_files = []
+        if auto_display:
+            self.current_index = start_index
+            self.status_label.config(text=f"Found {len(self.image_files)} images")
+            self.display_current_image()
+            self.start_warmup(start_index)
+        else:
+            # Decode the image the first Next will show, and its neighbours, while the user is idle
+            self.start_warmup(start_index)
+            
+            # Position to one BEFORE the last viewed image, so Next goes to last viewed
+            if self.last_viewed_image and self.last_viewed_image in self.image_files:
+                self.current_index = start_index - 1  # So first "Next" will go to last viewed image
+                self.status_label.config(text=f"Found {len(self.image_files)} images - Next will show last viewed image")
+            else:
+                self.current_index = -1  # So first "Next" will go to index 0
+                self.status_label.config(text=f"Found {len(self.image_files)} images - Press N/P or use buttons to navigate")
+        self.schedule_folder_lookahead()
+    
+    def start_folder_scan(self, folder_path, auto_display):
+        """List a folder in batches on a worker thread, showing the resume image as soon as possible"""
+        self.image_files = ImageList(sorted_by=self.sort_mode)
         self.current_index = -1
-        self.current_folder = None
-        
-        # Load folder history
-        self.history_file = os.path.expanduser("~/.image_viewer_history")
-        self.folder_history = self.load_folder_history()
-        
-        # Load copy/move destination history
-        self.copy_move_history_file = os.path.expanduser("~/.image_viewer_copy_move_history")
-        self.copy_move_history = self.load_copy_move_history()
-        
-        # Load saved zoom preferences
-        self.load_zoom_data()
-        
-        # Load last viewed image
-        self.load_last_viewed_image()
         
-        # On startup, load last-used folder if available but don't auto-display
-        if self.folder_history and os.path.exists(self.folder_history[0]):
-            self.status_label.config(text=f"Loading last folder: {os.path.basename(self.folder_history[0])}")
-            self.load_images_from_folder(self.folder_history[0], auto_display=False)
+        # The resume image is known up front: show it before the scan has even started
+        resume = self.last_viewed_image
+        if self.library_mode:
+            in_folder = resume and resume.startswith(os.path.join(folder_path, ''))
         else:
-            self.status_label.config(text="No recent folders - Click 'Select Folder' to begin")
+            in_folder = resume and os.path.dirname(resume) == folder_path
+        if not (in_folder and is_image_candidate(os.path.basename(resume)) and self.format_sniffer.verdict(resume)):
+            resume = None
+        
+        scan = {
+            'folder': folder_path,
+            'auto_display': auto_display,
+            'resume': resume,
+            'batches': queue.Queue(),
+            'cancel': threading.Event(),
+            'done': False,
+            'error': None,
+            'placed_index': -1,  # current_index as last set by the scan (differs once the user navigates)
+            'sort_mode': self.sort_mode,
+            'library': self.library_mode,
+            'folders': 0,  # Folders read so far (library mode)
+            'refresh_count': None,  # Image count before a refresh (F5)
+        }
+        self.folder_scan = scan
+        worker = self._library_walk_worker if self.library_mode else self._folder_scan_worker
+        threading.Thread(target=worker, args=(scan,), daemon=True).start()
+        
+        if resume:
+            self.image_files.append(resume)
+            if auto_display:
+                self.current_index = scan['placed_index'] = 0
+                self.display_current_image()
+        self.status_label.config(text=f"Scanning {os.path.basename(folder_path)}...")
+        self.folder_scan_job = self.root.after(self.folder_scan_poll_interval, self.poll_folder_scan)
+    
+    def _folder_scan_worker(self, scan):
+        """Read the folder with os.scandir and queue image paths in batches"""
+        batch = []
+        last_flush = time.time()
+        try:
+            with os.scandir(scan['folder']) as entries:
+                for entry in entries:
+                    if scan['cancel'].is_set():
+                        return
+                    try:
+                        if is_image_candidate(entry.name) and entry.is_file():
+                            batch.append(entry)
+                    except OSError:
+                        continue
+                    # Hand over a batch every so many files or every 100 ms, whichever comes first
+                    if len(batch) >= self.folder_scan_batch_size or (batch and time.time() - last_flush > 0.1):
+                        self._queue_scanned_batch(scan, batch)
+                        batch = []
+                        last_flush = time.time()
+        except OSError as e:
+            scan['error'] = e
+        finally:
+            if batch and not scan['cancel'].is_set():
+                self._queue_scanned_batch(scan, batch)
+            scan['done'] = True
+    
+    def _queue_scanned_batch(self, scan, entries):
+        """Keep the entries whose content is an image and queue their paths for the UI thread"""
+        images = self.format_sniffer.select_parallel(entries)
+        values = None
+        if images and scan['sort_mode'] in SortKeys.IO_MODES:
+            # Compute sort values here, off the UI thread, from the entries' (cached) stat data
+            found = set(images)
+            values = [self.sort_keys.value(scan['sort_mode'], entry.path, entry.stat())
+                      for entry in entries if entry.path in found]
+        if images:
+            scan['batches'].put((images, values))
+    
+    def _library_walk_worker(self, scan):
+        """Walk the folder tree in parallel and queue each folder's image paths as one batch"""
+        visit = None
+        if scan['sort_mode'] in SortKeys.IO_MODES:
+            # Compute sort values on the walker threads, from the entries' stat data
+            visit = lambda entry: self.sort_keys.value(scan['sort_mode'], entry.path, entry.stat())
+        try:
+            for _, images, values in walk_image_tree(scan['folder'], scan['cancel'], self.library_walk_workers,
+                                                     visit, self.format_sniffer):
+                scan['folders'] += 1
+                if images:
+                    scan['batches'].put((images, values))
+        except OSError as e:
+            scan['error'] = e
+        finally:
+            scan['done'] = True
+    
+    def poll_folder_scan(self):
+        """Merge the batches found so far into image_files and finish once the scan is done"""
+        self.folder_scan_job = None
+        scan = self.folder_scan
+        if scan is None or scan['cancel'].is_set():
+            return
         
-        # Bind the window close event
-        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+        # Read the flag before draining, so no batch queued before completion is missed
+        done = scan['done']
+        found = []
+        values = [] if scan['sort_mode'] in SortKeys.IO_MODES else None
+        try:
+            while True:
+                images, batch_values = scan['batches'].get_nowait()
+                found.extend(images)
+                if values is not None:
+                    values.extend(batch_values)
+        except queue.Empty:
+            pass
+        if found:
+            self.merge_scanned_files(found, values, scan)
+            self.update_jump_range()
         
-        # Set up key bindings
-        self.setup_key_bindings()
+        # Without a resume image, show the first image found
+        if scan['auto_display'] and self.current_index == -1 and self.image_files:
+            self.current_index = scan['placed_index'] = 0
+            self.display_current_image()
         
-        # Set up mouse bindings for cropping
-        self.setup_mouse_bindings()
+        if done:
+            self.folder_scan = None
+            self.finish_folder_scan(scan)
+            return
         
-        # Bind canvas resize to update image display
-        self.canvas.bind("<Configure>", self.on_canvas_resize)
+        if not self.showing_temp_message:
+            if scan['library']:
+                so_far = f"{len(self.image_files)} images in {scan['folders']} folders so far"
+            else:
+                so_far = f"{len(self.image_files)} images so far"
+            showing = scan['auto_display'] or self.current_index != scan['placed_index']
+            if showing and 0 <= self.current_index < len(self.image_files):
+                self.status_label.config(text=f"{self.get_position_status()} • Scanning, {so_far}")
+            else:
+                self.status_label.config(text=f"Scanning {os.path.basename(scan['folder'])}: {so_far}")
+        self.folder_scan_job = self.root.after(self.folder_scan_poll_interval, self.poll_folder_scan)
     
-    def show_temporary_message(self, message, duration=2000, prominent=False):
-        """Show a temporary message in the status label that disappears after specified duration (ms)"""
-        # Set flag to prevent status updates during temp message
-        self.showing_temp_message = True
-        
-        if prominent:
-            # Show prominent overlay message for wrap notifications
-            self.show_prominent_message(message, duration)
-        else:
-            # Regular status bar message
-            original_text = self.status_label.cget("text")
-            original_bg = self.status_label.cget("bg")
-            
-            # Show the temporary message with a subtle background
-            self.status_label.config(text=message, bg="#e6ffe6")  # Light green background
-            
-            # Schedule to revert back to original text and background
-            def restore_status():
-                self.showing_temp_message = False
-                self.status_label.config(text=original_text, bg=original_bg)
-            
-            self.root.after(duration, restore_status)
+    def merge_scanned_files(self, found, values, scan):
+        """Merge newly found paths (and the sort values computed for the scan's mode, if any)
+        into the sorted image_files, keeping current_index on the same file"""
+        # Remember what current_index points at: the position just before the resume image
+        # (until the first Next), or the current file
+        anchor = None
+        not_navigated = self.current_index == scan['placed_index']
+        if scan['resume'] and not scan['auto_display'] and not_navigated:
+            anchor, offset = scan['resume'], -1
+        elif 0 <= self.current_index < len(self.image_files):
+            anchor, offset = self.image_files[self.current_index], 0
+        
+        # Files can already be listed (the resume image, or files reported by the folder watcher):
+        # merge_sorted skips those, sorts the batch alone and merges it into the order in one pass
+        files = self.image_files
+        files.merge_sorted(found, self.sort_keys.value, {scan['sort_mode']: values} if values else None)
+        
+        if anchor is not None:
+            self.current_index = files.index(anchor) + offset
+            if not_navigated:
+                scan['placed_index'] = self.current_index
     
-    def show_prominent_message(self, message, duration=2000):
-        """Show a prominent overlay message as a temporary popup"""
-        # Create a temporary toplevel window
-        popup = tk.Toplevel(self.root)
-        popup.withdraw()  # Hide initially
-        popup.overrideredirect(True)  # Remove window decorations
-        popup.configure(bg="#ffeb3b")  # Bright yellow background
+    def finish_folder_scan(self, scan):
+        """Report the completed listing and warm up the images around the resume position"""
+        if scan['error'] is not None and not self.image_files:
+            self.status_label.config(text=f"Cannot read folder: {scan['error']}")
+            return
+        if not self.image_files:
+            self.background_decoder.cancel()
+            self.status_label.config(text="No image files found in folder")
+            return
         
-        # Create label with message
-        label = tk.Label(popup, text=message,
-                        font=("Arial", 16, "bold"),
-                        bg="#ffeb3b", fg="#333333",
-                        padx=20, pady=10,
-                        relief="raised", borderwidth=2)
-        label.pack()
+        if scan['library'] and scan['refresh_count'] is None:
+            self.show_temporary_message(f"Library: {len(self.image_files)} images in {scan['folders']} folders", 2500)
         
-        # Position popup in center of main window
-        popup.update_idletasks()  # Calculate size
+        if scan['auto_display']:
+            self.start_warmup(max(0, self.current_index))
+            if not self.showing_temp_message and 0 <= self.current_index < len(self.image_files):
+                self.status_label.config(text=self.get_position_status())
+        else:
+            # Decode the image the first Next will show, and its neighbours, while the user is idle
+            self.start_warmup(self.current_index + 1)
+            if self.current_index == scan['placed_index']:
+                if scan['resume']:
+                    self.status_label.config(text=f"Found {len(self.image_files)} images - Next will show last viewed image")
+                else:
+                    self.status_label.config(text=f"Found {len(self.image_files)} images - Press N/P or use buttons to navigate")
+            elif not self.showing_temp_message:
+                self.status_label.config(text=self.get_position_status())
+        if scan['refresh_count'] is not None:
+            self.report_refresh(scan['refresh_count'])
+        self.schedule_folder_lookahead()
+    
+    def cancel_folder_scan(self):
+        """Stop listing a folder, e.g. because another folder is being loaded"""
+        if self.folder_scan is not None:
+            self.folder_scan['cancel'].set()
+            self.folder_scan = None
+        if self.folder_scan_job:
+            self.root.after_cancel(self.folder_scan_job)
+            self.folder_scan_job = None
+    
+    def toggle_library_mode(self):
+        """Switch between browsing one folder and the whole tree below it as one list (L)"""
+        current = self.image_files[self.current_index] if 0 <= self.current_index < len(self.image_files) else None
+        self.library_mode = not self.library_mode
+        if self.library_mode:
+            folder = self.current_folder
+        else:
+            # Drop back to the folder of the image being viewed
+            folder = os.path.dirname(current) if current else self.current_folder
+        if not folder:
+            self.show_temporary_message("Library mode on" if self.library_mode else "Library mode off")
+            return
+        if current:
+            self.last_viewed_image = current  # Stay on this image
+        self.load_images_from_folder(folder)
+        self.show_temporary_message(f"Library mode {'on' if self.library_mode else 'off'}: {folder}", 2000)
+    
+    def insert_image_file(self, image_path):
+        """Insert a new file at its sorted position (binary search) and return its index.
+        
+        current_index is adjusted so it stays on the same file.
+        """
+        if image_path in self.image_files:
+            return self.image_files.index(image_path)
+        index = self.image_files.insert_sorted(image_path, self.sort_keys.value)
+        if index <= self.current_index:
+            self.current_index += 1
+        return index
+    
+    def load_sort_mode(self):
+        """Load the saved image list order"""
+        try:
+            if os.path.exists(self.sort_settings_file):
+                with open(self.sort_settings_file, 'r') as f:
+                    mode = json.load(f).get('sort_mode', 'name')
+                if mode in SortKeys.MODES:
+                    self.sort_mode = mode
+        except Exception as e:
+            print(f"Could not load sort mode: {e}")
+    
+    def save_sort_mode(self):
+        """Save the image list order"""
+        try:
+            with open(self.sort_settings_file, 'w') as f:
+                json.dump({'sort_mode': self.sort_mode}, f)
+        except Exception as e:
+            print(f"Could not save sort mode: {e}")
+    
+    def cycle_sort_mode(self):
+        """Switch to the next image order: name, natural, modified, size, capture date (T)"""
+        modes = list(SortKeys.MODES)
+        self.set_sort_mode(modes[(modes.index(self.sort_mode) + 1) % len(modes)])
+    
+    def set_sort_mode(self, mode):
+        """Re-sort the image list, computing any missing sort keys in the background first"""
+        self.sort_mode = mode
+        self.save_sort_mode()
+        self.cancel_sort_job()
+        
+        files = self.image_files
+        missing = files.missing_sort_values(mode) if mode in SortKeys.IO_MODES else None
+        if not missing:
+            self.apply_sort_order()
+            return
         
-        # Get main window position and size
-        root_x = self.root.winfo_x()
-        root_y = self.root.winfo_y()
-        root_width = self.root.winfo_width()
-        root_height = self.root.winfo_height()
+        # Stat or probe the files on a worker thread, then sort on the UI thread
+        job = {'mode': mode, 'files': files, 'total': len(missing), 'computed': 0, 'done': False,
+               'cancel': threading.Event()}
+        def compute(mode, path):
+            job['computed'] += 1
+            return self.sort_keys.value(mode, path)
+        def worker():
+            files.fill_sort_values(mode, missing, compute, job['cancel'])
+            job['done'] = True
+        self.sort_job = job
+        threading.Thread(target=worker, daemon=True).start()
+        self.root.after(100, self.poll_sort_job)
+    
+    def poll_sort_job(self):
+        """Report sort value computation progress and sort once all values are known"""
+        job = self.sort_job
+        if job is None or job['cancel'].is_set() or job['files'] is not self.image_files:
+            return
+        if job['done']:
+            self.sort_job = None
+            self.apply_sort_order()
+            return
+        self.status_label.config(text=f"Sorting by {SortKeys.MODES[job['mode']].lower()}... "
+                                      f"{job['computed']} of {job['total']}")
+        self.root.after(100, self.poll_sort_job)
+    
+    def cancel_sort_job(self):
+        """Stop computing sort values, e.g. because another folder is being loaded"""
+        if self.sort_job is not None:
+            self.sort_job['cancel'].set()
+            self.sort_job = None
+    
+    def apply_sort_order(self):
+        """Sort image_files in the current mode, keeping the current image selected"""
+        current_path = None
+        if 0 <= self.current_index < len(self.image_files):
+            current_path = self.image_files[self.current_index]
+        self.image_files.sort_by(self.sort_mode, self.sort_keys.value)
+        if current_path is not None:
+            self.current_index = self.image_files.index(current_path)
+            if not self.showing_temp_message:
+                self.status_label.config(text=self.get_position_status())
+            self.start_warmup(self.current_index)
+        self.show_temporary_message(f"Sort order: {SortKeys.MODES[self.sort_mode]}", 1500)
+    
+    def refresh_folder(self):
+        """Refresh the current folder to pick up any new images"""
+        if not hasattr(self, 'current_folder') or not self.current_folder:
+            messagebox.showinfo("No Folder", "No folder currently loaded. Please select a folder first.")
+            return
         
-        # Calculate popup position (bottom right of main window)
-        popup_width = popup.winfo_width()
-        popup_height = popup.winfo_height()
-        x = root_x + root_width - popup_width - 400  # 400px margin from right edge (about 4 inches)
-        y = root_y + root_height - popup_height - 200  # 200px margin from bottom edge (about 2 inches up)
+        if not os.path.exists(self.current_folder):
+            messagebox.showerror("Folder Not Found", f"Current folder no longer exists:\n{self.current_folder}")
+            return
         
-        popup.geometry(f"+{x}+{y}")
-        popup.deiconify()  # Show popup
-        popup.lift()  # Bring to front
-        popup.attributes('-topmost', True)  # Keep on top
+        # Remember current image if any
+        current_image_path = None
+        if self.image_files and 0 <= self.current_index < len(self.image_files):
+            current_image_path = self.image_files[self.current_index]
         
-        # Schedule removal and reset flag
-        def remove_popup():
-            try:
-                popup.destroy()
-            except:
-                pass  # Ignore if already destroyed
-            self.showing_temp_message = False
+        # Store old count for comparison
+        old_count = len(self.image_files) if self.image_files else 0
         
-        self.root.after(duration, remove_popup)
+        # Reload the folder with a background scan (in library mode that walks the whole tree),
+        # staying on the current image; if it no longer exists, the first image found is shown
+        if current_image_path:
+            self.last_viewed_image = current_image_path
+        self.load_images_from_folder(self.current_folder)
+        if self.folder_scan is not None:
+            self.folder_scan['refresh_count'] = old_count  # Reported by finish_folder_scan
+    
+    def report_refresh(self, old_count):
+        """Show what a refresh found"""
+        new_count = len(self.image_files) if self.image_files else 0
+        if new_count > old_count:
+            self.status_label.config(text=f"Refreshed! Found {new_count - old_count} new images ({new_count} total)")
+        elif new_count < old_count:
+            self.status_label.config(text=f"Refreshed! {old_count - new_count} images removed ({new_count} total)")
+        else:
+            self.status_label.config(text=f"Refreshed! No changes ({new_count} images)")
     
-    def extract_gif_frames(self, image):
-        """Extract all frames and durations from an animated GIF"""
-        frames = []
-        durations = []
+    def read_embedded_preview(self, image_path):
+        """Read the largest preview embedded in a JPEG's EXIF (APP1) or MPF (APP2) segments.
         
-        try:
-            # Check if image is animated
-            if not getattr(image, "is_animated", False):
-                return frames, durations
+        Only the header segments and the preview bytes are read. Returns a PIL image stretched
+        to the aspect ratio of the full image, or None if the file carries no usable preview.
+        """
+        candidates = []  # Encoded JPEG previews
+        full_size = None
+        mpf_entries = []  # (file offset, size) of images listed in the MPF index
+        
+        with open(image_path, 'rb') as f:
+            if f.read(2) != b'\xff\xd8':
+                return None  # Not a JPEG
             
-            # Extract all frames
-            for frame_idx in range(image.n_frames):
-                image.seek(frame_idx)
+            while True:
+                marker = f.read(2)
+                if len(marker) < 2 or marker[0] != 0xFF:
+                    break
+                code = marker[1]
+                if code in (0xD9, 0xDA):
+                    break  # End of image or start of scan - no more header segments
+                length_bytes = f.read(2)
+                if len(length_bytes) < 2:
+                    break
+                length = struct.unpack('>H', length_bytes)[0]
+                segment_start = f.tell()
                 
-                # Get frame duration (in milliseconds)
-                duration = image.info.get('duration', 100)  # Default 100ms if not specified
-                if duration == 0:
-                    duration = 100  # Some GIFs have 0 duration, use default
+                if code in (0xE1, 0xE2):
+                    data = f.read(length - 2)
+                    if code == 0xE1 and data.startswith(b'Exif\x00\x00'):
+                        # EXIF thumbnail: IFD1 holds its offset (0x0201) and length (0x0202)
+                        tiff = data[6:]
+                        ifd1 = self._read_tiff_ifd(tiff, next_ifd=1)
+                        if ifd1 and 0x0201 in ifd1 and 0x0202 in ifd1:
+                            start = ifd1[0x0201]
+                            candidates.append(tiff[start:start + ifd1[0x0202]])
+                    elif code == 0xE2 and data.startswith(b'MPF\x00'):
+                        # Multi-Picture Format index: offsets are relative to the MPF TIFF header
+                        tiff = data[4:]
+                        index = self._read_tiff_ifd(tiff, raw=True)
+                        if index and 0xB002 in index:
+                            entries_offset, entries_count, byte_order = index[0xB002]
+                            for i in range(entries_count // 16):
+                                size, offset = struct.unpack_from(byte_order + 'II', tiff, entries_offset + i * 16 + 4)
+                                if offset:  # The primary image has offset 0
+                                    mpf_entries.append((segment_start + 4 + offset, size))
+                elif 0xC0 <= code <= 0xCF and code not in (0xC4, 0xC8, 0xCC):
+                    # Start of frame: dimensions of the full image
+                    height, width = struct.unpack('>HH', f.read(5)[1:5])
+                    full_size = (width, height)
                 
-                # Convert to RGBA to handle transparency properly
-                frame = image.copy().convert('RGBA')
-                frames.append(frame)
-                durations.append(duration)
-            
-            # Reset to first frame
-            image.seek(0)
+                f.seek(segment_start + length - 2)
             
-        except Exception as e:
-            # If there's any error, treat as static image
-            pass
+            # Large previews (e.g. full-HD from RAW workflows) live after the primary image
+            for offset, size in mpf_entries:
+                if 0 < size <= 8 * 1024 * 1024:
+                    f.seek(offset)
+                    candidates.append(f.read(size))
         
-        return frames, durations
+        preview = None
+        for data in sorted(candidates, key=len, reverse=True):
+            try:
+                preview = Image.open(io.BytesIO(data))
+                preview.load()
+                break
+            except Exception:
+                preview = None
+        
+        if preview is None or not full_size or preview.width >= full_size[0]:
+            return None
+        
+        # Thumbnails are often letterboxed to 4:3; match the full image so zoom and pan line up
+        preview_height = max(1, round(preview.width * full_size[1] / full_size[0]))
+        if preview_height != preview.height:
+            preview = preview.resize((preview.width, preview_height), Image.Resampling.BILINEAR)
+        return preview
     
-    def animate_gif(self):
-        """Animate the current GIF by cycling through frames"""
-        if not self.is_animated or not self.gif_frames:
+    def _read_tiff_ifd(self, tiff, next_ifd=0, raw=False):
+        """Parse one IFD of an embedded TIFF structure into a {tag: value} dict.
+        
+        next_ifd=1 follows the link from IFD0 to IFD1. With raw=True values are
+        (offset, count, byte order) so callers can read undefined-type arrays.
+        """
+        try:
+            byte_order = '<' if tiff[:2] == b'II' else '>'
+            offset = struct.unpack_from(byte_order + 'I', tiff, 4)[0]
+            for _ in range(next_ifd):
+                count = struct.unpack_from(byte_order + 'H', tiff, offset)[0]
+                offset = struct.unpack_from(byte_order + 'I', tiff, offset + 2 + count * 12)[0]
+                if not offset:
+                    return None
+            
+            entries = {}
+            count = struct.unpack_from(byte_order + 'H', tiff, offset)[0]
+            for i in range(count):
+                entry = offset + 2 + i * 12
+                tag, field_type, value_count, value = struct.unpack_from(byte_order + 'HHII', tiff, entry)
+                if raw:
+                    entries[tag] = (value, value_count, byte_order)
+                elif field_type == 3 and value_count == 1:
+                    # SHORT values sit in the first two bytes of the value field
+                    entries[tag] = struct.unpack_from(byte_order + 'H', tiff, entry + 8)[0]
+                else:
+                    entries[tag] = value
+            return entries
+        except struct.error:
+            return None
+    
+    def show_embedded_preview(self, image_path):
+        """Paint the embedded preview of the image immediately, before the full decode starts"""
+        try:
+            preview = self.read_embedded_preview(image_path)
+        except Exception:
+            return
+        if preview is None:
+            return
+        
+        self.current_image = preview
+        self.gif_painted_frame = None
+        self.zoom_level, self.image_offset_x, self.image_offset_y = self.load_saved_zoom_and_position()
+        self.apply_zoom_and_display()
+        
+        # Flush the paint now - the full decode that follows blocks the event loop
+        self.root.update_idletasks()
+    
+    def display_current_image(self, wait_for_prefetch=True):
+        """Display the current image on the canvas"""
+        if self.decode_wait_job:
+            self.root.after_cancel(self.decode_wait_job)
+            self.decode_wait_job = None
+        if not self.image_files or self.current_index < 0 or self.current_index >= len(self.image_files):
             return
         
         try:
-            # Get current frame
-            current_gif_frame = self.gif_frames[self.current_frame]
+            # Stop any existing animation or background load of the previous image
+            self.stop_animation()
+            self.cancel_progressive_load()
+            self.showing_rendition = False
             
-            # Apply the same zoom and positioning as static images
-            self.current_image = current_gif_frame.copy()
-            self.apply_zoom_and_display()
+            # Get the current image file
+            image_path = self.image_files[self.current_index]
             
-            # Move to next frame
-            self.current_frame = (self.current_frame + 1) % len(self.gif_frames)
+            # Validate file path and existence
+            if not os.path.exists(image_path):
+                raise FileNotFoundError(f"File not found: {image_path}")
             
-            # Schedule next frame
-            duration = self.gif_durations[self.current_frame] if self.gif_durations else 100
-            self.animation_job = self.root.after(duration, self.animate_gif)
+            # Check file size and readability
+            try:
+                self.current_file_stat = os.stat(image_path)  # The version of the file being displayed
+                file_size = self.current_file_stat.st_size
+                if file_size == 0:
+                    raise ValueError(f"File is empty: {image_path}")
+            except OSError as e:
+                raise ValueError(f"Cannot access file: {image_path} - {str(e)}")
+            
+            # Update the window title with the filename
+            filename = os.path.basename(image_path)
+            self.root.title(f"Image Viewer - {filename}")
+            
+            # A cached image (or its screen-sized rendition) can be shown without decoding anything
+            if self.show_cached_image(image_path):
+                return
+            
+            # If the warm-up is decoding this very image, let it finish instead of decoding twice;
+            # the UI keeps running while it does
+            if wait_for_prefetch and self.background_decoder.is_decoding(image_path):
+                if file_size >= self.preview_min_file_size:
+                    self.show_embedded_preview(image_path)
+                if not self.showing_temp_message:
+                    self.status_label.config(text=f"{self.get_position_status()} • Loading...")
+                self.wait_for_background_decode(image_path, time.time() + self.decode_wait_timeout)
+                return
+            
+            # Paint the embedded camera preview right away while the full image decodes
+            if file_size >= self.preview_min_file_size:
+                self.show_embedded_preview(image_path)
+            
+            # Fit-to-window views of large static images only need a screen-sized decode
+            if self.show_scaled_decode(image_path):
+                return
+            
+            # Large files are read and decoded in the background, repainting as data arrives
+            if file_size >= self.progressive_min_file_size and self.start_progressive_load(image_path, file_size):
+                return
+            
+            # Try to load the image with forgiving error handling
+            decode_start = time.time()
+            try:
+                original_image = Image.open(image_path)
+                # Don't use verify() as it's too strict - just try to load the image data
+                # This allows partially corrupted images to be displayed
+                try:
+                    # Try to load the image data to ensure it's at least partially readable
+                    original_image.load()
+                except Exception as load_error:
+                    # If load fails, still try to proceed - the image might be partially viewable
+                    print(f"Warning: Image may be partially corrupted: {filename} - {load_error}")
+                    # Re-open the image since load() might have corrupted the state
+                    original_image = Image.open(image_path)
+            except Exception as pil_error:
+                # Only fail if we absolutely cannot open the image at all
+                pil_error_str = str(pil_error).replace(image_path, f"'{filename}'")
+                raise ValueError(f"Cannot open image '{filename}': {pil_error_str}. "
+                               f"File size: {file_size} bytes. "
+                               f"This file appears to be completely unreadable.")
+            
+            self.last_decode_seconds = time.time() - decode_start
+            self.show_loaded_image(original_image)
             
         except Exception as e:
-            # Stop animation on error
-            self.stop_animation()
+            self.handle_unreadable_image(image_path)
     
-    def stop_animation(self):
-        """Stop the current GIF animation"""
-        if self.animation_job:
-            self.root.after_cancel(self.animation_job)
-            self.animation_job = None
+    def wait_for_background_decode(self, image_path, deadline):
+        """Check back until the background decode of image_path is done, then display it"""
+        def check():
+            self.decode_wait_job = None
+            if not 0 <= self.current_index < len(self.image_files) or self.image_files[self.current_index] != image_path:
+                return  # Moved on
+            if self.background_decoder.is_decoding(image_path) and time.time() < deadline:
+                self.decode_wait_job = self.root.after(self.decode_wait_interval, check)
+                return
+            # Done (shown from the cache now), or taking too long (decoded here after all)
+            self.display_current_image(wait_for_prefetch=False)
+        self.decode_wait_job = self.root.after(self.decode_wait_interval, check)
     
-    def toggle_animation(self):
-        """Pause/resume GIF animation or slideshow"""
-        if self.is_slideshow:
-            # If slideshow is running, button controls slideshow pause/resume
-            self.toggle_slideshow_pause()
-            return
-        
-        # Normal GIF animation control
-        if not self.is_animated:
-            return
+    def show_cached_image(self, image_path):
+        """Display the current image from the cache tiers. Returns False on a miss."""
+        meta = self.probe_image(image_path)
+        if meta is None or meta['is_animated'] or meta['n_frames'] > 1:
+            return False  # Animations and documents need the full decoder
+        
+        # Full resolution is needed when the saved view zooms in past fit-to-window
+        signature = file_signature(self.current_file_stat)
+        zoom_level, _, _ = self.load_saved_zoom_and_position()
+        if zoom_level <= 1.0:
+            rendition = self.display_cache.get(image_path, signature)
+            if rendition is None:
+                rendition = self.load_disk_rendition(image_path, self.current_file_stat)
+            if rendition is not None:
+                # A rendition of an image smaller than the screen is the image itself
+                is_full = rendition.size == (meta['width'], meta['height'])
+                self.show_loaded_image(rendition, rendition=not is_full)
+                return True
         
-        if self.animation_job:
-            # Animation is running, pause it
-            self.stop_animation()
-            self.animation_button.config(text="▶️ Play (Space)", bg="#e6ffe6")
-        else:
-            # Animation is paused, resume it
-            if self.gif_frames:
-                self.animate_gif()
-                self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg)
+        original_image = self.full_cache.get(image_path, signature)
+        if original_image is not None:
+            self.show_loaded_image(original_image)
+            return True
+        return False
     
-    def setup_key_bindings(self):
-        """Set up all keyboard shortcuts"""
-        self.root.bind("n", lambda e: self.next_image())               # Next
-        self.root.bind("p", lambda e: self.prev_image())               # Previous
-        self.root.bind("h", lambda e: self.first_image())              # First (H key)
-        self.root.bind("e", lambda e: self.last_image())               # Last (E key)
-        self.root.bind("<Home>", lambda e: self.first_image())         # First (Home key)
-        self.root.bind("<End>", lambda e: self.last_image())           # Last (End key)
-        self.root.bind("<Next>", lambda e: self.next_image())          # Next (Page Down)
-        self.root.bind("<Prior>", lambda e: self.prev_image())         # Previous (Page Up)
-        self.root.bind("f", lambda e: self.toggle_fullscreen())        # Fullscreen toggle
-        self.root.bind("<F5>", lambda e: self.refresh_folder())        # Refresh folder
-        self.root.bind("<F9>", lambda e: self.toggle_toolbar())        # Toggle toolbar visibility
-        self.root.bind("s", lambda e: self.save_current_zoom())        # Save view (S key)
-        self.root.bind("r", lambda e: self.toggle_random())            # Random mode
-        self.root.bind("q", lambda e: self.on_close())                 # Exit
-        self.root.bind("d", lambda e: self.delete_image())             # Delete
-        self.root.bind("<Delete>", lambda e: self.delete_image())      # Delete
-        self.root.bind("<Control-Shift-Delete>", lambda e: self.delete_images_and_folder())  # Delete all images & folder (dangerous!)
-        self.root.bind("b", lambda e: self.browse_in_nemo())           # Browse in Nemo
-        self.root.bind("g", lambda e: self.cycle_background())         # Change background
-        self.root.bind("o", lambda e: self.toggle_border())            # Toggle border (O for outline)
-        self.root.bind("c", lambda e: self.copy_image())               # Copy
-        self.root.bind("d", lambda e: self.duplicate_image())          # Duplicate
-        self.root.bind("v", lambda e: self.move_image())               # Move
-        self.root.bind("w", lambda e: self.toggle_slideshow())         # Slideshow
-        self.root.bind("<KeyPress-plus>", lambda e: self.zoom_in())    # Zoom in (+)
-        self.root.bind("<KeyPress-equal>", lambda e: self.zoom_in())   # Zoom in (= key without shift)
-        self.root.bind("<KeyPress-minus>", lambda e: self.zoom_out())  # Zoom out (-)
-        self.root.bind("<KeyPress-0>", lambda e: self.reset_zoom())    # Reset zoom (0)
-        self.root.bind("<KeyPress-9>", lambda e: self.save_current_zoom())    # Save zoom (9)
-        self.root.bind("<KeyPress-8>", lambda e: self.clear_saved_zoom())     # Clear saved zoom (8)
-        self.root.bind("<space>", lambda e: self.handle_space_key())   # Smart space handler for slideshow/animation
-        self.root.bind("<F11>", lambda e: self.toggle_fullscreen())    # Fullscreen (F11)
-        self.root.bind("<Escape>", lambda e: self.exit_fullscreen())   # Exit fullscreen
-        self.root.bind("<Control-Left>", lambda e: self.prev_folder()) # Previous folder (Ctrl+Left)
-        self.root.bind("<Control-Right>", lambda e: self.next_folder()) # Next folder (Ctrl+Right)
-        
-        # Arrow key panning (pan image view)
-        self.root.bind("<Left>", lambda e: self.pan_with_keys(-20, 0))   # Pan left
-        self.root.bind("<Right>", lambda e: self.pan_with_keys(20, 0))   # Pan right
-        self.root.bind("<Up>", lambda e: self.pan_with_keys(0, 20))      # Move image down
-        self.root.bind("<Down>", lambda e: self.pan_with_keys(0, -20))   # Move image up
-        
-        # Enable focus so key bindings work
-        self.root.focus_set()
+    def show_scaled_decode(self, image_path):
+        """Decode the current image straight to screen size with the cheapest scaling decoder, on a
+        worker thread (the file read can take seconds on network storage), showing it when done.
+        
+        Returns False (so the caller decodes at full resolution) when the saved view zooms in,
+        the image needs the full decoder, or no available decoder can decode this format scaled.
+        """
+        meta = self.probe_image(image_path)
+        if meta is None or meta['is_animated'] or meta['n_frames'] > 1:
+            return False
+        rendition_size = self.get_rendition_size()
+        if fit_scale(meta, rendition_size) >= 1.0:
+            return False
+        zoom_level, _, _ = self.load_saved_zoom_and_position()
+        if zoom_level > 1.0:
+            return False
+        decoder = self.decoders.select(meta, rendition_size, needs=('scaled',))
+        if decoder.decoded_scale(meta, rendition_size) >= 1.0:
+            return False  # e.g. Pillow with a PNG: a full decode it is
+        
+        load = self.new_background_load(image_path, self.current_file_stat.st_size)
+        load.update(stat=self.current_file_stat, rendition_size=rendition_size,
+                    poll_interval=self.decode_wait_interval)  # Nothing to repaint meanwhile: just check often
+        self.start_background_load(load, self._scaled_load_worker, decoder, meta)
+        return True
     
-    def setup_mouse_bindings(self):
-        """Set up mouse bindings for panning and cropping"""
-        self.canvas.bind("<Button-1>", self.on_mouse_press)
-        self.canvas.bind("<B1-Motion>", self.on_mouse_drag)
-        self.canvas.bind("<ButtonRelease-1>", self.on_mouse_release)
+    def _scaled_load_worker(self, load, decoder, meta):
+        """Background thread: decode to screen size and cache the rendition (even if the user has
+        moved on, so coming back is instant); a regular decode if the scaled one fails"""
+        image_path, stat, rendition_size = load['path'], load['stat'], load['rendition_size']
+        try:
+            rendition = self.make_rendition(decoder.decode(image_path, meta, rendition_size), rendition_size)
+            load['decode_seconds'] = time.time() - load['started']
+            self.display_cache.put(image_path, rendition, load['decode_seconds'], file_signature(stat))
+            if stat.st_size >= self.disk_cache_min_file_size:
+                self.disk_cache.put(image_path, stat, rendition_size, rendition)
+            load['image'] = rendition
+        except Exception:
+            load['rendition_size'] = None
+            if not load['cancel'].is_set():
+                try:
+                    image = Image.open(image_path)
+                    image.load()
+                    load['image'] = image
+                except Exception as e:
+                    load['error'] = e
+        finally:
+            load['done'] = True
     
-    def on_mouse_press(self, event):
-        """Handle mouse press for both panning and cropping"""
-        if not self.current_image:
-            return
-            
-        # Check for double-click
-        current_time = time.time() * 1000  # milliseconds
-        if current_time - self.last_click_time < self.double_click_threshold:
-            # Double-click detected
-            self.toggle_toolbar()
-            self.last_click_time = 0  # Reset
-            return
-        
-        # Single click
-        self.last_click_time = current_time
+    def load_disk_rendition(self, image_path, stat):
+        """Look up a large file's rendition in the on-disk cache and promote it to the display tier"""
+        if stat.st_size < self.disk_cache_min_file_size:
+            return None
         
-        if self.is_cropping:
-            # Crop mode: start crop selection
-            self.start_crop(event)
-        else:
-            # Pan mode: start panning
-            self.start_pan(event)
-    
-    def on_mouse_drag(self, event):
-        """Handle mouse drag for both panning and cropping"""
-        if not self.current_image:
-            return
-            
-        if self.is_cropping:
-            # Crop mode: update crop selection
-            self.update_crop(event)
-        else:
-            # Pan mode: update pan position
-            self.update_pan(event)
+        rendition = self.disk_cache.get(image_path, stat, self.get_rendition_size())
+        if rendition is not None:
+            self.display_cache.put(image_path, rendition, signature=file_signature(stat))
+        return rendition
     
-    def on_mouse_release(self, event):
-        """Handle mouse release for both panning and cropping"""
-        if not self.current_image:
-            return
-            
-        if self.is_cropping:
-            # Crop mode: end crop selection
-            self.end_crop(event)
-        else:
-            # Pan mode: end panning
-            self.end_pan(event)
+    def invalidate_image(self, image_path):
+        """Forget everything cached about a file that changed on disk"""
+        self.full_cache.discard(image_path)
+        self.display_cache.discard(image_path)
+        with self.metadata_lock:
+            if self.metadata_cache.pop(image_path, None) is not None:
+                self.metadata_cache_dirty = True
+        if self.paged_path == image_path:
+            self.reset_paged_document()
+        # Disk renditions are keyed by size and mtime, so the old one can no longer be found
     
-    def start_pan(self, event):
-        """Start panning the image"""
-        self.is_panning = True
-        self.pan_start_x = event.x
-        self.pan_start_y = event.y
-        self.canvas.config(cursor="fleur")  # Change cursor to indicate panning
+    def reload_current_image(self):
+        """Re-decode the current image after it changed on disk, keeping the current zoom and pan"""
+        view = (self.zoom_level, self.image_offset_x, self.image_offset_y)
+        old_size = self.current_image.size if self.current_image else None
+        self.display_current_image()
+        if self.current_image is not None and self.current_image.size == old_size and self.progressive_load is None:
+            self.zoom_level, self.image_offset_x, self.image_offset_y = view
+            self.apply_zoom_and_display()
+        self.show_temporary_message("Image changed on disk - reloaded", 1500)
     
-    def update_pan(self, event):
-        """Update image position during panning"""
-        if not self.is_panning:
-            return
-            
-        # Calculate movement delta
-        delta_x = event.x - self.pan_start_x
-        delta_y = event.y - self.pan_start_y
+    def current_file_changed(self):
+        """Whether the displayed file's (mtime, size, inode) differ from the version on screen"""
+        if not self.image_files or not (0 <= self.current_index < len(self.image_files)):
+            return False
+        if self.current_file_stat is None:
+            return False
+        try:
+            stat = os.stat(self.image_files[self.current_index])
+        except OSError:
+            return False  # Deleted or moved away - nothing to re-render
+        return file_signature(stat) != file_signature(self.current_file_stat)
+    
+    def check_current_file(self):
+        """Reload the current image if it changed on disk (fallback where inotify is unavailable)"""
+        if self.current_file_changed():
+            self.invalidate_image(self.image_files[self.current_index])
+            self.reposition_image_file(self.image_files[self.current_index])
+            self.reload_current_image()
+    
+    def poll_file_changes(self):
+        """Apply file changes reported by the folder watcher"""
+        changed, renamed = self.folder_watcher.get_changes()
+        if None in changed:
+            # The event queue overflowed: the watcher lists the folder again on a worker thread and
+            # queues the differences; trust (mtime, size, inode) for the current image meanwhile
+            changed.discard(None)
+            if self.current_folder:
+                # Only the watched folder itself (in library mode, subfolders are not watched)
+                self.folder_watcher.rescan(self.image_files[:], lambda folder: list_image_files(folder, self.format_sniffer))
+            self.check_current_file()
+        
+        current_renamed = False
+        for old_path, new_path in renamed:
+            follows = self.image_files and 0 <= self.current_index < len(self.image_files) and \
+                self.image_files[self.current_index] in (old_path, new_path)
+            if self.rename_image_file(old_path, new_path):
+                current_renamed |= follows
+                changed.discard(old_path)
+            else:
+                changed.update((old_path, new_path))  # Not a listed image before or after: remove and add
         
-        # Update image offset
-        self.image_offset_x += delta_x
-        self.image_offset_y += delta_y
+        for image_path in changed:
+            self.invalidate_image(image_path)
         
-        # Update start position for next delta
-        self.pan_start_x = event.x
-        self.pan_start_y = event.y
+        if changed:
+            self.apply_folder_changes(changed)
+        elif renamed and self.image_files and 0 <= self.current_index < len(self.image_files) and \
+                not self.showing_temp_message:
+            self.status_label.config(text=self.get_position_status())
         
-        # Redraw image with new position
-        self.apply_zoom_and_display()
+        if self.image_files and 0 <= self.current_index < len(self.image_files):
+            current = self.image_files[self.current_index]
+            if (current in changed or current_renamed) and self.current_file_changed():
+                self.reload_current_image()
+            elif current_renamed:
+                self.show_temporary_message(f"Renamed to {os.path.basename(current)}", 1500)
+        
+        self.root.after(self.file_change_poll_interval, self.poll_file_changes)
     
-    def end_pan(self, event):
-        """End panning the image"""
-        self.is_panning = False
-        self.canvas.config(cursor="")  # Reset cursor
+    def rename_image_file(self, old_path, new_path):
+        """Follow a listed file renamed within the folder: give it its new path and move it to its
+        new sorted place, keeping current_index on it if it was current. A file it replaced is
+        dropped (if that one was current, current_index moves to the renamed file). Returns False,
+        changing nothing, if old_path wasn't listed or new_path can't be shown in this folder."""
+        if os.path.dirname(new_path) != self.current_folder or old_path not in self.image_files:
+            return False
+        if not is_image_candidate(os.path.basename(new_path)) or self.format_sniffer.verdict(new_path) is None:
+            return False
+        index = self.image_files.index(old_path)
+        follow = index == self.current_index
+        if new_path in self.image_files:
+            replaced = self.image_files.index(new_path)
+            follow |= replaced == self.current_index
+            del self.image_files[replaced]
+            if replaced < self.current_index:
+                self.current_index -= 1
+            if replaced < index:
+                index -= 1
+            self.invalidate_image(new_path)
+        del self.image_files[index]
+        if index < self.current_index:
+            self.current_index -= 1
+        new_index = self.image_files.insert_sorted(new_path, self.sort_keys.value)
+        if follow:
+            self.current_index = new_index
+        elif new_index <= self.current_index:
+            self.current_index += 1
+        
+        # Same file, new key: drop what is cached under the old path, but keep an open document
+        self.full_cache.discard(old_path)
+        self.display_cache.discard(old_path)
+        with self.metadata_lock:
+            if self.metadata_cache.pop(old_path, None) is not None:
+                self.metadata_cache_dirty = True
+        with self.page_cache_lock:
+            if self.paged_path == old_path:
+                self.paged_path = new_path
+        return True
     
-    def pan_with_keys(self, delta_x, delta_y):
-        """Pan the image using keyboard arrow keys"""
-        if not self.current_image:
+    def reposition_image_file(self, image_path):
+        """Move a listed file whose sort value changed (e.g. rewritten: a new mtime) to its new
+        place in the list, keeping current_index on the same file; returns whether it moved"""
+        old_index, new_index = self.image_files.update_sorted(image_path, self.sort_keys.value)
+        if old_index == self.current_index:
+            self.current_index = new_index
+        else:
+            if old_index < self.current_index:
+                self.current_index -= 1
+            if new_index <= self.current_index:
+                self.current_index += 1
+        return new_index != old_index
+    
+    def apply_folder_changes(self, changed):
+        """Add, remove and re-sort changed files in image_files in place, keeping current_index on the same file"""
+        added = 0
+        removed = 0
+        moved = False
+        current_removed = False
+        for image_path in sorted(changed):
+            if os.path.dirname(image_path) != self.current_folder:
+                continue
+            exists = is_image_candidate(os.path.basename(image_path)) and self.format_sniffer.verdict(image_path) is not None
+            listed = image_path in self.image_files
+            if exists and not listed:
+                self.insert_image_file(image_path)
+                added += 1
+            elif listed and exists:
+                moved |= self.reposition_image_file(image_path)  # Rewritten: its mtime, size or date may differ
+            elif listed and not exists:
+                index = self.image_files.index(image_path)
+                del self.image_files[index]
+                if index < self.current_index:
+                    self.current_index -= 1
+                elif index == self.current_index:
+                    current_removed = True
+                removed += 1
+        
+        if not added and not removed:
+            if moved and 0 <= self.current_index < len(self.image_files) and not self.showing_temp_message:
+                self.status_label.config(text=self.get_position_status())
             return
-            
-        # Update image offset
-        self.image_offset_x += delta_x
-        self.image_offset_y += delta_y
+        self.update_jump_range()
         
-        # Redraw image with new position
-        self.apply_zoom_and_display()
-    
-    def on_canvas_resize(self, event):
-        """Handle canvas resize events"""
-        if self.current_image and not self.is_slideshow:
-            self.display_current_image()
+        if current_removed:
+            # The file on screen went away: show the one that took its place
+            self.current_index = min(self.current_index, len(self.image_files) - 1)
+            if self.image_files:
+                self.display_current_image()
+            else:
+                self.canvas.delete("all")
+                self.current_image = None
+                self.original_image = None
+        elif self.image_files and 0 <= self.current_index < len(self.image_files) and not self.showing_temp_message:
+            self.status_label.config(text=self.get_position_status())
+        
+        parts = []
+        if added:
+            parts.append(f"{added} new")
+        if removed:
+            parts.append(f"{removed} removed")
+        self.show_temporary_message(f"Folder changed: {', '.join(parts)} ({len(self.image_files)} images)", 2000)
     
-    def load_folder_history(self):
-        """Load folder history from file"""
+    def load_cache_settings(self):
+        """Load cache budgets and eviction policies, falling back to defaults for missing keys"""
+        settings = {
+            'full_cache_mb': 768,
+            'full_cache_policy': 'lru',
+            'display_cache_mb': 1024,
+            'display_cache_policy': '2q',
+            'decode_processes': 0,  # > 0 decodes prefetched images in that many worker processes
+        }
         try:
-            if os.path.exists(self.history_file):
-                with open(self.history_file, 'r') as f:
-                    return [line.strip() for line in f.readlines() if line.strip()]
-        except:
-            pass
-        return []
+            if os.path.exists(self.cache_settings_file):
+                with open(self.cache_settings_file, 'r') as f:
+                    settings.update(json.load(f))
+        except Exception as e:
+            print(f"Error loading cache settings: {e}")
+        for key in ('full_cache_policy', 'display_cache_policy'):
+            if settings[key] not in CACHE_POLICIES:
+                print(f"Unknown cache policy '{settings[key]}', using lru (choices: {', '.join(CACHE_POLICIES)})")
+                settings[key] = 'lru'
+        return settings
     
-    def save_folder_history(self):
-        """Save folder history to file"""
+    def get_cache_stats(self):
+        """Statistics of every cache tier, for tuning budgets and policies"""
+        disk_entries = 0
+        disk_bytes = 0
         try:
-            with open(self.history_file, 'w') as f:
-                for folder in self.folder_history:
-                    f.write(folder + '\n')
-        except:
+            for entry in os.scandir(self.disk_cache.directory):
+                disk_entries += 1
+                disk_bytes += entry.stat().st_size
+        except OSError:
             pass
+        return {
+            'full': self.full_cache.stats(),
+            'display': self.display_cache.stats(),
+            'disk': {'name': "Disk renditions", 'entries': disk_entries, 'bytes': disk_bytes,
+                     'max_bytes': self.disk_cache.max_bytes},
+            'metadata': {'name': "Metadata", 'entries': len(self.metadata_cache)},
+        }
     
-    def add_to_history(self, folder_path):
-        """Add folder to history, moving it to top if it exists"""
-        if folder_path in self.folder_history:
-            self.folder_history.remove(folder_path)
-        self.folder_history.insert(0, folder_path)
-        # Keep only last 10 folders
-        self.folder_history = self.folder_history[:10]
-        self.save_folder_history()
+    def show_cache_stats(self, event=None):
+        """Print the cache statistics and show them in a dialog"""
+        stats = self.get_cache_stats()
+        lines = []
+        for tier in ('full', 'display'):
+            t = stats[tier]
+            lines.append(f"{t['name']} ({t['policy']}): {t['entries']} images, "
+                         f"{t['bytes'] / 1048576:.0f} / {t['max_bytes'] / 1048576:.0f} MB")
+            lines.append(f"    hits {t['hits']}, misses {t['misses']} ({t['hit_rate']:.0%}), "
+                         f"evictions {t['evictions']}, decode time saved {t['decode_time_saved']:.1f}s")
+        disk = stats['disk']
+        lines.append(f"{disk['name']}: {disk['entries']} files, "
+                     f"{disk['bytes'] / 1048576:.0f} / {disk['max_bytes'] / 1048576:.0f} MB")
+        lines.append(f"{stats['metadata']['name']}: {stats['metadata']['entries']} files")
+        report = "\n".join(lines)
+        print(report)
+        messagebox.showinfo("Cache Statistics", report)
     
-    def load_zoom_data(self):
-        """Load saved zoom preferences from file"""
-        try:
-            if os.path.exists(self.zoom_settings_file):
-                with open(self.zoom_settings_file, 'r') as f:
-                    self.image_zoom_memory = json.load(f)
-        except Exception as e:
-            print(f"Could not load zoom data: {e}")
-            self.image_zoom_memory = {}
+    def get_rendition_size(self):
+        """Size of the box display renditions are scaled to fit: the screen"""
+        return self.rendition_size
     
-    def save_zoom_data(self):
-        """Save current zoom preferences to file"""
-        try:
-            with open(self.zoom_settings_file, 'w') as f:
-                json.dump(self.image_zoom_memory, f, indent=2)
-        except Exception as e:
-            print(f"Could not save zoom data: {e}")
+    def prefetch_image(self, image_path, full=False, is_cancelled=lambda: False):
+        """Decode an image into the cache tiers ahead of display. Runs on background worker threads.
+        
+        Fills the display tier (and the full tier if full=True) without touching the UI.
+        """
+        stat = os.stat(image_path)
+        signature = file_signature(stat)
+        have_rendition = self.display_cache.has(image_path, signature)
+        if have_rendition and (not full or self.full_cache.has(image_path, signature)):
+            return
+        meta = self.probe_image(image_path)
+        if meta is None or meta['is_animated'] or meta['n_frames'] > 1 or is_cancelled():
+            return
+        
+        rendition_size = self.get_rendition_size()
+        is_large = stat.st_size >= self.disk_cache_min_file_size
+        if not full and not have_rendition and is_large:
+            rendition = self.disk_cache.get(image_path, stat, rendition_size)
+            if rendition is not None:
+                self.display_cache.put(image_path, rendition, signature=signature)
+                return
+        
+        decode_start = time.time()
+        if self.decode_pool is not None and not full:
+            # Decode and downscale in a worker process; only the rendition comes back, and
+            # collect_pool_decodes stores it while this thread goes on to the next job
+            self.decode_slots.acquire()
+            try:
+                decoding = self.decode_pool.submit(decode_to_shared_memory, image_path, meta, rendition_size)
+            except RuntimeError:  # The pool was shut down
+                self.decode_slots.release()
+                return
+            job = {'path': image_path, 'stat': stat, 'meta': meta, 'rendition_size': rendition_size,
+                   'start': decode_start, 'is_cancelled': is_cancelled, 'finished': Future()}
+            decoding.add_done_callback(lambda decoding: self.pool_results.put((decoding, job)))
+            return job['finished']
+        
+        # Without full, the cheapest decoder may decode at a reduced scale that still covers the screen
+        image = self.decoders.decode(image_path, meta, None if full else rendition_size)
+        if is_cancelled():
+            return
+        if full:
+            self.full_cache.put(image_path, image, time.time() - decode_start, signature)
+        if not have_rendition:
+            self.cache_prefetched_rendition(image_path, stat, meta, rendition_size, image, decode_start)
     
-    def load_last_viewed_image(self):
-        """Load the last viewed image from file"""
-        try:
-            if os.path.exists(self.last_image_file):
-                with open(self.last_image_file, 'r') as f:
-                    data = json.load(f)
-                    self.last_viewed_image = data.get('last_image', None)
-        except Exception as e:
-            print(f"Could not load last viewed image: {e}")
-            self.last_viewed_image = None
+    def cache_prefetched_rendition(self, image_path, stat, meta, rendition_size, image, decode_start):
+        """Put the rendition of a prefetched image in the display tier, and on disk if the file is large"""
+        rendition = self.make_rendition(image, rendition_size)
+        self.display_cache.put(image_path, rendition, time.time() - decode_start, file_signature(stat))
+        if stat.st_size >= self.disk_cache_min_file_size and rendition.size != (meta['width'], meta['height']):
+            self.disk_cache.put(image_path, stat, rendition_size, rendition)
     
-    def save_last_viewed_image(self):
-        """Save the current image as the last viewed image"""
-        if self.image_files and self.current_index >= 0:
+    def collect_pool_decodes(self):
+        """Store the renditions decoded in worker processes as they finish (runs on its own thread)"""
+        while True:
+            decoding, job = self.pool_results.get()
             try:
-                current_image_path = self.image_files[self.current_index]
-                data = {'last_image': current_image_path}
-                with open(self.last_image_file, 'w') as f:
-                    json.dump(data, f, indent=2)
-                self.last_viewed_image = current_image_path
-            except Exception as e:
-                print(f"Could not save last viewed image: {e}")
-    
-    def select_folder(self):
-        """Show folder selection dialog with history"""
-        if self.folder_history:
-            # Create a popup menu for folder selection
-            choice_window = tk.Toplevel(self.root)
-            choice_window.title("Select Folder")
-            choice_window.geometry("500x300")
-            choice_window.transient(self.root)
-            choice_window.grab_set()
-            
-            tk.Label(choice_window, text="Recent folders:", font=("Arial", 12, "bold")).pack(pady=5)
-            
-            # Create listbox for history
-            listbox_frame = tk.Frame(choice_window)
-            listbox_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-            
-            scrollbar = tk.Scrollbar(listbox_frame)
-            scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-            
-            self.history_listbox = tk.Listbox(listbox_frame, yscrollcommand=scrollbar.set)
-            self.history_listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-            scrollbar.config(command=self.history_listbox.yview)
-            
-            # Populate listbox with history
-            for folder in self.folder_history:
-                if os.path.exists(folder):  # Only show existing folders
-                    self.history_listbox.insert(tk.END, folder)
-            
-            # Button frame
-            button_frame = tk.Frame(choice_window)
-            button_frame.pack(fill=tk.X, padx=10, pady=5)
-            
-            def use_selected():
-                selection = self.history_listbox.curselection()
-                if selection:
-                    folder_path = self.history_listbox.get(selection[0])
-                    choice_window.destroy()
-                    self.add_to_history(folder_path)
-                    self.load_images_from_folder(folder_path)
-            
-            def browse_new():
-                choice_window.destroy()
-                self.browse_for_folder()
-            
-            tk.Button(button_frame, text="Use Selected", command=use_selected).pack(side=tk.LEFT, padx=5)
-            tk.Button(button_frame, text="Browse New Folder", command=browse_new).pack(side=tk.LEFT, padx=5)
-            tk.Button(button_frame, text="Cancel", command=choice_window.destroy).pack(side=tk.RIGHT, padx=5)
-            
-            # Double-click to select
-            self.history_listbox.bind("<Double-Button-1>", lambda e: use_selected())
-        else:
-            # No history, go straight to browser
-            self.browse_for_folder()
+                if not decoding.cancelled() and decoding.exception() is None:
+                    image = read_shared_memory_image(*decoding.result())  # Frees the block, cancelled or not
+                    if not job['is_cancelled']():
+                        self.cache_prefetched_rendition(job['path'], job['stat'], job['meta'],
+                                                        job['rendition_size'], image, job['start'])
+            except Exception:
+                pass
+            finally:
+                self.decode_slots.release()
+                job['finished'].set_result(None)
     
-    def browse_for_folder(self):
-        """Browse for a new folder"""
-        # Set initial directory to last used folder if available
-        initial_dir = self.folder_history[0] if self.folder_history else None
-        if initial_dir and not os.path.exists(initial_dir):
-            initial_dir = os.path.dirname(initial_dir) if initial_dir else None
-        
-        folder_path = filedialog.askdirectory(
-            title="Select Folder Containing Images",
-            initialdir=initial_dir,
-            mustexist=True
-        )
+    def start_warmup(self, start_index):
+        """Queue the resume image and the images around it for background decoding"""
+        self.background_decoder.cancel()
+        if not self.image_files:
+            return
         
-        if folder_path:
-            self.add_to_history(folder_path)
-            self.load_images_from_folder(folder_path)
+        start_index = max(0, min(start_index, len(self.image_files) - 1))
+        # The resume image comes first and fully, so any saved zoom is instant too
+        self.background_decoder.submit(self.image_files[start_index], priority=0, full=True)
+        for distance in range(1, max(self.warmup_before, self.warmup_after) + 1):
+            if distance <= self.warmup_after and start_index + distance < len(self.image_files):
+                self.background_decoder.submit(self.image_files[start_index + distance], priority=distance)
+            if distance <= self.warmup_before and start_index - distance >= 0:
+                self.background_decoder.submit(self.image_files[start_index - distance], priority=distance)
     
-    def browse_in_nemo(self):
-        """Open the current folder in Nemo file manager"""
-        if not hasattr(self, 'current_folder') or not self.current_folder:
-            self.show_temporary_message("No folder loaded", 2000)
+    def make_rendition(self, image, size):
+        """Scale an image down to fit in size for the display tier (images that already fit are returned as is)"""
+        return make_rendition(image, size)
+    
+    def cache_decoded_image(self, image_path, image):
+        """Put a freshly decoded static image in the full tier and its rendition in the display tier"""
+        decode_seconds = self.last_decode_seconds
+        stat = self.current_file_stat  # As it was before decoding, so a concurrent edit is never masked
+        signature = file_signature(stat)
+        self.full_cache.put(image_path, image, decode_seconds, signature)
+        if self.display_cache.has(image_path, signature):
             return
         
-        if not os.path.exists(self.current_folder):
-            self.show_temporary_message("Current folder no longer exists", 2000)
+        rendition_size = self.get_rendition_size()
+        def worker():
+            try:
+                resize_start = time.time()
+                rendition = self.make_rendition(image, rendition_size)
+                self.display_cache.put(image_path, rendition, decode_seconds + time.time() - resize_start, signature)
+                
+                # Large originals also get a persistent copy so the next session skips the decode
+                if stat.st_size >= self.disk_cache_min_file_size and rendition is not image:
+                    self.disk_cache.put(image_path, stat, rendition_size, rendition)
+            except Exception:
+                pass
+        
+        # Scaling a large image takes a while - keep it off the UI thread
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def ensure_full_resolution(self):
+        """Replace a displayed rendition by the full-resolution image, e.g. before zooming in or cropping"""
+        if not self.showing_rendition:
             return
+        image_path = self.image_files[self.current_index]
         
-        try:
-            # Try to open with Nemo file manager
-            subprocess.run(['nemo', self.current_folder], check=False)
-            self.show_temporary_message(f"Opened folder in Nemo", 1500)
-        except FileNotFoundError:
+        signature = file_signature(self.current_file_stat)
+        original_image = self.full_cache.get(image_path, signature)
+        if original_image is None:
+            decode_start = time.time()
             try:
-                # Fallback to default file manager if Nemo is not available
-                subprocess.run(['xdg-open', self.current_folder], check=False)
-                self.show_temporary_message(f"Opened folder in file manager", 1500)
+                meta = self.probe_image(image_path)
+                if meta is not None:
+                    original_image = self.decoders.decode(image_path, meta)
+                else:
+                    original_image = Image.open(image_path)
+                    original_image.load()
             except Exception as e:
-                self.show_temporary_message(f"Failed to open folder: {str(e)}", 3000)
-    
-    def load_images_from_folder(self, folder_path, auto_display=True):
-        """Load all image files from the specified folder"""
-        # Store the current folder for reference
-        self.current_folder = folder_path
+                self.show_temporary_message(f"Cannot load full resolution: {e}", 3000)
+                return
+            self.full_cache.put(image_path, original_image, time.time() - decode_start, signature)
         
-        # Update path label with full folder path
-        self.path_label.config(text=f"Path: {folder_path}")
+        self.showing_rendition = False
+        self.original_image = original_image
+        self.current_image = original_image
+    
+    def show_loaded_image(self, original_image, rendition=False):
+        """Display a freshly decoded image for the current index and update the UI state.
+        
+        With rendition=True, original_image is a screen-sized rendition from the display tier;
+        the full-resolution image is loaded only when zoom or crop needs it.
+        """
+        self.showing_rendition = rendition
+        self.original_image = None if rendition else original_image
+        
+        # Multi-page TIFFs are paged documents, not animations - never decode every page
+        n_frames = getattr(original_image, "n_frames", 1)
+        self.reset_paged_document()
+        if original_image.format == 'TIFF' and n_frames > 1:
+            self.is_paged = True
+            self.page_count = n_frames
+            with self.page_cache_lock:
+                self.paged_path = self.image_files[self.current_index]
+                self.page_cache[0] = self.original_image
+        
+        # Check if this is an animated GIF
+        self.is_animated = getattr(original_image, "is_animated", False) and not self.is_paged
+        
+        # Nothing from a previous animation is on screen any more
+        self.gif_painted_frame = None
+        self.gif_frame_boxes = []
+        
+        if self.is_animated:
+            # Extract all frames for animation
+            self.gif_frames, self.gif_durations = self.extract_gif_frames(self.original_image)
+            self.gif_frame_boxes = self.compute_gif_frame_boxes(self.gif_frames)
+            self.current_frame = 0
+            
+            if self.gif_frames:
+                # Use the first frame as the base image
+                self.current_image = self.gif_frames[0].copy()
+            else:
+                # Fallback to static display if frame extraction failed
+                self.is_animated = False
+                self.current_image = self.original_image.copy()
+        elif rendition:
+            # Renditions are never modified in place, so no copy is needed
+            self.current_image = original_image
+            self.gif_frames = []
+            self.gif_durations = []
+        else:
+            # Static image
+            self.current_image = self.original_image.copy()
+            self.gif_frames = []
+            self.gif_durations = []
+            
+            # Keep it for zoom and crop, and a screen-sized rendition for revisits
+            if not self.is_paged:
+                self.cache_decoded_image(self.image_files[self.current_index], self.original_image)
         
-        # Common image file extensions (including .enc for encrypted/renamed images)
-        image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
+        # Load saved zoom and position for this image or use defaults
+        self.zoom_level, self.image_offset_x, self.image_offset_y = self.load_saved_zoom_and_position()
         
-        # Get all image files (skip dot files)
-        self.image_files = [os.path.join(folder_path, f) for f in os.listdir(folder_path) 
-                           if os.path.isfile(os.path.join(folder_path, f)) and 
-                           not f.startswith('.') and
-                           f.lower().endswith(image_extensions)]
+        # Apply zoom and fit to canvas
+        self.apply_zoom_and_display()
         
-        if not self.image_files:
-            self.status_label.config(text="No image files found in folder")
-            # Still show path even if no images found
-            self.path_label.config(text=f"Path: {folder_path}")
-            return
+        # Save this image as the last viewed image
+        self.save_last_viewed_image()
         
-        # Sort files naturally
-        self.image_files.sort()
+        # Update animation button visibility and state
+        if self.is_slideshow:
+            # During slideshow, pause button controls slideshow pause
+            if self.slideshow_paused:
+                self.animation_button.config(text="▶️ Resume (Space)", bg="#e6ffe6", state='normal')
+            else:
+                self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='normal')
+        elif self.is_animated and self.gif_frames:
+            self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='normal')
+            self.animate_gif()
+        else:
+            self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='disabled')
         
-        # Set initial index - try to find last viewed image first
-        start_index = 0
-        if self.last_viewed_image and self.last_viewed_image in self.image_files:
-            try:
-                start_index = self.image_files.index(self.last_viewed_image)
-            except ValueError:
-                start_index = 0
+        # Only update status if not showing a temporary message
+        if not self.showing_temp_message:
+            self.status_label.config(text=self.get_position_status())
         
-        if auto_display:
-            self.current_index = start_index
-            self.status_label.config(text=f"Found {len(self.image_files)} images")
-            self.display_current_image()
-        else:
-            # Position to one BEFORE the last viewed image, so Next goes to last viewed
-            if self.last_viewed_image and self.last_viewed_image in self.image_files:
-                self.current_index = start_index - 1  # So first "Next" will go to last viewed image
-                self.status_label.config(text=f"Found {len(self.image_files)} images - Next will show last viewed image")
-            else:
-                self.current_index = -1  # So first "Next" will go to index 0
-                self.status_label.config(text=f"Found {len(self.image_files)} images - Press N/P or use buttons to navigate")
+        if self.is_paged:
+            self.prefetch_pages()
     
-    def refresh_folder(self):
-        """Refresh the current folder to pick up any new images"""
-        if not hasattr(self, 'current_folder') or not self.current_folder:
-            messagebox.showinfo("No Folder", "No folder currently loaded. Please select a folder first.")
-            return
+    def reset_paged_document(self):
+        """Forget the pages of the previous multi-page document"""
+        self.is_paged = False
+        self.page_count = 1
+        self.current_page = 0
+        with self.page_cache_lock:
+            self.paged_path = None
+            self.paged_generation += 1
+            self.page_cache.clear()
+    
+    def decode_page(self, image_path, page_index):
+        """Seek to one page of a multi-page file and decode only that page"""
+        with Image.open(image_path) as document:
+            document.seek(page_index)
+            page = document.copy()
+        page.format = document.format
+        return page
+    
+    def cache_page(self, page_index, page, generation=None):
+        """Store a decoded page, keeping at most page_cache_limit pages in memory. A page decoded
+        in the background passes the paged_generation it was decoded for, and is dropped if
+        another document has been opened since."""
+        with self.page_cache_lock:
+            if generation is not None and generation != self.paged_generation:
+                return
+            self.page_cache[page_index] = page
+            self.page_cache.move_to_end(page_index)
+            while len(self.page_cache) > self.page_cache_limit:
+                # Evict the least recently used page, but never the one on screen
+                oldest = next(iter(self.page_cache))
+                if oldest == self.current_page:
+                    self.page_cache.move_to_end(oldest)
+                    oldest = next(iter(self.page_cache))
+                del self.page_cache[oldest]
+    
+    def show_page(self, page_index):
+        """Display another page of the current multi-page document, keeping zoom and pan"""
+        image_path = self.paged_path
+        with self.page_cache_lock:
+            page = self.page_cache.get(page_index)
+            if page is not None:
+                self.page_cache.move_to_end(page_index)
+        
+        if page is None:
+            try:
+                page = self.decode_page(image_path, page_index)
+            except Exception as e:
+                self.show_temporary_message(f"Cannot read page {page_index + 1}: {e}", 3000)
+                return
         
-        if not os.path.exists(self.current_folder):
-            messagebox.showerror("Folder Not Found", f"Current folder no longer exists:\n{self.current_folder}")
-            return
+        self.current_page = page_index
+        self.cache_page(page_index, page)
         
-        # Remember current image if any
-        current_image_path = None
-        if self.image_files and 0 <= self.current_index < len(self.image_files):
-            current_image_path = self.image_files[self.current_index]
+        # Pages are never modified in place, so they can be shown without a copy
+        self.original_image = page
+        self.current_image = page
+        self.apply_zoom_and_display()
         
-        # Store old count for comparison
-        old_count = len(self.image_files) if self.image_files else 0
+        if not self.showing_temp_message:
+            self.status_label.config(text=self.get_position_status())
         
-        # Reload the folder
-        self.load_images_from_folder(self.current_folder, auto_display=False)
+        self.prefetch_pages()
+    
+    def get_position_status(self):
+        """Status line for the current image: folder, position, and animation or page indicator"""
+        # Clean and consistent format with folder path
+        folder_name = os.path.basename(self.current_folder) if self.current_folder else "No folder"
+        if self.library_mode and self.current_folder and 0 <= self.current_index < len(self.image_files):
+            # Show where in the tree the image is
+            subfolder = os.path.relpath(os.path.dirname(self.image_files[self.current_index]), self.current_folder)
+            if subfolder != os.curdir:
+                folder_name = os.path.join(folder_name, subfolder)
+        status_text = f"[{folder_name}] Image {self.current_index+1} of {len(self.image_files)}"
+        
+        # Add animation indicator
+        if self.is_animated:
+            frame_count = len(self.gif_frames) if self.gif_frames else 0
+            status_text += f" • Animated GIF ({frame_count} frames)"
+        
+        # Add page indicator for documents
+        if self.is_paged:
+            status_text += f" • Page {self.current_page + 1} of {self.page_count}"
+        return status_text
+    
+    def prefetch_pages(self):
+        """Decode the pages next to the current one in the background"""
+        wanted = [i for i in (self.current_page + 1, self.current_page - 1) if 0 <= i < self.page_count]
+        with self.page_cache_lock:
+            image_path, generation = self.paged_path, self.paged_generation
+            wanted = [i for i in wanted if i not in self.page_cache]
+        if not wanted:
+            return
         
-        # Try to maintain position at the same image
-        if current_image_path and current_image_path in self.image_files:
-            self.current_index = self.image_files.index(current_image_path)
-            self.display_current_image()
-        elif self.image_files:
-            # If current image no longer exists, go to first image
-            self.current_index = 0
-            self.display_current_image()
+        def worker():
+            for page_index in wanted:
+                if self.paged_generation != generation:
+                    return  # Moved on to another image
+                try:
+                    page = self.decode_page(image_path, page_index)
+                except Exception:
+                    continue
+                self.cache_page(page_index, page, generation)  # Checked again under the lock
         
-        # Show refresh status
-        new_count = len(self.image_files) if self.image_files else 0
-        if new_count > old_count:
-            self.status_label.config(text=f"Refreshed! Found {new_count - old_count} new images ({new_count} total)")
-        elif new_count < old_count:
-            self.status_label.config(text=f"Refreshed! {old_count - new_count} images removed ({new_count} total)")
+        threading.Thread(target=worker, daemon=True).start()
+    
+    def next_page(self):
+        """Go to the next page of a multi-page document, or to the next image (PgDn)"""
+        if self.is_paged and self.current_page < self.page_count - 1:
+            self.show_page(self.current_page + 1)
         else:
-            self.status_label.config(text=f"Refreshed! No changes ({new_count} images)")
+            self.next_image()
     
-    def display_current_image(self):
-        """Display the current image on the canvas"""
-        if not self.image_files or self.current_index < 0 or self.current_index >= len(self.image_files):
+    def prev_page(self):
+        """Go to the previous page of a multi-page document, or to the previous image (PgUp)"""
+        if self.is_paged and self.current_page > 0:
+            self.show_page(self.current_page - 1)
+        else:
+            self.prev_image()
+    
+    def handle_unreadable_image(self, image_path):
+        """Force-display a broken image, or drop it from the list and move on"""
+        # Automatically try to force display the corrupted image
+        filename = os.path.basename(self.image_files[self.current_index]) if self.image_files else "unknown"
+        
+        # First attempt: try to force display the corrupted image (unless it isn't an image at all)
+        if self.format_sniffer.verdict(image_path) and self.force_display_corrupted_image(image_path, filename, silent=True):
+            # Successfully displayed corrupted image
             return
         
-        try:
-            # Stop any existing animation
-            self.stop_animation()
-            
-            # Get the current image file
-            image_path = self.image_files[self.current_index]
-            
-            # Validate file path and existence
-            if not os.path.exists(image_path):
-                raise FileNotFoundError(f"File not found: {image_path}")
-            
-            # Check file size and readability
-            try:
-                file_size = os.path.getsize(image_path)
-                if file_size == 0:
-                    raise ValueError(f"File is empty: {image_path}")
-            except OSError as e:
-                raise ValueError(f"Cannot access file: {image_path} - {str(e)}")
+        # If force display also failed, silently skip to next image
+        if len(self.image_files) > 1:
+            # Remove problematic image from the list and skip to next
+            problematic_file = self.image_files[self.current_index]
+            self.image_files.remove(problematic_file)
             
-            # Update the window title with the filename
-            filename = os.path.basename(image_path)
-            self.root.title(f"Image Viewer - {filename}")
+            # Adjust current index if needed
+            if self.current_index >= len(self.image_files):
+                self.current_index = 0
             
-            # Try to load the image with forgiving error handling
-            try:
-                self.original_image = Image.open(image_path)
-                # Don't use verify() as it's too strict - just try to load the image data
-                # This allows partially corrupted images to be displayed
+            # Try to display the next image
+            self.display_current_image()
+            self.show_temporary_message(f"Skipped unreadable image: {filename}", 2000)
+        else:
+            # Only one image in folder - show error in status
+            error_msg = f"Cannot load the only image: {filename}"
+            if not self.showing_temp_message:
+                self.status_label.config(text=error_msg)
+    
+    def start_progressive_load(self, image_path, file_size):
+        """Start reading and decoding a large JPEG/PNG in the background. Returns False if not applicable."""
+        # Header-only probe: decide whether the incremental decoder can handle this file
+        meta = self.probe_image(image_path)
+        if meta is None or meta['format'] not in ('JPEG', 'PNG') or meta['is_animated']:
+            return False  # Let the regular loader produce the error handling
+        
+        # Partial snapshots are downscaled to the screen in the worker, off the UI thread
+        snapshot_size = (self.root.winfo_screenwidth(), self.root.winfo_screenheight())
+        self.start_background_load(self.new_background_load(image_path, file_size), self._progressive_load_worker,
+                                   snapshot_size)
+        return True
+    
+    def new_background_load(self, image_path, file_size):
+        """State shared with a background load worker, polled by poll_progressive_load"""
+        return {
+            'path': image_path,
+            'size': file_size,
+            'bytes_read': 0,
+            'cancel': threading.Event(),
+            'snapshot': None,
+            'image': None,
+            'rendition_size': None,  # Set when the image will be a screen-sized rendition
+            'error': None,
+            'done': False,
+            'started': time.time(),
+            'poll_interval': self.progressive_poll_interval,
+        }
+    
+    def start_background_load(self, load, worker, *args):
+        """Run worker(load, *args) on a thread and poll for its result"""
+        # The previous image is no longer valid for cropping or animation while this one streams in
+        self.original_image = None
+        self.showing_rendition = False
+        self.is_animated = False
+        self.reset_paged_document()
+        self.gif_frames = []
+        self.gif_durations = []
+        self.animation_button.config(state='disabled')
+        
+        self.progressive_load = load
+        threading.Thread(target=worker, args=(load,) + args, daemon=True).start()
+        self.progressive_poll_job = self.root.after(load['poll_interval'], self.poll_progressive_load)
+    
+    def _progressive_load_worker(self, load, snapshot_size):
+        """Background thread: read the file in chunks, publishing partial snapshots, and decode it.
+        
+        Baseline JPEGs and PNGs are fed to the decoder as the data arrives. Progressive JPEGs
+        only produce pixels at the end, so they are previewed from the scans read so far. Any
+        other case (or a Pillow without the incremental decoder's internals) gets a regular
+        decode, still off the UI thread.
+        """
+        try:
+            with open(load['path'], 'rb') as f:
+                image = Image.open(f)
+                if image.format == 'JPEG' and (image.info.get('progressive') or image.info.get('progression')):
+                    self._read_with_previews(load, f, snapshot_size)
+                else:
+                    prepared = open_incremental_decoder(image)
+                    if prepared is not None:
+                        self._feed_incremental_decoder(load, f, image, *prepared, snapshot_size)
+            if load['image'] is None and not load['cancel'].is_set():
+                image = Image.open(load['path'])
+                image.load()
+                load['image'] = image
+        except Exception:
+            if not load['cancel'].is_set():
+                # The incremental decoder gave up - fall back to a regular decode
                 try:
-                    # Try to load the image data to ensure it's at least partially readable
-                    self.original_image.load()
-                except Exception as load_error:
-                    # If load fails, still try to proceed - the image might be partially viewable
-                    print(f"Warning: Image may be partially corrupted: {filename} - {load_error}")
-                    # Re-open the image since load() might have corrupted the state
-                    self.original_image = Image.open(image_path)
-            except Exception as pil_error:
-                # Only fail if we absolutely cannot open the image at all
-                pil_error_str = str(pil_error).replace(image_path, f"'{filename}'")
-                raise ValueError(f"Cannot open image '{filename}': {pil_error_str}. "
-                               f"File size: {file_size} bytes. "
-                               f"This file appears to be completely unreadable.")
-            
-            # Check if this is an animated GIF
-            self.is_animated = getattr(self.original_image, "is_animated", False)
-            
-            if self.is_animated:
-                # Extract all frames for animation
-                self.gif_frames, self.gif_durations = self.extract_gif_frames(self.original_image)
-                self.current_frame = 0
-                
-                if self.gif_frames:
-                    # Use the first frame as the base image
-                    self.current_image = self.gif_frames[0].copy()
+                    image = Image.open(load['path'])
+                    image.load()
+                    load['image'] = image
+                except Exception as e:
+                    load['error'] = e
+        finally:
+            load['done'] = True
+    
+    def _feed_incremental_decoder(self, load, f, image, decoder, offset, snapshot_size):
+        """Decode the file's compressed data chunk by chunk into image, publishing snapshots"""
+        last_snapshot = time.time()
+        pending = b''
+        for chunk in self._read_compressed_stream(f, image.format, offset):
+            if load['cancel'].is_set():
+                decoder.cleanup()
+                return
+            load['bytes_read'] = f.tell()
+            pending += chunk
+            consumed, error = decoder.decode(pending)
+            if consumed < 0:
+                if error < 0:
+                    raise OSError(f"decoder error {error}")
+                break  # End of image
+            pending = pending[consumed:]
+            
+            # Publish a downscaled copy of what has been decoded so far
+            now = time.time()
+            if now - last_snapshot >= self.progressive_snapshot_interval:
+                scale = min(snapshot_size[0] / image.width, snapshot_size[1] / image.height, 1.0)
+                snapshot_dims = (max(1, int(image.width * scale)), max(1, int(image.height * scale)))
+                load['snapshot'] = image.resize(snapshot_dims, Image.Resampling.BILINEAR, reducing_gap=2.0)
+                last_snapshot = now
+        decoder.cleanup()
+        load['image'] = image  # Decoded in place: hand over the buffer itself (tile is empty, so nothing re-reads the file)
+    
+    def _read_with_previews(self, load, f, snapshot_size):
+        """Read a progressive JPEG, publishing a coarse preview of the scans read so far; the
+        full decode then reads the file from the OS cache"""
+        f.seek(0)
+        data = bytearray()
+        last_snapshot = time.time()
+        while not load['cancel'].is_set():
+            chunk = f.read(self.progressive_chunk_size)
+            if not chunk:
+                return
+            data += chunk
+            load['bytes_read'] = len(data)
+            if time.time() - last_snapshot >= self.progressive_snapshot_interval:
+                preview = decode_progressive_preview(data, snapshot_size)
+                if preview is not None:
+                    load['snapshot'] = preview
+                last_snapshot = time.time()  # After decoding, so previews don't run back to back
+    
+    def _read_compressed_stream(self, f, image_format, offset):
+        """Yield the compressed image data of a JPEG or PNG file in chunks"""
+        if image_format == 'JPEG':
+            f.seek(offset)
+            while True:
+                chunk = f.read(self.progressive_chunk_size)
+                if not chunk:
+                    # Let truncated files finish decoding, as Pillow does for JPEG
+                    yield b'\xff\xd9'
+                    return
+                yield chunk
+        else:
+            # PNG: the pixel data is split across IDAT chunks; pass on their payload only
+            f.seek(8)
+            while True:
+                header = f.read(8)
+                if len(header) < 8:
+                    return
+                length, chunk_type = struct.unpack('>I4s', header)
+                if chunk_type == b'IDAT':
+                    remaining = length
+                    while remaining:
+                        data = f.read(min(remaining, self.progressive_chunk_size))
+                        if not data:
+                            return
+                        remaining -= len(data)
+                        yield data
+                    f.seek(4, 1)  # CRC
+                elif chunk_type == b'IEND':
+                    return
                 else:
-                    # Fallback to static display if frame extraction failed
-                    self.is_animated = False
-                    self.current_image = self.original_image.copy()
-            else:
-                # Static image
-                self.current_image = self.original_image.copy()
-                self.gif_frames = []
-                self.gif_durations = []
-            
-            # Load saved zoom and position for this image or use defaults
+                    f.seek(length + 4, 1)
+    
+    def poll_progressive_load(self):
+        """Repaint the partially decoded image and finish the display once the worker is done"""
+        self.progressive_poll_job = None
+        load = self.progressive_load
+        if load is None or load['cancel'].is_set():
+            return
+        
+        if load['done']:
+            self.progressive_load = None
+            if load['image'] is not None:
+                try:
+                    self.last_decode_seconds = load.get('decode_seconds', time.time() - load['started'])
+                    self.show_loaded_image(load['image'], rendition=load['rendition_size'] is not None)
+                    return
+                except Exception:
+                    pass
+            self.handle_unreadable_image(load['path'])
+            return
+        
+        # Show whatever has been decoded since the last poll
+        snapshot = load['snapshot']
+        if snapshot is not None:
+            load['snapshot'] = None
+            self.current_image = snapshot
+            self.gif_painted_frame = None
             self.zoom_level, self.image_offset_x, self.image_offset_y = self.load_saved_zoom_and_position()
-            
-            # Apply zoom and fit to canvas
             self.apply_zoom_and_display()
-            
-            # Save this image as the last viewed image
-            self.save_last_viewed_image()
-            
-            # Update animation button visibility and state
-            if self.is_slideshow:
-                # During slideshow, pause button controls slideshow pause
-                if self.slideshow_paused:
-                    self.animation_button.config(text="▶️ Resume (Space)", bg="#e6ffe6", state='normal')
-                else:
-                    self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='normal')
-            elif self.is_animated and self.gif_frames:
-                self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='normal')
-                self.animate_gif()
-            else:
-                self.animation_button.config(text="⏸️ Pause (Space)", bg=self.default_button_bg, state='disabled')
-            
-            # Update status - clean and consistent format with folder path
-            folder_name = os.path.basename(self.current_folder) if self.current_folder else "No folder"
-            status_text = f"[{folder_name}] Image {self.current_index+1} of {len(self.image_files)}"
-            
-            # Add animation indicator
-            if self.is_animated:
-                frame_count = len(self.gif_frames) if self.gif_frames else 0
-                status_text += f" • Animated GIF ({frame_count} frames)"
-            
-            # Only update status if not showing a temporary message
-            if not self.showing_temp_message:
-                self.status_label.config(text=status_text)
-            
-        except Exception as e:
-            # Automatically try to force display the corrupted image
-            filename = os.path.basename(self.image_files[self.current_index]) if self.image_files else "unknown"
-            
-            # First attempt: try to force display the corrupted image
-            if self.force_display_corrupted_image(image_path, filename, silent=True):
-                # Successfully displayed corrupted image
-                return
-            
-            # If force display also failed, silently skip to next image
-            if len(self.image_files) > 1:
-                # Remove problematic image from the list and skip to next
-                problematic_file = self.image_files[self.current_index]
-                self.image_files.remove(problematic_file)
-                
-                # Adjust current index if needed
-                if self.current_index >= len(self.image_files):
-                    self.current_index = 0
-                
-                # Try to display the next image
-                self.display_current_image()
-                self.show_temporary_message(f"Skipped unreadable image: {filename}", 2000)
+        
+        if not self.showing_temp_message:
+            if load['rendition_size'] is not None:
+                self.status_label.config(text=f"{self.get_position_status()} • Loading...")
             else:
-                # Only one image in folder - show error in status
-                error_msg = f"Cannot load the only image: {filename}"
-                if not self.showing_temp_message:
-                    self.status_label.config(text=error_msg)
+                percent = int(load['bytes_read'] * 100 / max(1, load['size']))
+                self.status_label.config(text=f"Loading {os.path.basename(load['path'])}... {percent}%")
+        
+        self.progressive_poll_job = self.root.after(load['poll_interval'], self.poll_progressive_load)
+    
+    def cancel_progressive_load(self):
+        """Stop a background load, e.g. because the user navigated to another image"""
+        if self.progressive_load is not None:
+            self.progressive_load['cancel'].set()
+            self.progressive_load = None
+        if self.progressive_poll_job:
+            self.root.after_cancel(self.progressive_poll_job)
+            self.progressive_poll_job = None
     
     def show_corrupted_image_dialog(self, filename, error_message):
         """Show custom dialog for handling corrupted images with Skip/Delete/Cancel options"""
@@ -1053,6 +4533,8 @@ class ImageViewer:
             if success:
                 # Set up for display
                 self.is_animated = False
+                self.showing_rendition = False
+                self.reset_paged_document()
                 self.gif_frames = []
                 self.gif_durations = []
                 
@@ -1108,6 +4590,10 @@ class ImageViewer:
             self.root.after(100, self.apply_zoom_and_display)
             return
         
+        # Zooming in past fit-to-window needs more detail than a screen-sized rendition has
+        if self.showing_rendition and self.zoom_level > 1.0:
+            self.ensure_full_resolution()
+        
         # Calculate base size (fit to window)
         img_width, img_height = self.current_image.size
         scale_w = canvas_width / img_width
@@ -1121,38 +4607,28 @@ class ImageViewer:
         
         # Resize image
         if display_width > 0 and display_height > 0:
-            display_image = self.current_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
-            
-            # Handle transparency properly based on selected background
-            if display_image.mode in ('RGBA', 'LA') or (display_image.mode == 'P' and 'transparency' in display_image.info):
-                if self.current_background == "Checkered":
-                    # Create checkered background
-                    background = self.create_checkered_image(display_image.size)
-                else:
-                    # Create solid color background
-                    bg_color = self.background_options[self.current_background]
-                    # Convert hex color to RGB tuple
-                    bg_rgb = tuple(int(bg_color[i:i+2], 16) for i in (1, 3, 5))
-                    background = Image.new('RGB', display_image.size, bg_rgb)
-                
-                if display_image.mode == 'P':
-                    display_image = display_image.convert('RGBA')
-                background.paste(display_image, mask=display_image.split()[-1] if display_image.mode in ('RGBA', 'LA') else None)
-                display_image = background
-            elif display_image.mode != 'RGB':
-                # Convert other modes to RGB for consistent display
-                display_image = display_image.convert('RGB')
-                
-            self.current_photo = ImageTk.PhotoImage(display_image)
-            
-            # Clear canvas and display image
-            self.canvas.delete("all")
-            
             # Calculate position with panning offset
             base_x = (canvas_width - display_width) // 2
             base_y = (canvas_height - display_height) // 2
             x = base_x + self.image_offset_x
             y = base_y + self.image_offset_y
+            photo_x, photo_y = x, y
+            
+            if self.current_image.mode in HIGH_BIT_DEPTH_MODES:
+                # High bit depth: window only the part of the image that is visible on the canvas
+                display_image, photo_x, photo_y = self.tone_map_viewport(
+                    x, y, display_width, display_height, canvas_width, canvas_height)
+            else:
+                display_image = self.current_image.resize((display_width, display_height), Image.Resampling.LANCZOS)
+                
+                # Handle transparency properly based on selected background
+                self.display_background = None
+                display_image = self.compose_on_background(display_image)
+            
+            self.current_photo = ImageTk.PhotoImage(display_image) if display_image else None
+            
+            # Clear canvas and display image
+            self.canvas.delete("all")
             
             # Create a subtle border around the image to show boundaries (if enabled)
             if self.show_image_border:
@@ -1171,13 +4647,153 @@ class ImageViewer:
                     outline=border_color, width=1, fill=""
                 )
             
-            self.canvas.create_image(x, y, anchor=tk.NW, image=self.current_photo)
+            if self.current_photo:
+                self.canvas.create_image(photo_x, photo_y, anchor=tk.NW, image=self.current_photo)
             
             # Store image position for cropping and panning
             self.image_x = x
             self.image_y = y
             self.image_width = display_width
             self.image_height = display_height
+            
+            # Remember how this render was made so animation frames can patch it in place
+            self.display_scale = (display_width / img_width, display_height / img_height)
+            self.display_signature = self.get_display_signature()
+            
+            if self.show_info_overlay:
+                self.draw_info_overlay()
+    
+    def compute_tone_stats(self, image):
+        """Compute the display window (low, high) for each tone mode from a downsampled view of the image"""
+        if np is not None:
+            # Sample a small nearest-neighbour copy: only it is converted to an array, never the
+            # full-resolution data
+            step = max(1, math.ceil(max(image.size) / self.tone_stats_size))
+            if step > 1:
+                image = image.resize((max(1, image.width // step), max(1, image.height // step)),
+                                     Image.Resampling.NEAREST)
+            sample = np.asarray(image).astype(np.float64)
+            sample = sample[np.isfinite(sample)]
+            if sample.size == 0:
+                return {mode: (0.0, 1.0) for mode in self.tone_modes}
+            low, high = np.percentile(sample, [0.5, 99.5])
+            return {"Percentile": (float(low), float(high)),
+                    "Min/Max": (float(sample.min()), float(sample.max()))}
+        
+        # Without NumPy only the extrema are available
+        low, high = image.getextrema()
+        return {mode: (float(low), float(high)) for mode in self.tone_modes}
+    
+    def tone_map_viewport(self, x, y, display_width, display_height, canvas_width, canvas_height):
+        """Resize and window the visible part of a high-bit-depth image to 8 bits.
+        
+        Returns (image, canvas_x, canvas_y) for the visible region, or (None, x, y) if nothing is visible.
+        """
+        image = self.current_image
+        if self.tone_stats_image is not image:
+            self.tone_stats = self.compute_tone_stats(image)
+            self.tone_stats_image = image
+            self.tone_viewport = None
+        
+        # Part of the display rectangle that lies on the canvas
+        visible_x1, visible_y1 = max(0, -x), max(0, -y)
+        visible_x2 = min(display_width, canvas_width - x)
+        visible_y2 = min(display_height, canvas_height - y)
+        if visible_x2 <= visible_x1 or visible_y2 <= visible_y1:
+            return None, x, y
+        
+        # Resample only that region; keep it so window changes don't touch the source again
+        key = (id(image), display_width, display_height, visible_x1, visible_y1, visible_x2, visible_y2)
+        if self.tone_viewport is None or self.tone_viewport[0] != key:
+            scale_x = image.width / display_width
+            scale_y = image.height / display_height
+            source_box = (visible_x1 * scale_x, visible_y1 * scale_y, visible_x2 * scale_x, visible_y2 * scale_y)
+            region_size = (visible_x2 - visible_x1, visible_y2 - visible_y1)
+            try:
+                region = image.resize(region_size, Image.Resampling.LANCZOS, box=source_box)
+            except ValueError:
+                # Older Pillow versions only resample some 16-bit modes after conversion
+                region = image.convert('F').resize(region_size, Image.Resampling.LANCZOS, box=source_box)
+            self.tone_viewport = (key, region)
+        region = self.tone_viewport[1]
+        
+        low, high = self.tone_stats[self.tone_mode]
+        center = (low + high) / 2
+        half_width = max((high - low) / 2 * self.tone_contrast, 1e-12)
+        low, high = center - half_width, center + half_width
+        
+        if np is not None:
+            values = np.asarray(region, dtype=np.float32)
+            values = np.clip((values - low) / (high - low), 0.0, 1.0)
+            if self.tone_gamma != 1.0:
+                values **= 1.0 / self.tone_gamma
+            display_image = Image.fromarray((values * 255.0 + 0.5).astype(np.uint8), 'L')
+        else:
+            # Linear window with Pillow's point() - gamma needs NumPy
+            scale = 255.0 / (high - low)
+            display_image = region.convert('F').point(lambda v: v * scale - low * scale).convert('L')
+        
+        return display_image, x + visible_x1, y + visible_y1
+    
+    def cycle_tone_mode(self):
+        """Switch the display window of 16-bit/float images between percentile and min/max (K)"""
+        index = self.tone_modes.index(self.tone_mode)
+        self.tone_mode = self.tone_modes[(index + 1) % len(self.tone_modes)]
+        self.tone_contrast = 1.0
+        self.apply_tone_change()
+    
+    def adjust_tone(self, gamma=0.0, contrast=1.0):
+        """Adjust gamma ([ / ]) or window width (, / .) of 16-bit/float images"""
+        self.tone_gamma = min(5.0, max(0.1, round(self.tone_gamma + gamma, 2)))
+        self.tone_contrast = min(10.0, max(0.01, self.tone_contrast * contrast))
+        self.apply_tone_change()
+    
+    def apply_tone_change(self):
+        """Re-render a high-bit-depth image after a window change"""
+        if not self.current_image or self.current_image.mode not in HIGH_BIT_DEPTH_MODES:
+            self.show_temporary_message("Tone controls apply to 16-bit and floating-point images", 1500)
+            return
+        self.apply_zoom_and_display()
+        self.show_temporary_message(
+            f"Window: {self.tone_mode} • Contrast ×{1 / self.tone_contrast:.2f} • Gamma {self.tone_gamma:.1f}", 1500)
+    
+    def get_display_signature(self):
+        """Return the view state that determines how the current image is laid out on the canvas"""
+        return (self.canvas.winfo_width(), self.canvas.winfo_height(),
+                self.current_image.size if self.current_image else None,
+                self.zoom_level, self.image_offset_x, self.image_offset_y,
+                self.current_background, self.show_image_border)
+    
+    def compose_on_background(self, display_image, offset=None):
+        """Flatten a resized image onto the selected background and return an RGB image.
+        
+        With an offset, display_image is a region of the last full render and reuses its background.
+        """
+        if display_image.mode in ('RGBA', 'LA') or (display_image.mode == 'P' and 'transparency' in display_image.info):
+            if offset is not None and self.display_background is not None:
+                # Cut the matching piece out of the background used for the full render
+                x, y = offset
+                background = self.display_background.crop((x, y, x + display_image.width, y + display_image.height))
+            elif self.current_background == "Checkered":
+                # Create checkered background
+                background = self.create_checkered_image(display_image.size)
+                self.display_background = background.copy() if self.is_animated else None
+            else:
+                # Create solid color background
+                bg_color = self.background_options[self.current_background]
+                # Convert hex color to RGB tuple
+                bg_rgb = tuple(int(bg_color[i:i+2], 16) for i in (1, 3, 5))
+                background = Image.new('RGB', display_image.size, bg_rgb)
+                self.display_background = background.copy() if self.is_animated else None
+            
+            if display_image.mode == 'P':
+                display_image = display_image.convert('RGBA')
+            background.paste(display_image, mask=display_image.split()[-1] if display_image.mode in ('RGBA', 'LA') else None)
+            display_image = background
+        elif display_image.mode != 'RGB':
+            # Convert other modes to RGB for consistent display
+            display_image = display_image.convert('RGB')
+        return display_image
     
     def next_image(self):
         """Navigate to the next image"""
@@ -1246,16 +4862,138 @@ class ImageViewer:
         self.current_index = len(self.image_files) - 1
         self.display_current_image()
     
+    def jump_to(self, index):
+        """Navigate straight to a list position"""
+        if not self.image_files:
+            return
+        index = max(0, min(index, len(self.image_files) - 1))
+        if index == self.current_index:
+            return
+        self.current_index = index
+        self.display_current_image()
+        # Warm up around the new position, so browsing on from there is quick too
+        self.start_warmup(index)
+    
+    def show_jump_dialog(self):
+        """Jump to an image number or percentage, or scrub through the list with a position bar (J)"""
+        if not self.image_files:
+            self.show_temporary_message("No images loaded", 1500)
+            return
+        if self.jump_window is not None:
+            self.jump_window.lift()
+            return
+        
+        count = len(self.image_files)
+        window = tk.Toplevel(self.root)
+        window.title("Jump to Image")
+        window.transient(self.root)
+        self.jump_window = window
+        
+        frame = tk.Frame(window)
+        frame.pack(fill=tk.BOTH, expand=True, padx=15, pady=10)
+        self.jump_prompt = tk.Label(frame, text=f"Image number (1-{count}) or percentage (e.g. 75%):")
+        self.jump_prompt.pack(anchor=tk.W)
+        entry = tk.Entry(frame, width=20)
+        entry.pack(anchor=tk.W, pady=(2, 10))
+        entry.focus_set()
+        
+        # Position bar: dragging previews the target and decodes it; releasing jumps there, and so
+        # does resting on a position reached with the keyboard
+        self.scrub_label = tk.Label(frame, text="", anchor=tk.W)
+        scale = self.jump_scale = tk.Scale(frame, from_=1, to=count, orient=tk.HORIZONTAL, length=500, showvalue=False)
+        start = max(1, self.current_index + 1)
+        scale.set(start)
+        scale.config(command=self.on_scrub)  # After the initial value, which on_scrub also ignores
+        scale.pack(fill=tk.X)
+        self.scrub_label.pack(fill=tk.X, pady=(2, 0))
+        self.on_scrub(start)  # Only labels the current image
+        
+        def close(event=None):
+            if self.scrub_job:
+                self.root.after_cancel(self.scrub_job)
+                self.scrub_job = None
+            if self.scrub_jump_job:
+                self.root.after_cancel(self.scrub_jump_job)
+                self.scrub_jump_job = None
+            self.scrub_index = None
+            window.destroy()
+            self.jump_window = None
+            self.jump_scale = None
+            self.jump_prompt = None
+        
+        def on_enter(event=None):
+            index = parse_jump_position(entry.get(), len(self.image_files))
+            if index is None:
+                self.scrub_label.config(text="Enter an image number or a percentage")
+                return
+            close()
+            self.jump_to(index)
+        
+        def on_key_release(event):
+            # Held arrow keys repeat: jump once the position has rested for a moment
+            if self.scrub_jump_job:
+                self.root.after_cancel(self.scrub_jump_job)
+            self.scrub_jump_job = self.root.after(self.scrub_prefetch_delay, jump_to_scale)
+        
+        def jump_to_scale():
+            self.scrub_jump_job = None
+            self.jump_to(int(scale.get()) - 1)
+        
+        scale.bind("<ButtonRelease-1>", lambda e: self.jump_to(int(scale.get()) - 1))
+        for key in ("Left", "Right", "Up", "Down", "Home", "End"):
+            scale.bind(f"<KeyRelease-{key}>", on_key_release)
+        entry.bind("<Return>", on_enter)
+        window.bind("<Escape>", close)
+        window.protocol("WM_DELETE_WINDOW", close)
+    
+    def update_jump_range(self):
+        """Let the position bar and prompt of an open jump dialog cover the images listed now"""
+        if self.jump_window is None or not self.image_files:
+            return
+        count = len(self.image_files)
+        self.jump_scale.config(to=count)
+        self.jump_prompt.config(text=f"Image number (1-{count}) or percentage (e.g. 75%):")
+    
+    def on_scrub(self, value):
+        """Show which image is under the position bar and schedule its decode (throttled)"""
+        if not self.image_files:
+            return
+        index = max(0, min(int(float(value)) - 1, len(self.image_files) - 1))
+        self.scrub_label.config(text=f"Image {index + 1} of {len(self.image_files)}: "
+                                     f"{os.path.basename(self.image_files[index])}")
+        if self.scrub_index is None and index == self.current_index:
+            # The bar's initial position (Tk reports it when idle): keep the current warm-up going
+            return
+        self.scrub_index = index
+        if self.scrub_job is None:
+            self.scrub_job = self.root.after(self.scrub_prefetch_delay, self.prefetch_scrub_position)
+    
+    def prefetch_scrub_position(self):
+        """Decode the images around the position the scrubber is on now"""
+        self.scrub_job = None
+        index = self.scrub_index
+        if index is None or not 0 <= index < len(self.image_files):
+            return
+        # Drop decodes queued for positions the scrubber has already passed
+        self.background_decoder.cancel()
+        self.background_decoder.submit(self.image_files[index], priority=0)
+        for distance in range(1, self.scrub_prefetch_radius + 1):
+            for neighbour in (index + distance, index - distance):
+                if 0 <= neighbour < len(self.image_files):
+                    self.background_decoder.submit(self.image_files[neighbour], priority=distance)
+    
     def random_image(self):
         """Navigate to a random image"""
         if not self.image_files or len(self.image_files) <= 1:
             return
         
-        # Get a random index that's different from current
-        available_indices = [i for i in range(len(self.image_files)) if i != self.current_index]
-        if available_indices:
-            self.current_index = random.choice(available_indices)
-            self.display_current_image()
+        # Get a random index that's different from current, without building a list of every
+        # index (a library can hold hundreds of thousands of images)
+        index = random.randrange(len(self.image_files) - 1)
+        if index >= self.current_index >= 0:
+            index += 1
+        self.current_index = index
+        self.display_current_image()
     
     def toggle_random(self):
         """Toggle random mode on/off"""
@@ -1351,7 +5089,7 @@ class ImageViewer:
             if result.returncode == 0:
                 # Reload the folder to update the file list
                 old_count = len(self.image_files)
-                self.load_images_from_folder(current_folder, auto_display=False)
+                self.load_images_from_folder(current_folder, auto_display=False, streaming=False)
                 new_count = len(self.image_files)
                 removed_count = old_count - new_count
                 
@@ -1628,9 +5366,8 @@ class ImageViewer:
             # Create the duplicate
             shutil.copy2(current_image, duplicate_path)
             
-            # Add the new duplicate to the file list and sort
-            self.image_files.append(duplicate_path)
-            self.image_files.sort()
+            # Add the new duplicate to the file list in sort order
+            self.insert_image_file(duplicate_path)
             
             # Update status and show temporary success message
             success_msg = f"✓ Duplicated as '{duplicate_name}'"
@@ -1711,15 +5448,9 @@ class ImageViewer:
         
         try:
             # Get all files in the folder (not just image files we loaded)
-            all_files = []
-            all_dirs = []
-            
-            for item in os.listdir(folder_path):
-                item_path = os.path.join(folder_path, item)
-                if os.path.isfile(item_path):
-                    all_files.append(item)
-                elif os.path.isdir(item_path):
-                    all_dirs.append(item)
+            file_entries, dir_entries = scan_directory(folder_path)
+            all_files = [entry.name for entry in file_entries]
+            all_dirs = [entry.name for entry in dir_entries]
             
             # Check if there are any subdirectories
             if all_dirs:
@@ -1729,7 +5460,6 @@ class ImageViewer:
                 return
             
             # Check if there are any non-image files
-            image_extensions = {'.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.webp', '.ico', '.enc'}
             safe_text_files = {'.nfo', '.txt'}  # Additional safe files to allow deletion
             non_image_files = []
             
@@ -1740,7 +5470,7 @@ class ImageViewer:
                 
                 file_ext = os.path.splitext(file.lower())[1]
                 # Allow deletion if it's an image file or a safe text file
-                if file_ext not in image_extensions and file_ext not in safe_text_files:
+                if not file.lower().endswith(IMAGE_EXTENSIONS) and file_ext not in safe_text_files:
                     non_image_files.append(file)
             
             if non_image_files:
@@ -1783,7 +5513,7 @@ class ImageViewer:
             shutil.rmtree(folder_path)
             
             # Clear the current state
-            self.image_files = []
+            self.image_files = ImageList()
             self.current_index = -1
             self.current_folder = None
             self.canvas.delete("all")
@@ -1808,15 +5538,8 @@ class ImageViewer:
     def find_next_folder_with_images(self, parent_dir, deleted_folder_name):
         """Find the next folder in the parent directory that contains images"""
         try:
-            # Get all subdirectories in the parent directory
-            all_dirs = []
-            for item in os.listdir(parent_dir):
-                item_path = os.path.join(parent_dir, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    all_dirs.append(item)
-            
-            # Sort directories
-            all_dirs.sort()
+            # Get all subdirectories in the parent directory, sorted
+            all_dirs = self.folder_index.subfolders(parent_dir)
             
             # Find where the deleted folder would have been (it's already deleted)
             deleted_index = -1
@@ -1829,70 +5552,37 @@ class ImageViewer:
             if deleted_index == -1:
                 deleted_index = len(all_dirs)
             
-            # Check folders starting from where the deleted folder would have been
-            image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-            
-            # First, try folders after the deleted one
-            for i in range(deleted_index + 1, len(all_dirs)):
-                folder_path = os.path.join(parent_dir, all_dirs[i])
-                if self.folder_has_images(folder_path, image_extensions):
-                    return folder_path
-            
-            # Then, try folders before the deleted one
-            for i in range(0, deleted_index):
-                folder_path = os.path.join(parent_dir, all_dirs[i])
-                if self.folder_has_images(folder_path, image_extensions):
-                    return folder_path
-            
-            return None
+            # Check folders starting from where the deleted folder would have been:
+            # first, try folders after the deleted one, then the folders before it
+            candidates = all_dirs[deleted_index + 1:] + all_dirs[:max(0, deleted_index)]
+            return self.folder_index.first_with_images([os.path.join(parent_dir, name) for name in candidates])
             
         except Exception:
             return None
     
-    def folder_has_images(self, folder_path, image_extensions):
+    def folder_has_images(self, folder_path, image_extensions=IMAGE_EXTENSIONS):
         """Check if a folder contains any image files"""
-        try:
-            for file in os.listdir(folder_path):
-                if (os.path.isfile(os.path.join(folder_path, file)) and 
-                    not file.startswith('.') and 
-                    file.lower().endswith(image_extensions)):
-                    return True
-            return False
-        except Exception:
-            return False
+        if image_extensions == IMAGE_EXTENSIONS:
+            # Answered by the folder index from one stat when the folder hasn't changed
+            return self.folder_index.has_images(folder_path)
+        # Stop at the first image instead of listing the whole folder
+        return folder_contains_image(folder_path, image_extensions)
     
     def get_subfolders_with_images(self, folder_path):
         """Get all subfolders in the given folder that contain images, sorted alphabetically"""
         try:
-            subfolders_with_images = []
-            image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-            
-            # Get all subdirectories
-            for item in os.listdir(folder_path):
-                item_path = os.path.join(folder_path, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    if self.folder_has_images(item_path, image_extensions):
-                        subfolders_with_images.append(item_path)
-            
-            # Sort alphabetically by folder name
-            subfolders_with_images.sort(key=lambda x: os.path.basename(x))
-            return subfolders_with_images
-            
+            # Subdirectories come back sorted alphabetically by folder name, and are checked in parallel
+            return self.folder_index.with_images([os.path.join(folder_path, name)
+                                                  for name in self.folder_index.subfolders(folder_path)])
         except Exception:
             return []
 
-    def find_next_sibling_folder(self, parent_dir, current_folder_name, direction='next'):
-        """Find the next or previous sibling folder with images in the parent directory"""
+    def find_next_sibling_folder(self, parent_dir, current_folder_name, direction='next', visited=None):
+        """Find the next or previous sibling folder with images in the parent directory
+        (visited: see FolderIndex.first_with_images)"""
         try:
-            # Get all subdirectories in the parent directory
-            all_dirs = []
-            for item in os.listdir(parent_dir):
-                item_path = os.path.join(parent_dir, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    all_dirs.append(item)
-            
-            # Sort directories alphabetically
-            all_dirs.sort()
+            # Get all subdirectories in the parent directory, sorted alphabetically
+            all_dirs = self.folder_index.subfolders(parent_dir)
             
             # Find the index of the current folder
             try:
@@ -1900,114 +5590,158 @@ class ImageViewer:
             except ValueError:
                 return None  # Current folder not found in parent directory
             
-            # Check for image extensions
-            image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-            
             if direction == 'next':
                 # Look for next folder with images
-                for i in range(current_index + 1, len(all_dirs)):
-                    folder_path = os.path.join(parent_dir, all_dirs[i])
-                    if self.folder_has_images(folder_path, image_extensions):
-                        return folder_path
-                # No next folder found
-                return None
-            
+                candidates = all_dirs[current_index + 1:]
             elif direction == 'prev':
                 # Look for previous folder with images
-                for i in range(current_index - 1, -1, -1):
-                    folder_path = os.path.join(parent_dir, all_dirs[i])
-                    if self.folder_has_images(folder_path, image_extensions):
-                        return folder_path
-                # No previous folder found
+                candidates = all_dirs[current_index - 1::-1] if current_index > 0 else []
+            else:
                 return None
-            
-            return None
+            return self.folder_index.first_with_images([os.path.join(parent_dir, name) for name in candidates],
+                                                       visited)
             
         except Exception:
             return None
     
-    def next_folder(self):
-        """Navigate to the next folder with images"""
+    def resolve_folder_move(self, folder_path, direction, visited=None):
+        """Where Ctrl+Right ('next') or Ctrl+Left ('prev') leads from a folder, without loading it.
+        
+        Returns (target folder or None, status message). Safe to call from worker threads.
+        visited, if given, gets (folder, mtime) for every folder the answer depends on.
+        """
+        arrow = "→" if direction == 'next' else "←"
+        
+        # If we're in a parent directory with subfolders with images, go to its first (or last) one;
+        # only as many subfolders are checked as needed to find it
+        if visited is not None:
+            # Their listings decide which subfolders and siblings are candidates
+            visited.extend((path, folder_mtime(path)) for path in (folder_path, os.path.dirname(folder_path)))
+        subfolders = [os.path.join(folder_path, name) for name in self.folder_index.subfolders(folder_path)]
+        target = self.folder_index.first_with_images(subfolders if direction == 'next' else subfolders[::-1],
+                                                     visited)
+        if target:
+            return target, f"{arrow} Moved to subfolder: {os.path.basename(target)}"
+        
+        # We're in a subfolder, navigate to sibling folders or back to parent
+        parent_dir = os.path.dirname(folder_path)
+        sibling = self.find_next_sibling_folder(parent_dir, os.path.basename(folder_path), direction, visited)
+        if sibling:
+            return sibling, f"{arrow} Moved to folder: {os.path.basename(sibling)}"
+        
+        # No more sibling subfolders, check if parent has images and return to it
+        if self.folder_has_images(parent_dir):
+            return parent_dir, f"{arrow} Returned to parent folder: {os.path.basename(parent_dir)}"
+        if direction == 'next':
+            return None, "No more folders with images found"
+        return None, "No previous folders with images found"
+    
+    def move_to_folder(self, direction):
+        """Load the next or previous folder with images, using the look-ahead's work when it's ready"""
         if not self.current_folder:
             messagebox.showwarning("No Folder", "No folder is currently loaded.")
             return
         
-        # Check if current folder has subfolders with images
-        subfolders = self.get_subfolders_with_images(self.current_folder)
-        
-        if subfolders:
-            # If we're in a parent directory with subfolders, go to first subfolder
-            self.load_images_from_folder(subfolders[0])
-            folder_name = os.path.basename(subfolders[0])
-            self.show_temporary_message(f"→ Moved to subfolder: {folder_name}", 2000)
+        prepared = self.take_folder_lookahead(direction)
+        if prepared is not None:
+            # Already resolved and listed, and its first image is (being) decoded
+            target, message = prepared['target'], prepared['message']
+            self.load_images_from_folder(target, streaming=False, image_files=prepared['files'])
         else:
-            # We're in a subfolder, navigate to sibling folders or back to parent
-            parent_dir = os.path.dirname(self.current_folder)
-            current_folder_name = os.path.basename(self.current_folder)
-            
-            next_folder = self.find_next_sibling_folder(parent_dir, current_folder_name, direction='next')
-            if next_folder:
-                # Found next sibling subfolder
-                self.load_images_from_folder(next_folder)
-                folder_name = os.path.basename(next_folder)
-                self.show_temporary_message(f"→ Moved to folder: {folder_name}", 2000)
-            else:
-                # No more sibling subfolders, check if parent has images and return to it
-                image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-                if self.folder_has_images(parent_dir, image_extensions):
-                    self.load_images_from_folder(parent_dir)
-                    folder_name = os.path.basename(parent_dir)
-                    self.show_temporary_message(f"→ Returned to parent folder: {folder_name}", 2000)
-                else:
-                    self.show_temporary_message("No more folders with images found", 2000)
+            target, message = self.resolve_folder_move(self.current_folder, direction)
+            if target:
+                self.load_images_from_folder(target)
+        self.show_temporary_message(message, 2000)
+    
+    def next_folder(self):
+        """Navigate to the next folder with images"""
+        self.move_to_folder('next')
     
     def prev_folder(self):
         """Navigate to the previous folder with images"""
-        if not self.current_folder:
-            messagebox.showwarning("No Folder", "No folder is currently loaded.")
-            return
-        
-        # Check if current folder has subfolders with images
-        subfolders = self.get_subfolders_with_images(self.current_folder)
+        self.move_to_folder('prev')
+    
+    def schedule_folder_lookahead(self):
+        """Prepare the neighbouring folders shortly after a folder has loaded"""
+        self.cancel_folder_lookahead()
+        if self.current_folder and not self.library_mode:
+            self.folder_lookahead_job = self.root.after(self.folder_lookahead_delay, self.start_folder_lookahead)
+    
+    def start_folder_lookahead(self):
+        """Resolve, list and pre-decode the folders Ctrl+Right and Ctrl+Left lead to, on a worker thread"""
+        self.folder_lookahead_job = None
+        origin = self.current_folder
+        cancel = threading.Event()
+        for direction in ('next', 'prev'):
+            self.folder_lookahead[direction] = {
+                'origin': origin,
+                'direction': direction,
+                'sort_mode': self.sort_mode,
+                'cancel': cancel,
+                'ready': False,
+            }
+        moves = [self.folder_lookahead['next'], self.folder_lookahead['prev']]
+        threading.Thread(target=self._folder_lookahead_worker, args=(moves, cancel), daemon=True).start()
+    
+    def _folder_lookahead_worker(self, moves, cancel):
+        # Only use idle CPU time (Linux: per-thread nice)
+        try:
+            os.setpriority(os.PRIO_PROCESS, threading.get_native_id(), 19)
+        except (AttributeError, OSError):
+            pass
         
-        if subfolders:
-            # If we're in a parent directory with subfolders, go to last subfolder
-            self.load_images_from_folder(subfolders[-1])
-            folder_name = os.path.basename(subfolders[-1])
-            self.show_temporary_message(f"← Moved to subfolder: {folder_name}", 2000)
-        else:
-            # We're in a subfolder, navigate to sibling folders or back to parent
-            parent_dir = os.path.dirname(self.current_folder)
-            current_folder_name = os.path.basename(self.current_folder)
-            
-            prev_folder = self.find_next_sibling_folder(parent_dir, current_folder_name, direction='prev')
-            if prev_folder:
-                # Found previous sibling subfolder
-                self.load_images_from_folder(prev_folder)
-                folder_name = os.path.basename(prev_folder)
-                self.show_temporary_message(f"← Moved to folder: {folder_name}", 2000)
-            else:
-                # No more sibling subfolders, check if parent has images and return to it
-                image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-                if self.folder_has_images(parent_dir, image_extensions):
-                    self.load_images_from_folder(parent_dir)
-                    folder_name = os.path.basename(parent_dir)
-                    self.show_temporary_message(f"← Returned to parent folder: {folder_name}", 2000)
-                else:
-                    self.show_temporary_message("No previous folders with images found", 2000)
+        for move in moves:
+            if cancel.is_set():
+                return
+            try:
+                # Every folder the move depends on (the origin, its parent and each folder checked
+                # for images, skipped ones included), with its mtime when it was read; a change in
+                # any of them makes the move stale
+                watched = []
+                target, message = self.resolve_folder_move(move['origin'], move['direction'], watched)
+                if target is None or cancel.is_set():
+                    continue
+                files = list_image_files(target, self.format_sniffer)
+                if move['sort_mode'] != 'name':
+                    files.sort_by(move['sort_mode'], self.sort_keys.value)
+                if not files:
+                    continue
+                move.update(target=target, message=message, files=files, watched=watched)
+                move['ready'] = True
+                
+                # Decode the image the folder will open on: the last viewed one, or the first
+                resume = self.last_viewed_image if self.last_viewed_image in files else files[0]
+                # (a move that has been taken keeps decoding although the look-ahead is cancelled)
+                self.prefetch_image(resume, is_cancelled=lambda: cancel.is_set() and not move.get('taken'))
+            except Exception as e:
+                print(f"Folder look-ahead failed: {e}")
+    
+    def take_folder_lookahead(self, direction):
+        """The prepared move in a direction, if it's ready and still valid"""
+        move = self.folder_lookahead.get(direction)
+        if move is None or not move['ready']:
+            return None
+        if move['origin'] != self.current_folder or move['sort_mode'] != self.sort_mode or self.library_mode:
+            return None
+        if any(folder_mtime(path) != mtime for path, mtime in move['watched']):
+            return None
+        move['taken'] = True
+        return move
+    
+    def cancel_folder_lookahead(self):
+        """Drop the prepared moves, e.g. because another folder is being loaded"""
+        for move in self.folder_lookahead.values():
+            move['cancel'].set()
+        self.folder_lookahead = {}
+        if self.folder_lookahead_job:
+            self.root.after_cancel(self.folder_lookahead_job)
+            self.folder_lookahead_job = None
     
     def find_prev_folder_with_images(self, parent_dir, current_folder_name):
         """Find the previous folder in the parent directory that contains images"""
         try:
-            # Get all subdirectories in the parent directory
-            all_dirs = []
-            for item in os.listdir(parent_dir):
-                item_path = os.path.join(parent_dir, item)
-                if os.path.isdir(item_path) and not item.startswith('.'):
-                    all_dirs.append(item)
-            
-            # Sort directories
-            all_dirs.sort()
+            # Get all subdirectories in the parent directory, sorted
+            all_dirs = self.folder_index.subfolders(parent_dir)
             
             # Find the position of the current folder
             current_index = -1
@@ -2019,22 +5753,10 @@ class ImageViewer:
             if current_index == -1:
                 return None
             
-            # Check folders starting from the previous one
-            image_extensions = ('.jpg', '.jpeg', '.png', '.gif', '.bmp', '.tiff', '.tif', '.webp', '.ico', '.enc')
-            
-            # Try folders before the current one (going backwards)
-            for i in range(current_index - 1, -1, -1):
-                folder_path = os.path.join(parent_dir, all_dirs[i])
-                if self.folder_has_images(folder_path, image_extensions):
-                    return folder_path
-            
-            # Then, wrap around and try folders after the current one (from the end)
-            for i in range(len(all_dirs) - 1, current_index, -1):
-                folder_path = os.path.join(parent_dir, all_dirs[i])
-                if self.folder_has_images(folder_path, image_extensions):
-                    return folder_path
-            
-            return None
+            # Check folders starting from the previous one, going backwards, then wrap around
+            # and try folders after the current one (from the end)
+            candidates = all_dirs[:current_index][::-1] + all_dirs[current_index + 1:][::-1]
+            return self.folder_index.first_with_images([os.path.join(parent_dir, name) for name in candidates])
             
         except Exception:
             return None
@@ -2170,6 +5892,12 @@ class ImageViewer:
         if not self.is_cropping or not self.current_image or self.crop_start_x is None:
             return
         
+        # Crop from the full-resolution image, not the screen-sized rendition
+        self.ensure_full_resolution()
+        if self.original_image is None:
+            self.status_label.config(text="Image is still loading - try cropping again in a moment")
+            return
+        
         # Store end coordinates
         self.crop_end_x = event.x
         self.crop_end_y = event.y
@@ -2245,20 +5973,14 @@ class ImageViewer:
             cropped_image.save(cropped_path)
             self.status_label.config(text=f"Cropped image saved as: {cropped_filename}")
             
-            # Ask if user wants to reload folder to see new image
-            if messagebox.askyesno("Reload Folder", "Reload folder to include the new cropped image?"):
-                current_folder = os.path.dirname(self.image_files[self.current_index])
-                self.load_images_from_folder(current_folder)
-                
-                # Navigate to the newly created cropped image
-                try:
-                    new_image_index = self.image_files.index(cropped_path)
-                    self.current_index = new_image_index
-                    self.display_current_image()
-                    self.status_label.config(text=f"Now viewing cropped image: {cropped_filename}")
-                except ValueError:
-                    # If for some reason the new image isn't found, just stay on current image
-                    self.status_label.config(text=f"Cropped image saved but not found in list: {cropped_filename}")
+            # Add the new image to the file list in sort order
+            new_image_index = self.insert_image_file(cropped_path)
+            
+            # Ask if user wants to view the new image
+            if messagebox.askyesno("Show Cropped Image", "View the new cropped image now?"):
+                self.current_index = new_image_index
+                self.display_current_image()
+                self.status_label.config(text=f"Now viewing cropped image: {cropped_filename}")
                 
         except Exception as e:
             messagebox.showerror("Save Error", f"Could not save cropped image: {str(e)}")
@@ -2465,14 +6187,37 @@ class ImageViewer:
         if self.is_slideshow:
             self.stop_slideshow()
         
-        # Stop any GIF animation
+        # Stop any GIF animation and background image load
         self.stop_animation()
+        self.cancel_progressive_load()
+        self.cancel_folder_scan()
+        self.cancel_folder_lookahead()
+        
+        # Persist probed image metadata
+        self.save_metadata_cache()
+        self.format_sniffer.save()
+        self.folder_index.close()
+        
+        # Stop decode worker processes
+        self.background_decoder.cancel()
+        if self.decode_pool is not None:
+            self.decode_pool.shutdown(wait=False, cancel_futures=True)
         
         # Clean up and close
         self.root.destroy()
 
 # Main function to start the application
 def main():
+    # python image_viewer.py --benchmark-decoders FOLDER: compare the installed decoder backends
+    if len(sys.argv) > 2 and sys.argv[1] == "--benchmark-decoders":
+        benchmark_decoders(list_image_files(sys.argv[2]))
+        return
+    
+    # python image_viewer.py --benchmark-memory [COUNT]: image list memory use for COUNT paths
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark-memory":
+        benchmark_image_lists(int(sys.argv[2]) if len(sys.argv) > 2 else 1000000)
+        return
+    
     root = tk.Tk()
     app = ImageViewer(root)
     
@@ -2482,7 +6227,7 @@ def main():
         if os.path.isfile(file_path):
             # Load the folder containing this file
             folder_path = os.path.dirname(os.path.abspath(file_path))
-            app.load_images_from_folder(folder_path)
+            app.load_images_from_folder(folder_path, streaming=False)
             # Navigate to the specific file
             try:
                 file_index = app.image_files.index(os.path.abspath(file_path))